@@ -0,0 +1,95 @@
+"""
+Per-Request Analysis Context
+- Wraps one resume (or job description) for the lifetime of a request
+- Memoizes cleaned text, spaCy Doc, YoE, skills, education and embeddings
+- Shared by CareerModel and JobProbabilityPredictor so each stage runs once
+"""
+
+import numpy as np
+
+from metrics import observe_stage
+
+
+class AnalysisContext:
+    """
+    Lazily computed, memoized view of one text.
+
+    Model methods accept either a raw string or an AnalysisContext; passing the
+    same context to several methods (and to both model classes) means the spaCy
+    parse, regex scans and transformer encodes happen only once per request.
+    """
+
+    def __init__(self, text):
+        self.text = text or ""
+        self._values = {}
+
+    @classmethod
+    def of(cls, text_or_context):
+        if isinstance(text_or_context, cls):
+            return text_or_context
+        return cls(text_or_context)
+
+    def get(self, key, compute):
+        """Return the memoized value for `key`, computing it on first access"""
+        try:
+            return self._values[key]
+        except KeyError:
+            value = self._values[key] = compute()
+            return value
+
+    @property
+    def text_lower(self):
+        return self.get('text_lower', lambda: self.text.lower())
+
+    def spacy_doc(self, load_nlp):
+        """Single spaCy parse of the raw text (None when spaCy is unavailable)"""
+        def parse():
+            nlp = load_nlp()
+            if nlp is None:
+                return None
+            try:
+                with observe_stage('spacy'):
+                    return nlp(self.text)
+            except Exception as e:
+                print(f"⚠️ NER Error: {e}")
+                return None
+        return self.get('spacy_doc', parse)
+
+    @staticmethod
+    def parse_many(contexts, load_nlp, batch_size=32):
+        """spaCy-parse many contexts in one nlp.pipe stream (memoized like spacy_doc)"""
+        todo = [ctx for ctx in contexts if 'spacy_doc' not in ctx._values]
+        if not todo:
+            return
+        nlp = load_nlp()
+        if nlp is None:
+            for ctx in todo:
+                ctx._values['spacy_doc'] = None
+            return
+        try:
+            with observe_stage('spacy'):
+                for ctx, doc in zip(todo, nlp.pipe((ctx.text for ctx in todo), batch_size=batch_size)):
+                    ctx._values['spacy_doc'] = doc
+        except Exception as e:
+            # Leave the rest unparsed; spacy_doc() retries them one by one
+            print(f"⚠️ NER Error: {e}")
+
+    @staticmethod
+    def embed(encoder, items):
+        """
+        Embed (context, cleaned_text) pairs, encoding only the texts not already
+        memoized on their context, in one `encode` call. Returns one row per item.
+        """
+        missing = list(dict.fromkeys(
+            cleaned for ctx, cleaned in items if ('embedding', cleaned) not in ctx._values
+        ))
+
+        if missing:
+            vectors = encoder.encode(missing)
+            encoded = dict(zip(missing, vectors))
+            for ctx, cleaned in items:
+                key = ('embedding', cleaned)
+                if key not in ctx._values:
+                    ctx._values[key] = encoded[cleaned]
+
+        return np.asarray([ctx._values[('embedding', cleaned)] for ctx, cleaned in items])
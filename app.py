@@ -1,24 +1,45 @@
 import os
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+# Started first: every import below is timed per stage (see /readyz)
+from startup import startup
+
 from fastapi import FastAPI, File, UploadFile, Form, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+startup.mark('import web framework')
 
 # Fix for Intel OpenMP DLL conflict (WinError 1114)
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 # Fix for potential OpenBLAS threading issues on Windows
 os.environ["OPENBLAS_MAIN_FREE"] = "1"
 
-import PyPDF2
-import docx2txt
 import numpy as np
-import joblib
+startup.mark('import numpy')
 
 # --- IMPORT MODELS ---
+# Heavy libraries (pandas, sklearn, xgboost, spaCy, torch, shap, PyPDF2) load lazily on the path that needs them
 from career_model import CareerModel
 from job_probability_model import JobProbabilityPredictor
+from analysis_context import AnalysisContext
+from model_registry import registry, process_memory
+from embedding_cache import default_cache
+from micro_batcher import batching_stats
+from inference_executor import InferenceExecutor, ExecutorSaturated
+from metrics import metrics, STAGE_SECONDS, REQUESTS, REQUEST_SECONDS
+from tracing import start_trace, new_trace_id, server_timing, write_sampled
+from candidate_pool import CandidatePool
+from similar_profiles import SimilarProfiles
+from text_extraction import (read_upload, extract_text, is_zip_archive, expand_zip_archive, pdf_sandbox,
+                             warm_pdf_sandbox, UploadTooLarge, UnsupportedFormat, ExtractionFailed, ExtractionBusy,
+                             MAX_UPLOAD_BYTES)
+startup.mark('import model modules')
 
 app = FastAPI(title="Career Guidance API (FastAPI)")
 
@@ -29,11 +50,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by the PHP frontend (other origin) and its devtools users
+    expose_headers=["Server-Timing", "X-Trace-Id"],
 )
 
 # --- CONFIGURATION ---
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Uploads are parsed in memory (limit: MAX_UPLOAD_BYTES, see text_extraction.py)
+UPLOAD_FORM_OVERHEAD_BYTES = 1024 * 1024  # multipart framing + form fields on top of the file bytes
+
+# Inference pool: blocking model work runs here; a full queue returns 503 + Retry-After
+EXECUTOR_KIND = os.environ.get('INFERENCE_EXECUTOR', 'thread')  # 'thread' or 'process'
+EXECUTOR_WORKERS = int(os.environ.get('INFERENCE_WORKERS', min(4, os.cpu_count() or 1)))
+EXECUTOR_QUEUE = int(os.environ.get('INFERENCE_QUEUE', '16'))
+EXECUTOR_RETRY_AFTER = int(os.environ.get('INFERENCE_RETRY_AFTER', '2'))
+executor = InferenceExecutor(EXECUTOR_KIND, EXECUTOR_WORKERS, EXECUTOR_QUEUE, EXECUTOR_RETRY_AFTER)
+
+# Bulk resume analysis (/analyze_resume_batch)
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', '1000'))
+BATCH_MAX_UPLOAD_BYTES = int(os.environ.get('BATCH_MAX_UPLOAD_BYTES', str(200 * 1024 * 1024)))  # per file / .zip
+BATCH_MAX_TOTAL_BYTES = int(os.environ.get('BATCH_MAX_TOTAL_BYTES', str(200 * 1024 * 1024)))  # all files of a request
+BATCH_MAX_EXPANDED_BYTES = int(os.environ.get('BATCH_MAX_EXPANDED_BYTES', str(500 * 1024 * 1024)))  # after unzipping
+BATCH_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', '16'))
+BATCH_EXTRACT_WORKERS = int(os.environ.get('BATCH_EXTRACT_WORKERS', '4'))
+
+# One resume vs. many dream jobs (/compare-jobs)
+JOB_COMPARE_MAX = int(os.environ.get('JOB_COMPARE_MAX', '25'))
+
+# Recruiter mode (/candidates, /rank-candidates); index settings in candidate_pool.py
+RANK_MAX_TOP_K = int(os.environ.get('RANK_MAX_TOP_K', '100'))
+
+# Similar reference resumes (/similar_profiles); index built by `python similar_profiles.py`
+SIMILAR_MAX_K = int(os.environ.get('SIMILAR_MAX_K', '50'))
+
+# Upload endpoints: a larger Content-Length is rejected before the body is read
+UPLOAD_BODY_LIMITS = {
+    '/analyze_resume': MAX_UPLOAD_BYTES,
+    '/predict-job-probability': MAX_UPLOAD_BYTES,
+    '/compare-jobs': MAX_UPLOAD_BYTES,
+    '/similar_profiles': MAX_UPLOAD_BYTES,
+    '/analyze_resume_batch': BATCH_MAX_TOTAL_BYTES,
+    '/candidates': BATCH_MAX_TOTAL_BYTES,
+}
+
+# Per-request Server-Timing + X-Trace-Id; sampled span trees go to TRACE_LOG_PATH (see tracing.py).
+# The NDJSON batch endpoint is not traced: its headers leave before the work is done
+TRACED_PATHS = set(os.environ.get(
+    'TRACED_PATHS', '/analyze_resume,/predict,/predict-job-probability,/compare-jobs,/similar_profiles,/rank-candidates'
+).split(','))
+
+# Startup: models load + warm in the background (STARTUP_WARMUP, see startup.py);
+# model requests arriving before /readyz is green wait up to this long, then get 503
+READY_WAIT_SECONDS = float(os.environ.get('READY_WAIT_SECONDS', '30'))
+WARMUP_RESUME = ("Software engineer with 5 years of experience in Python, Django, SQL, Docker and AWS. "
+                 "B.Tech in Computer Science. Built REST APIs and machine learning pipelines.")
 
 # Mount Static Files
 if os.path.exists("static"):
@@ -47,36 +116,86 @@ if os.path.exists("img"):
 
 templates = Jinja2Templates(directory="templates")
 
-print("--- INITIALIZING SERVER (FastAPI) ---")
-
-# 1. LOAD RESUME MODEL
-try:
-    print("Loading Resume Model (v2 XGBoost)...")
-    resume_model = CareerModel()
-    if not os.path.exists('career_model_v2.pkl'):
-        print("⚠️ Model v2 artifacts missing. Predictions will use fallback until trained.")
-    print("✅ Resume Model OK")
-except Exception as e:
-    print(f"❌ Error loading Resume Model: {e}")
-
-# 2. LOAD SKILL TEST MODEL
-try:
-    print("Loading Skill Test Model...")
-    skill_model = joblib.load('career_model.pkl')
-    label_encoder = joblib.load('label_encoder.pkl')
-    print("✅ Skill Test Model OK")
-except Exception as e:
-    print("⚠️ WARNING: Skill Test files (career_model.pkl) missing.")
-    skill_model = None
-
-# 3. LOAD JOB PROBABILITY PREDICTOR
-try:
-    print("Loading Job Probability Predictor...")
-    job_predictor = JobProbabilityPredictor()
-    print("✅ Job Probability Predictor OK")
-except Exception as e:
-    print(f"❌ Error loading Job Predictor: {e}")
-    job_predictor = None
+# Populated by load_models() during the startup warmup
+resume_model = None
+skill_model = None
+label_encoder = None
+job_predictor = None
+candidate_pool = None
+profile_index = None
+
+def load_models():
+    global resume_model, skill_model, label_encoder, job_predictor, candidate_pool, profile_index
+    print("--- INITIALIZING SERVER (FastAPI) ---")
+
+    # 1. LOAD RESUME MODEL
+    try:
+        print("Loading Resume Model (v2 XGBoost)...")
+        with startup.stage('load resume model'):
+            resume_model = CareerModel()
+        if not resume_model.artifact_store.loaded:
+            print("⚠️ Model v2 artifacts missing. Predictions will use fallback until trained.")
+        print("✅ Resume Model OK")
+    except Exception as e:
+        print(f"❌ Error loading Resume Model: {e}")
+
+    # 2. LOAD SKILL TEST MODEL
+    try:
+        print("Loading Skill Test Model...")
+        with startup.stage('load skill test model'):
+            import joblib
+            skill_model = joblib.load('career_model.pkl')
+            label_encoder = joblib.load('label_encoder.pkl')
+        print("✅ Skill Test Model OK")
+    except Exception as e:
+        print("⚠️ WARNING: Skill Test files (career_model.pkl) missing.")
+        skill_model = None
+
+    # 3. LOAD JOB PROBABILITY PREDICTOR
+    try:
+        print("Loading Job Probability Predictor...")
+        with startup.stage('load job predictor'):
+            job_predictor = JobProbabilityPredictor()
+        print("✅ Job Probability Predictor OK")
+    except Exception as e:
+        print(f"❌ Error loading Job Predictor: {e}")
+        job_predictor = None
+
+    # 4. RECRUITER CANDIDATE POOL (index memory-mapped on first use)
+    candidate_pool = CandidatePool(job_predictor) if job_predictor else None
+
+    # 5. SIMILAR-PROFILES INDEX (memory-mapped now; vectors stay on disk / in the page cache)
+    try:
+        with startup.stage('load profile index'):
+            profile_index = SimilarProfiles(resume_model)
+            if not profile_index.load():
+                print("⚠️ Profile index missing. Build it with: python similar_profiles.py")
+    except Exception as e:
+        print(f"❌ Error loading Profile Index: {e}")
+        profile_index = None
+
+def warm_models():
+    """One dummy inference per model: loads spaCy, the encoder, XGBoost boosters and the explainer"""
+    document = AnalysisContext(WARMUP_RESUME)
+    if resume_model is not None:
+        resume_model.extract_skills(document)
+        resume_model.predict_career(document)
+    if job_predictor is not None:
+        job_predictor.calculate_job_match(document, 'Software Engineer')
+    if skill_model is not None:
+        run_skill_prediction([0] * getattr(skill_model, 'n_features_in_', 17))
+    # Dummy inference is not traffic
+    STAGE_SECONDS.reset()
+
+# Shareable steps: serve.py runs these once in the pre-fork parent
+MODEL_WARMUP_STEPS = [
+    ('load models', load_models, True),
+    ('warm model inference', warm_models, False)
+]
+# Plus per-process state (sandbox worker pipes) that must never cross a fork
+WARMUP_STEPS = MODEL_WARMUP_STEPS + [
+    ('warm pdf sandbox', warm_pdf_sandbox, False)
+]
 
 # --- HTML ROUTES ---
 @app.get("/", response_class=HTMLResponse)
@@ -104,19 +223,319 @@ async def result(request: Request):
     """Resume Analysis Results"""
     return templates.TemplateResponse("result.html", {"request": request})
 
-# --- API ENDPOINTS ---
+# --- BLOCKING STAGES (run on the inference executor, never on the event loop) ---
+
+def run_resume_analysis(content: bytes) -> dict:
+    """Extraction + CareerModel NER/classification for one in-memory upload"""
+    text = extract_text(content)
+    document = AnalysisContext(text)
+    
+    # Run Resume Model (NER/regex pass runs once, shared by both extractors)
+    skills = resume_model.extract_skills(document)
+    education = resume_model.extract_education(document)
+    predictions = resume_model.predict_career(document)
+    
+    return {
+        'success': True,
+        'skills': skills,
+        'education': education,
+        'predictions': predictions
+    }
+
+def run_skill_prediction(responses: list) -> dict:
+    """Skill Test SVM inference"""
+    arr = np.array([responses])
+    pred = skill_model.predict(arr)[0]
+    role = label_encoder.inverse_transform([pred])[0]
+    prob = round(float(max(skill_model.predict_proba(arr)[0])) * 100, 2)
+    return {'role': str(role), 'confidence': prob}
+
+def _apply_ensemble_bonus(result: dict, dream_job: str, career_predictions: list) -> dict:
+    """Soft-voting ensemble: boost the job match when the resume classifier agrees on the role"""
+    bonus_score = 0
+    target_job_lower = dream_job.lower()
+    for pred in career_predictions:
+        if pred['role'].lower() in target_job_lower or target_job_lower in pred['role'].lower():
+            bonus_score = (pred['score'] / 100.0) * 10.0 # Max +10%
+            break
+    
+    final_prob = min(100.0, result.get('probability', 0) + bonus_score)
+    result['probability'] = round(final_prob, 2)
+    result['success'] = True
+    result['ensemble_bonus'] = round(bonus_score, 2)
+    return result
 
-def extract_text_from_file(path: str) -> str:
-    """Helper to synchronously extract text from PDF or DOCX"""
-    text = ""
-    if path.endswith('.pdf'):
-        with open(path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages: 
-                text += page.extract_text() + " "
+def run_job_probability(content: bytes, dream_job: str) -> dict:
+    """Extraction + job match + soft-voting ensemble for one in-memory upload"""
+    text = extract_text(content)
+    document = AnalysisContext(text)
+    
+    # Calculate probability using separate model
+    result = job_predictor.calculate_job_match(document, dream_job)
+    
+    # --- SOFT-VOTING ENSEMBLE ---
+    career_predictions = resume_model.predict_career(document)
+    return _apply_ensemble_bonus(result, dream_job, career_predictions)
+
+def run_job_comparison(content: bytes, dream_jobs: list) -> list:
+    """One extraction, one resume analysis and one batched model call for N target jobs, ranked"""
+    text = extract_text(content)
+    document = AnalysisContext(text)
+    
+    matches = job_predictor.calculate_job_matches(document, dream_jobs)
+    career_predictions = resume_model.predict_career(document)
+    
+    results = [
+        {'target_job': dream_job, **_apply_ensemble_bonus(result, dream_job, career_predictions)}
+        for dream_job, result in zip(dream_jobs, matches)
+    ]
+    results.sort(key=lambda r: r['probability'], reverse=True)
+    for rank, result in enumerate(results, start=1):
+        result['rank'] = rank
+    return results
+
+def _parse_target_jobs(raw: str) -> list:
+    """Target jobs as a JSON array or one per line; blanks and duplicates dropped"""
+    raw = raw.strip()
+    if raw.startswith('['):
+        try:
+            jobs = json.loads(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="targetJobs is not a valid JSON array")
+        if not isinstance(jobs, list):
+            raise HTTPException(status_code=400, detail="targetJobs must be a list")
     else:
-        text = docx2txt.process(path)
-    return text
+        jobs = raw.splitlines()
+    return list(dict.fromkeys(str(job).strip() for job in jobs if str(job).strip()))
+
+def _extract_named(item):
+    name, content = item
+    try:
+        return name, extract_text(content), None
+    except Exception as e:
+        return name, None, str(e)
+
+def _extract_many(items: list) -> list:
+    with ThreadPoolExecutor(max_workers=BATCH_EXTRACT_WORKERS) as pool:
+        return list(pool.map(_extract_named, items))
+
+def run_batch_analysis(items: list) -> list:
+    """Parallel extraction + batched NER/encode/classification for one chunk of uploads"""
+    extracted = _extract_many(items)
+    
+    texts = [text for _, text, error in extracted if error is None]
+    analyses = iter(resume_model.analyze_batch(texts) if texts else [])
+    
+    results = []
+    for name, _, error in extracted:
+        if error is None:
+            results.append({'file': name, 'success': True, **next(analyses)})
+        else:
+            results.append({'file': name, 'success': False, 'error': error})
+    return results
+
+def run_candidate_registration(items: list) -> dict:
+    """Parallel extraction, then one batched profile/encode pass and a single index append"""
+    extracted = _extract_many(items)
+    registered = candidate_pool.register([(name, text) for name, text, error in extracted if error is None])
+    return {
+        'success': True,
+        'registered': registered,
+        'failed': [{'file': name, 'error': error} for name, _, error in extracted if error is not None],
+        'pool_size': len(candidate_pool.index)
+    }
+
+# The pool lives on disk: in process mode each worker has its own (forked) copy
+# of `candidate_pool`, so these stages always start from the newest generation
+def run_candidate_removal(candidate_id: str) -> int:
+    return candidate_pool.remove([candidate_id])
+
+def run_candidate_ranking(job_text: str, top_k: int) -> dict:
+    results = candidate_pool.rank(job_text, top_k)
+    return {'success': True, 'pool_size': len(candidate_pool.index), 'results': results}
+
+def run_similar_profiles(content: bytes, k: int) -> dict:
+    """Extraction + one encode + one index probe"""
+    text = extract_text(content)
+    return {'success': True, **profile_index.search(AnalysisContext(text), k)}
+
+async def _collect_uploads(files: List[UploadFile]) -> list:
+    """(filename, bytes) for every uploaded resume, expanding .zip archives"""
+    items = []
+    total = 0
+    expanded = 0  # bytes held in `items`: plain files + inflated archive members
+    for upload in files:
+        remaining = BATCH_MAX_TOTAL_BYTES - total
+        try:
+            content = await read_upload(upload, min(BATCH_MAX_UPLOAD_BYTES, remaining))
+        except UploadTooLarge:
+            if remaining < BATCH_MAX_UPLOAD_BYTES:
+                raise UploadTooLarge(BATCH_MAX_TOTAL_BYTES, 'Batch')
+            raise
+        total += len(content)
+        if is_zip_archive(content):
+            try:
+                members = await executor.run(expand_zip_archive, content, BATCH_MAX_FILES,
+                                             BATCH_MAX_EXPANDED_BYTES - expanded)
+            except UploadTooLarge:
+                raise UploadTooLarge(BATCH_MAX_EXPANDED_BYTES, 'Expanded batch')
+            expanded += sum(len(member) for _, member in members)
+            items.extend(members)
+        elif len(content) > MAX_UPLOAD_BYTES:
+            raise UploadTooLarge(MAX_UPLOAD_BYTES)
+        elif expanded + len(content) > BATCH_MAX_EXPANDED_BYTES:
+            raise UploadTooLarge(BATCH_MAX_EXPANDED_BYTES, 'Expanded batch')
+        else:
+            expanded += len(content)
+            items.append((upload.filename, content))
+        if len(items) > BATCH_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_FILES} resumes per batch")
+    if not items:
+        raise HTTPException(status_code=400, detail="No resumes found in upload")
+    return items
+
+# --- METRICS (/metrics, Prometheus text format) ---
+
+READY = metrics.gauge('ready', "1 when this worker finished its warmup (summed: ready workers)")
+EXECUTOR_IN_FLIGHT = metrics.gauge('executor_in_flight', "Inference tasks running")
+EXECUTOR_QUEUE_DEPTH = metrics.gauge('executor_queue_depth', "Inference tasks waiting for a worker")
+EXECUTOR_TASKS = metrics.counter('executor_tasks_total', "Inference tasks by result", ('result',))
+CACHE_LOOKUPS = metrics.counter('embedding_cache_lookups_total', "Embedding cache lookups by result", ('result',))
+CACHE_HIT_RATIO = metrics.gauge('embedding_cache_hit_ratio', "Embedding cache (memory + disk) hit ratio", merge='mean')
+CACHE_ENTRIES = metrics.gauge('embedding_cache_entries', "Embeddings held in the in-memory LRU")
+MODEL_LOAD_SECONDS = metrics.gauge('model_load_seconds', "Load time of shared models and resident artifacts",
+                                   ('kind', 'name', 'config'), merge='max')
+ARTIFACT_RELOADS = metrics.counter('artifact_reloads_total', "Hot reloads of resident model artifacts", ('path',))
+STARTUP_STAGE_SECONDS = metrics.gauge('startup_stage_seconds', "Import / load / warmup time per startup stage",
+                                      ('stage',), merge='max')
+
+def collect_metrics():
+    READY.set(1 if startup.ready else 0)
+    stats = executor.stats()
+    EXECUTOR_IN_FLIGHT.set(stats['in_flight'])
+    EXECUTOR_QUEUE_DEPTH.set(stats['queue_depth'])
+    EXECUTOR_TASKS.set_total(stats['completed'], result='completed')
+    EXECUTOR_TASKS.set_total(stats['rejected'], result='rejected')
+    
+    cache = default_cache().stats()
+    for result in ('hits', 'disk_hits', 'misses'):
+        CACHE_LOOKUPS.set_total(cache[result], result=result)
+    CACHE_HIT_RATIO.set(cache['hit_ratio'])
+    CACHE_ENTRIES.set(cache['entries'])
+    
+    for entry in registry.memory_report():
+        if entry['load_time_ms'] is not None:
+            config = ','.join(f"{k}={v}" for k, v in sorted(entry['config'].items()))
+            MODEL_LOAD_SECONDS.set(entry['load_time_ms'] / 1000, kind=entry['kind'], name=entry['name'], config=config)
+    if resume_model is not None:
+        artifacts = resume_model.artifact_store.stats()
+        if artifacts['load_time_ms'] is not None:
+            MODEL_LOAD_SECONDS.set(artifacts['load_time_ms'] / 1000, kind='artifact', name=artifacts['path'], config='')
+        ARTIFACT_RELOADS.set_total(artifacts['reload_count'], path=artifacts['path'])
+    for stage in startup.report()['stages']:
+        STARTUP_STAGE_SECONDS.set(stage['ms'] / 1000, stage=stage['stage'])
+
+metrics.add_collector(collect_metrics)
+
+def _outcome(status_code: int) -> str:
+    if status_code == 503:
+        return 'rejected'
+    if status_code >= 500:
+        return 'error'
+    if status_code >= 400:
+        return 'client_error'
+    return 'success'
+
+# --- API ENDPOINTS ---
+
+@app.middleware("http")
+async def wait_for_warmup(request: Request, call_next):
+    """Model endpoints (every non-GET route) hold requests briefly while the warmup is still loading models"""
+    if request.method != 'GET' and startup.state in ('starting', 'warming'):
+        deadline = time.monotonic() + READY_WAIT_SECONDS
+        while startup.state in ('starting', 'warming') and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if startup.state in ('starting', 'warming'):
+            return JSONResponse(
+                status_code=503,
+                content={'error': 'Server starting: models are still warming up'},
+                headers={'Retry-After': str(EXECUTOR_RETRY_AFTER)}
+            )
+    return await call_next(request)
+
+@app.middleware("http")
+async def reject_oversized_upload(request: Request, call_next):
+    """413 from Content-Length alone, before Starlette reads and spools the multipart body"""
+    limit = UPLOAD_BODY_LIMITS.get(request.url.path)
+    length = request.headers.get('content-length', '')
+    if limit is not None and length.isdigit() and int(length) > limit + UPLOAD_FORM_OVERHEAD_BYTES:
+        return JSONResponse(status_code=413, content={'error': str(UploadTooLarge(limit, 'Request'))})
+    return await call_next(request)
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Server-Timing (wall + CPU per pipeline stage) and X-Trace-Id on traced endpoints"""
+    if request.url.path not in TRACED_PATHS:
+        return await call_next(request)
+    
+    trace_id = new_trace_id(request.headers.get('x-trace-id'))
+    # X-Trace-Debug: 1 forces this request into the span log (when TRACE_LOG_PATH is set)
+    force_sample = request.headers.get('x-trace-debug') == '1'
+    with start_trace(f"{request.method} {request.url.path}", trace_id, force_sample) as trace:
+        response = await call_next(request)
+    
+    response.headers['Server-Timing'] = server_timing(trace)
+    response.headers['Timing-Allow-Origin'] = '*'
+    response.headers['X-Trace-Id'] = trace.trace_id
+    write_sampled(trace, status=response.status_code)
+    return response
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Outermost middleware: request count by endpoint (route template, not raw path) and outcome, plus latency to first byte"""
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get('route')
+        endpoint = getattr(route, 'path', None)
+        if endpoint is None:
+            endpoint = 'static' if request.url.path.startswith(('/static', '/css', '/js', '/img')) else 'unmatched'
+        REQUESTS.inc(endpoint=endpoint, outcome=_outcome(status_code))
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    """Backpressure: shed load instead of queueing without bound"""
+    return JSONResponse(
+        status_code=503,
+        content={'error': str(exc)},
+        headers={'Retry-After': str(exc.retry_after)}
+    )
+
+@app.exception_handler(ExtractionBusy)
+async def extraction_busy_handler(request: Request, exc: ExtractionBusy):
+    """PDF sandbox saturated: retryable, unlike a document that failed to parse (422)"""
+    return JSONResponse(
+        status_code=503,
+        content={'error': str(exc)},
+        headers={'Retry-After': str(exc.retry_after)}
+    )
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large_handler(request: Request, exc: UploadTooLarge):
+    return JSONResponse(status_code=413, content={'error': str(exc)})
+
+@app.exception_handler(UnsupportedFormat)
+async def unsupported_format_handler(request: Request, exc: UnsupportedFormat):
+    return JSONResponse(status_code=415, content={'error': str(exc)})
+
+@app.exception_handler(ExtractionFailed)
+async def extraction_failed_handler(request: Request, exc: ExtractionFailed):
+    return JSONResponse(status_code=422, content={'error': str(exc)})
 
 @app.post("/analyze_resume")
 async def analyze_resume(file: UploadFile = File(...)):
@@ -124,37 +543,54 @@ async def analyze_resume(file: UploadFile = File(...)):
     if not file:
         raise HTTPException(status_code=400, detail="No file uploaded")
     
-    path = os.path.join(UPLOAD_FOLDER, file.filename)
     try:
-        # Async read and save
-        content = await file.read()
-        with open(path, "wb") as f:
-            f.write(content)
-            
-        # Extract text
-        text = extract_text_from_file(path)
-        
-        # Run Resume Model
-        skills = resume_model.extract_skills(text)
-        education = resume_model.extract_education(text)
-        predictions = resume_model.predict_career(text)
-        
-        os.remove(path)
-        
-        return {
-            'success': True,
-            'skills': skills,
-            'education': education,
-            'predictions': predictions
-        }
+        # Streamed into memory with a size cap; nothing touches disk
+        content = await read_upload(file)
+        return await executor.run(run_resume_analysis, content)
     
+    except (ExecutorSaturated, ExtractionBusy, UploadTooLarge, UnsupportedFormat, ExtractionFailed):
+        raise
     except Exception as e:
-        if os.path.exists(path):
-            os.remove(path)
         print(f"Server Error in /analyze_resume: {e}")
         return JSONResponse(status_code=500, content={'error': str(e)})
 
 
+@app.post("/analyze_resume_batch")
+async def analyze_resume_batch(files: List[UploadFile] = File(...)):
+    """FEATURE 1b: Bulk Resume Analysis (many files and/or .zip archives), streamed as NDJSON"""
+    items = await _collect_uploads(files)
+    
+    async def stream():
+        start = time.perf_counter()
+        succeeded = 0
+        for i in range(0, len(items), BATCH_CHUNK_SIZE):
+            chunk = items[i:i + BATCH_CHUNK_SIZE]
+            try:
+                while True:
+                    try:
+                        results = await executor.run(run_batch_analysis, chunk)
+                        break
+                    except ExecutorSaturated as exc:
+                        # Response already streaming: wait for capacity instead of failing
+                        await asyncio.sleep(exc.retry_after)
+            except Exception as e:
+                print(f"Server Error in /analyze_resume_batch: {e}")
+                results = [{'file': name, 'success': False, 'error': str(e)} for name, _ in chunk]
+            
+            for result in results:
+                succeeded += result['success']
+                yield json.dumps(result) + "\n"
+        
+        yield json.dumps({'summary': {
+            'files': len(items),
+            'succeeded': succeeded,
+            'failed': len(items) - succeeded,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+        }}) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @app.post("/predict")
 async def predict_skill(request: Request):
     """FEATURE 2: Skill Test Prediction"""
@@ -169,13 +605,10 @@ async def predict_skill(request: Request):
             raise HTTPException(status_code=400, detail="Invalid inputs")
         
         # Run Skill Test Model
-        arr = np.array([responses])
-        pred = skill_model.predict(arr)[0]
-        role = label_encoder.inverse_transform([pred])[0]
-        prob = round(float(max(skill_model.predict_proba(arr)[0])) * 100, 2)
-        
-        return {'role': str(role), 'confidence': prob}
+        return await executor.run(run_skill_prediction, responses)
     
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         print(f"Error in /predict: {e}")
         return JSONResponse(status_code=500, content={'error': str(e)})
@@ -191,44 +624,157 @@ async def predict_job_probability(targetJob: str = Form(...), file: UploadFile =
     if not dream_job:
         raise HTTPException(status_code=400, detail="Dream job cannot be empty")
         
-    path = os.path.join(UPLOAD_FOLDER, file.filename)
     try:
-        content = await file.read()
-        with open(path, "wb") as f:
-            f.write(content)
-            
-        text = extract_text_from_file(path)
-        
-        # Calculate probability using separate model
-        result = job_predictor.calculate_job_match(text, dream_job)
-        
-        # --- SOFT-VOTING ENSEMBLE ---
-        career_predictions = resume_model.predict_career(text)
-        
-        bonus_score = 0
-        target_job_lower = dream_job.lower()
-        for pred in career_predictions:
-            if pred['role'].lower() in target_job_lower or target_job_lower in pred['role'].lower():
-                bonus_score = (pred['score'] / 100.0) * 10.0 # Max +10%
-                break
-        
-        final_prob = min(100.0, result.get('probability', 0) + bonus_score)
-        result['probability'] = round(final_prob, 2)
-        
-        os.remove(path)
-        
-        result['success'] = True
-        result['ensemble_bonus'] = round(bonus_score, 2)
-        return result
+        content = await read_upload(file)
+        return await executor.run(run_job_probability, content, dream_job)
         
+    except (ExecutorSaturated, ExtractionBusy, UploadTooLarge, UnsupportedFormat, ExtractionFailed):
+        raise
     except Exception as e:
-        if os.path.exists(path):
-            os.remove(path)
         print(f"Server Error in /predict-job-probability: {e}")
         return JSONResponse(status_code=500, content={'error': str(e)})
 
+@app.post("/compare-jobs")
+async def compare_jobs(targetJobs: str = Form(...), file: UploadFile = File(...)):
+    """FEATURE 3b: Dream Job Probability for several target jobs from one upload, ranked"""
+    if not job_predictor:
+        raise HTTPException(status_code=500, detail="Job Predictor model not loaded")
+    
+    dream_jobs = _parse_target_jobs(targetJobs)
+    if not dream_jobs:
+        raise HTTPException(status_code=400, detail="Provide at least one target job")
+    if len(dream_jobs) > JOB_COMPARE_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {JOB_COMPARE_MAX} target jobs per request")
+    
+    try:
+        content = await read_upload(file)
+        results = await executor.run(run_job_comparison, content, dream_jobs)
+        return {'success': True, 'results': results}
+    
+    except (ExecutorSaturated, ExtractionBusy, UploadTooLarge, UnsupportedFormat, ExtractionFailed):
+        raise
+    except Exception as e:
+        print(f"Server Error in /compare-jobs: {e}")
+        return JSONResponse(status_code=500, content={'error': str(e)})
+
+@app.post("/candidates")
+async def register_candidates(files: List[UploadFile] = File(...)):
+    """FEATURE 4: Recruiter Mode - register resumes (files and/or .zip archives) into the candidate pool"""
+    if not candidate_pool:
+        raise HTTPException(status_code=500, detail="Job Predictor model not loaded")
+    
+    items = await _collect_uploads(files)
+    try:
+        return await executor.run(run_candidate_registration, items)
+    
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        print(f"Server Error in /candidates: {e}")
+        return JSONResponse(status_code=500, content={'error': str(e)})
+
+
+@app.delete("/candidates/{candidate_id}")
+async def remove_candidate(candidate_id: str):
+    """FEATURE 4: Recruiter Mode - drop one candidate from the pool"""
+    if not candidate_pool:
+        raise HTTPException(status_code=500, detail="Job Predictor model not loaded")
+    
+    removed = await executor.run(run_candidate_removal, candidate_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail="Unknown candidate")
+    return {'success': True, 'removed': candidate_id}
+
+
+@app.post("/rank-candidates")
+async def rank_candidates(jobDescription: str = Form(...), topK: int = Form(10)):
+    """FEATURE 4: Recruiter Mode - top-K pooled candidates for one job description"""
+    if not candidate_pool:
+        raise HTTPException(status_code=500, detail="Job Predictor model not loaded")
+    
+    job_text = jobDescription.strip()
+    if not job_text:
+        raise HTTPException(status_code=400, detail="Job description cannot be empty")
+    if not 1 <= topK <= RANK_MAX_TOP_K:
+        raise HTTPException(status_code=400, detail=f"topK must be between 1 and {RANK_MAX_TOP_K}")
+    
+    try:
+        return await executor.run(run_candidate_ranking, job_text, topK)
+    
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        print(f"Server Error in /rank-candidates: {e}")
+        return JSONResponse(status_code=500, content={'error': str(e)})
+
+@app.post("/similar_profiles")
+async def similar_profiles(file: UploadFile = File(...), k: int = Form(5)):
+    """FEATURE 5: Most similar reference resumes (and their categories) for an uploaded resume"""
+    if not profile_index or not profile_index.available:
+        raise HTTPException(status_code=503, detail="Profile index not built")
+    if not 1 <= k <= SIMILAR_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {SIMILAR_MAX_K}")
+    
+    try:
+        content = await read_upload(file)
+        return await executor.run(run_similar_profiles, content, k)
+    
+    except (ExecutorSaturated, ExtractionBusy, UploadTooLarge, UnsupportedFormat, ExtractionFailed):
+        raise
+    except Exception as e:
+        print(f"Server Error in /similar_profiles: {e}")
+        return JSONResponse(status_code=500, content={'error': str(e)})
+
+@app.on_event("startup")
+def start_warmup():
+    # Not at import time: spawned sandbox workers re-import this module
+    startup.start_warmup(WARMUP_STEPS)
+    # Pre-forked workers publish snapshots so any worker can answer /metrics for all of them
+    metrics.start_flusher()
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    executor.shutdown()
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving (models may still be warming)"""
+    return {'status': 'ok', 'state': startup.state}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 once every warmup step finished, 503 while warming or after a failed required step"""
+    report = startup.report()
+    return JSONResponse(status_code=200 if startup.ready else 503, content=report)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape target: per-stage latency histograms, request counts, cache, executor and model load metrics"""
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.get("/executor-status")
+async def executor_status():
+    """Inference pool queue depth and wait times, plus PDF sandbox worker health"""
+    return {**executor.stats(), 'pdf_sandbox': pdf_sandbox().stats()}
+
+@app.get("/model-status")
+async def model_status():
+    """Resident artifact load times, hot-reload counters and shared model memory"""
+    return {
+        'resume_model': resume_model.artifact_store.stats() if resume_model else None,
+        'shared_models': registry.memory_report(),
+        'embedding_cache': default_cache().stats(),
+        'encode_batching': batching_stats(),
+        'candidate_pool': candidate_pool.stats() if candidate_pool else None,
+        'profile_index': profile_index.stats() if profile_index else None,
+        'startup': startup.report(),
+        'process_memory': process_memory()
+    }
+
 if __name__ == '__main__':
+    # Single development process; production runs `python serve.py` (pre-forked workers)
     print("\n" + "="*50)
     print("🚀 FastAPI Server Running on http://127.0.0.1:5000")
     print("="*50 + "\n")
+    import uvicorn
     uvicorn.run("app:app", host="0.0.0.0", port=5000)
@@ -0,0 +1,7 @@
+"""
+Benchmarks & Load Tests
+- fixtures: deterministic synthetic resumes (text / PDF / DOCX) and a stub encoder
+- run_benchmarks: per-stage and end-to-end (in-process ASGI) latency, JSON results
+- load_test: concurrent traffic against local serve.py processes, percentiles and saturation points
+Run from the repository root, e.g. python -m benchmarks.run_benchmarks --stub-encoder
+"""
@@ -0,0 +1,229 @@
+"""
+Benchmark Fixtures
+- Deterministic synthetic resumes of a controlled word count (same seed -> same text)
+- The same resume rendered as a minimal PDF (one Helvetica text stream per page) or DOCX
+- Stub sentence encoder (hashed bag of words) so benchmarks run without model downloads
+- Pools of varied-length resume documents for load tests
+"""
+
+import hashlib
+import io
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+JOB_TITLES = [
+    "Python Developer", "Data Scientist", "Frontend Developer", "DevOps Engineer",
+    "Machine Learning Engineer", "Android Developer", "Database Administrator", "Software Tester"
+]
+
+SKILLS = [
+    "python", "django", "flask", "fastapi", "java", "spring boot", "javascript", "typescript", "react",
+    "angular", "node.js", "html", "css", "sql", "mysql", "postgresql", "mongodb", "redis", "aws", "azure",
+    "docker", "kubernetes", "jenkins", "terraform", "git", "linux", "pandas", "numpy", "scikit-learn",
+    "tensorflow", "pytorch", "machine learning", "deep learning", "data analysis", "tableau", "power bi",
+    "android", "kotlin", "flutter", "selenium", "pytest", "agile", "scrum", "communication", "leadership"
+]
+
+DEGREES = ["B.Tech in Computer Science", "M.Tech in Software Engineering", "BCA", "MCA", "MBA", "BSc Physics"]
+COMPANIES = ["Acme Analytics", "Northwind Labs", "Globex Systems", "Initech", "Umbrella Software", "Hooli Cloud"]
+VERBS = ["Built", "Designed", "Maintained", "Migrated", "Optimized", "Led", "Automated", "Deployed", "Tested"]
+OBJECTS = [
+    "REST APIs", "data pipelines", "dashboards", "microservices", "CI/CD pipelines", "recommendation models",
+    "payment services", "mobile apps", "reporting jobs", "search features", "ETL workflows", "test suites"
+]
+FILLER = [
+    "for", "internal", "customer", "teams", "across", "regions", "with", "high", "availability", "and",
+    "reduced", "latency", "by", "percent", "using", "modern", "tooling", "in", "production", "weekly"
+]
+
+SKILL_TEST_QUESTIONS = 17
+
+
+def resume_text(words=400, seed=0):
+    """Plain-text resume of roughly `words` words (summary, experience, skills, education)"""
+    rng = random.Random(f"resume-{seed}")
+    years = rng.randint(1, 15)
+    skills = rng.sample(SKILLS, 12)
+    lines = [
+        f"Candidate {seed}",
+        f"Software professional with {years} years of experience in {', '.join(skills[:4])}.",
+        "",
+        "EXPERIENCE"
+    ]
+    count = sum(len(line.split()) for line in lines)
+    body = []
+    while count < words - 40:
+        if not body or rng.random() < 0.15:
+            start = rng.randint(2005, 2020)
+            line = f"{rng.choice(COMPANIES)} | {start} - {start + rng.randint(1, 4)}"
+        else:
+            filler = " ".join(rng.choice(FILLER) for _ in range(rng.randint(4, 10)))
+            line = f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(skills)} {filler}."
+        body.append(line)
+        count += len(line.split())
+    lines += body + [
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EDUCATION",
+        f"{rng.choice(DEGREES)}, {rng.randint(2000, 2020)}"
+    ]
+    return "\n".join(lines)
+
+
+def resume_texts(words=400, count=1, seed=0):
+    """`count` distinct resumes of the same length (so cached embeddings are not reused across runs)"""
+    return [resume_text(words, seed + i) for i in range(count)]
+
+
+def _wrap(text, width=90):
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + len(word) + 1 > width:
+                yield line
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        yield line
+
+
+def _pdf_string(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def resume_pdf(text, lines_per_page=48):
+    """Minimal valid PDF: one page per `lines_per_page` wrapped lines, text drawn with Helvetica"""
+    lines = list(_wrap(text))
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    font_id = 3 + 2 * len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>"
+    ]
+    for i, page in enumerate(pages):
+        stream = "BT /F1 10 Tf 14 TL 50 770 Td " + " ".join(f"({_pdf_string(line)}) Tj T*" for line in page) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+
+
+def resume_docx(text):
+    """Minimal DOCX package: one paragraph per line of `text`"""
+    paragraphs = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' for line in text.split("\n")
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{paragraphs}</w:body></w:document>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _DOCX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _DOCX_RELS)
+        archive.writestr('word/document.xml', document)
+    return buffer.getvalue()
+
+
+def resume_documents(count, min_words=250, max_words=1200, seed=0):
+    """`count` distinct resumes of varied length, each as {'words', 'text', 'pdf', 'docx'}"""
+    rng = random.Random(f"documents-{seed}")
+    documents = []
+    for i in range(count):
+        words = rng.randint(min_words, max_words)
+        text = resume_text(words, seed * 100000 + i)
+        documents.append({'words': words, 'text': text, 'pdf': resume_pdf(text), 'docx': resume_docx(text)})
+    return documents
+
+
+def skill_test_responses(seed=0):
+    """One /predict payload: 17 answers on the 1-9 scale of the skill test"""
+    rng = random.Random(f"skill-test-{seed}")
+    return [rng.choice((1, 2, 3, 5, 7, 9)) for _ in range(SKILL_TEST_QUESTIONS)]
+
+
+class StubEncoder:
+    """
+    SentenceTransformer stand-in: hashed bag-of-words vectors, deterministic and
+    cheap. Same `encode` signature, so every caller (cache, micro-batcher,
+    feature extraction) runs its real code path around it.
+    """
+
+    encoder_backend = 'stub'
+
+    def __init__(self, dimension=384):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=None, convert_to_numpy=True,
+               normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], 'little') % self.dimension
+                vectors[row, index] += 1.0 if digest[4] & 1 else -1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors /= norms
+        return vectors[0] if single else vectors
+
+
+def install_stub_encoder(name='all-MiniLM-L6-v2', dimension=384):
+    """Make registry.get_encoder(name) return a StubEncoder (call before the first encode)"""
+    from encoder_backends import ENCODER_BACKEND
+    from model_registry import registry
+    return registry.get('encoder', name, lambda _name, **config: StubEncoder(dimension), backend=ENCODER_BACKEND)
+
+
+def install_stub_models(name='all-MiniLM-L6-v2', dimension=384):
+    """
+    Stub encoder, and no on-demand career training: a missing career bundle would
+    otherwise be trained from stub vectors and saved as the real one. Imports
+    career_model (and so metrics): set METRICS_DIR before calling.
+    """
+    install_stub_encoder(name, dimension)
+    from career_model import CareerModel
+    CareerModel.train_model = lambda self, *args, **kwargs: False
@@ -0,0 +1,329 @@
+"""
+Concurrent Load Test (closed loop, increasing concurrency)
+- Virtual users send a weighted mix of /analyze_resume, /predict and /predict-job-probability
+  requests over real sockets, each waiting for its response before sending the next
+- Fixtures: varied-length synthetic resumes as PDF and DOCX (benchmarks/fixtures.py)
+- Per concurrency step: throughput, p50 / p95 / p99 latency, error and 503 (backpressure) rates,
+  per-endpoint split, and speedup over the first step
+- Saturation point: the last step before throughput stops growing by --knee or errors
+  exceed --max-error-rate
+- Every --config (env overrides, e.g. WEB_WORKERS=2,INFERENCE_WORKERS=4) gets its own local
+  serve.py process; --url targets an already running server instead
+- Blocking work on the event loop shows up as a speedup stuck near 1x as concurrency grows
+Usage: python -m benchmarks.load_test [--concurrency 1,2,4,8,16,32] [--duration 15] [--stub-encoder]
+                                      [--config WEB_WORKERS=1] [--config WEB_WORKERS=2] [--json load.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fixtures import JOB_TITLES, install_stub_models, resume_documents, skill_test_responses
+from benchmarks.run_benchmarks import git_revision
+
+DEFAULT_MIX = 'analyze_resume=2,predict=1,predict-job-probability=2'
+DEFAULT_CONCURRENCY = '1,2,4,8,16,32'
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip().lstrip('/')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_config(spec):
+    """'WEB_WORKERS=2,INFERENCE_WORKERS=4' -> {'WEB_WORKERS': '2', 'INFERENCE_WORKERS': '4'}"""
+    overrides = {}
+    for part in spec.split(','):
+        if part.strip():
+            name, _, value = part.partition('=')
+            overrides[name.strip()] = value.strip()
+    return overrides
+
+
+def _analyze_resume(document, rng):
+    if rng.random() < 0.5:
+        return {'method': 'POST', 'url': '/analyze_resume',
+                'files': {'file': ('resume.pdf', document['pdf'], 'application/pdf')}}
+    return {'method': 'POST', 'url': '/analyze_resume',
+            'files': {'file': ('resume.docx', document['docx'], 'application/octet-stream')}}
+
+
+def _predict(document, rng):
+    return {'method': 'POST', 'url': '/predict', 'json': {'responses': skill_test_responses(rng.randrange(10 ** 6))}}
+
+
+def _predict_job_probability(document, rng):
+    return {'method': 'POST', 'url': '/predict-job-probability', 'data': {'targetJob': rng.choice(JOB_TITLES)},
+            'files': {'file': ('resume.pdf', document['pdf'], 'application/pdf')}}
+
+
+ENDPOINTS = {
+    'analyze_resume': _analyze_resume,
+    'predict': _predict,
+    'predict-job-probability': _predict_job_probability
+}
+
+
+def latency_summary(latencies):
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'mean_ms': None}
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 1), 'p95_ms': round(float(p95), 1),
+            'p99_ms': round(float(p99), 1), 'mean_ms': round(float(ms.mean()), 1)}
+
+
+def summarize_step(concurrency, records, elapsed):
+    """records: [(endpoint, seconds, status code or exception name)]"""
+    def counts(rows):
+        ok = [seconds for _, seconds, status in rows if isinstance(status, int) and status < 400]
+        rejected = sum(1 for _, _, status in rows if status == 503)
+        return {
+            'requests': len(rows),
+            'ok': len(ok),
+            'rejected_503': rejected,
+            'errors': len(rows) - len(ok) - rejected,
+            'error_rate': round((len(rows) - len(ok)) / max(len(rows), 1), 4),
+            **latency_summary(ok)
+        }
+
+    step = {'concurrency': concurrency, 'seconds': round(elapsed, 2), **counts(records)}
+    step['throughput_rps'] = round(step['ok'] / max(elapsed, 1e-9), 2)
+    statuses = {}
+    for _, _, status in records:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    step['status'] = statuses
+    step['endpoints'] = {
+        name: counts([row for row in records if row[0] == name])
+        for name in sorted({row[0] for row in records})
+    }
+    return step
+
+
+async def run_step(url, concurrency, duration, mix, documents, timeout, seed=0):
+    """`concurrency` virtual users, each sending back-to-back requests for `duration` seconds"""
+    import httpx
+
+    names, weights = list(mix), list(mix.values())
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    records = []
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        deadline = time.monotonic() + duration
+
+        async def user(index):
+            rng = random.Random(f"load-{seed}-{concurrency}-{index}")
+            while time.monotonic() < deadline:
+                endpoint = rng.choices(names, weights)[0]
+                request = ENDPOINTS[endpoint](rng.choice(documents), rng)
+                start = time.perf_counter()
+                try:
+                    status = (await client.request(**request)).status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                records.append((endpoint, time.perf_counter() - start, status))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize_step(concurrency, records, elapsed)
+
+
+def saturation_point(steps, knee=0.1, max_error_rate=0.01):
+    """Last step whose throughput still grew by `knee` over the previous one, within the error budget"""
+    best = None
+    for step in steps:
+        if step['error_rate'] > max_error_rate:
+            break
+        if best is not None and step['throughput_rps'] < best['throughput_rps'] * (1 + knee):
+            break
+        best = step
+    if best is None:
+        return None
+    return {key: best[key] for key in ('concurrency', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate')}
+
+
+class LocalServer:
+    """serve.py in a child process with env overrides, stopped (SIGTERM) on exit"""
+
+    def __init__(self, overrides, port, stub_encoder, ready_timeout=600):
+        self.overrides = overrides
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.stub_encoder = stub_encoder
+        self.ready_timeout = ready_timeout
+        self.process = None
+        self.log = None
+
+    def __enter__(self):
+        env = {**os.environ, **self.overrides}
+        command = [sys.executable, '-m', 'benchmarks.load_test', '--serve', '--port', str(self.port)]
+        if self.stub_encoder:
+            command.append('--stub-encoder')
+        self.log = tempfile.NamedTemporaryFile(prefix='pathintel-load-server-', suffix='.log', delete=False)
+        self.process = subprocess.Popen(command, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+        try:
+            self._wait_ready()
+        except BaseException:
+            self.__exit__(*sys.exc_info())
+            raise
+        return self
+
+    def _wait_ready(self, checks=3):
+        import httpx
+
+        deadline = time.monotonic() + self.ready_timeout
+        streak = 0
+        # Several consecutive 200s: with pre-forked workers each probe may hit another process
+        while streak < checks:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode} (log: {self.log.name})")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server not ready after {self.ready_timeout:.0f}s (log: {self.log.name})")
+            try:
+                streak = streak + 1 if httpx.get(f"{self.url}/readyz", timeout=5).status_code == 200 else 0
+            except httpx.HTTPError:
+                streak = 0
+            time.sleep(0.5)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.process is not None and self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.log is not None:
+            self.log.close()
+            if exc_type is None:
+                os.remove(self.log.name)
+
+
+def serve_child(port, stub_encoder):
+    """--serve: the pre-forked production launcher, optionally with the stub encoder"""
+    import serve
+
+    owned_dir = None
+    if stub_encoder:
+        # Before serve imports the app: metrics must see METRICS_DIR, warmup must find the stub
+        directory, owned = serve.prepare_metrics_dir()
+        owned_dir = directory if owned else None
+        install_stub_models()
+    try:
+        serve.serve('127.0.0.1', port)
+    finally:
+        if owned_dir:
+            shutil.rmtree(owned_dir, ignore_errors=True)
+
+
+async def warm_up(url, mix, documents, timeout, requests=5):
+    """Untimed requests per endpoint so lazy first-use work is not billed to the first step"""
+    import httpx
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+        for endpoint in mix:
+            rng = random.Random(f"warmup-{endpoint}")
+            for _ in range(requests):
+                try:
+                    await client.request(**ENDPOINTS[endpoint](rng.choice(documents), rng))
+                except httpx.HTTPError:
+                    pass
+
+
+def run_config(url, label, levels, args, mix, documents):
+    print(f"\n⏳ {label}: {', '.join(map(str, levels))} concurrent users x {args.duration:.0f}s")
+    asyncio.run(warm_up(url, mix, documents, args.timeout, args.warmup_requests))
+    steps = []
+    for concurrency in levels:
+        step = asyncio.run(run_step(url, concurrency, args.duration, mix, documents, args.timeout))
+        step['speedup'] = round(step['throughput_rps'] / steps[0]['throughput_rps'], 2) if steps and steps[0]['throughput_rps'] else 1.0
+        steps.append(step)
+        print(f"   {concurrency:>4} users  {step['throughput_rps']:>8.2f} req/s  x{step['speedup']:<5}  "
+              f"p50 {step['p50_ms']} ms  p95 {step['p95_ms']} ms  p99 {step['p99_ms']} ms  "
+              f"errors {step['error_rate'] * 100:.1f}%  503 {step['rejected_503']}")
+        if step['error_rate'] > args.stop_error_rate:
+            print(f"   🛑 Error rate above {args.stop_error_rate * 100:.0f}%, skipping higher concurrency")
+            break
+    saturation = saturation_point(steps, args.knee, args.max_error_rate)
+    if saturation is not None:
+        print(f"   📊 Saturation: {saturation['concurrency']} users -> {saturation['throughput_rps']} req/s "
+              f"(p95 {saturation['p95_ms']} ms)")
+    else:
+        print("   ⚠️ No step within the error budget")
+    return {'config': label, 'steps': steps, 'saturation': saturation}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Closed-loop load test with latency percentiles and saturation points")
+    parser.add_argument('--url', default=None, help="Test a running server instead of starting one per --config")
+    parser.add_argument('--config', action='append', default=[],
+                        help="Env overrides for one local server, e.g. WEB_WORKERS=2,INFERENCE_WORKERS=4 (repeatable)")
+    parser.add_argument('--concurrency', default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--duration', type=float, default=15, help="Seconds per concurrency step")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Endpoint weights")
+    parser.add_argument('--resumes', type=int, default=50, help="Distinct resume fixtures")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--warmup-requests', type=int, default=5, help="Untimed requests per endpoint before the steps")
+    parser.add_argument('--knee', type=float, default=0.1, help="Minimum throughput gain per step before saturation")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--stop-error-rate', type=float, default=0.5)
+    parser.add_argument('--port', type=int, default=5099, help="Port of the local servers")
+    parser.add_argument('--stub-encoder', action='store_true', help="Local servers use the stub encoder (no downloads)")
+    parser.add_argument('--json', default=None, help="Write the results to this file")
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_child(args.port, args.stub_encoder)
+        sys.exit(0)
+
+    mix = parse_mix(args.mix)
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    documents = resume_documents(args.resumes)
+    commit, dirty = git_revision()
+
+    results = []
+    if args.url:
+        results.append(run_config(args.url.rstrip('/'), 'external', levels, args, mix, documents))
+    else:
+        for spec in args.config or ['']:
+            overrides = parse_config(spec)
+            label = ' '.join(f"{k}={v}" for k, v in overrides.items()) or 'defaults'
+            with LocalServer(overrides, args.port, args.stub_encoder) as server:
+                result = run_config(server.url, label, levels, args, mix, documents)
+            results.append({**result, 'overrides': overrides})
+
+    if args.json:
+        report = {
+            'environment': {
+                'commit': commit,
+                'dirty': dirty,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'cpus': os.cpu_count(),
+                'url': args.url,
+                'stub_encoder': args.stub_encoder,
+                'mix': mix,
+                'duration_s': args.duration,
+                'resumes': args.resumes
+            },
+            'results': results
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
@@ -0,0 +1,271 @@
+"""
+Pipeline Benchmark Suite
+- Deterministic synthetic resumes (benchmarks/fixtures.py) at several lengths, as text, PDF and DOCX
+- Each stage timed in isolation: cleaning, skill matching, NER, encode, career prediction,
+  job features, job match, PDF / DOCX extraction
+- End-to-end requests through the FastAPI app in-process (httpx ASGI transport, no socket),
+  with the per-stage split read back from the Server-Timing header
+- Every timed call gets a resume it has not seen, so memoized contexts and the embedding
+  cache never hide resume-side work (job descriptions do hit the cache, as in production)
+- --stub-encoder swaps the sentence transformer for a hashed bag-of-words encoder (no downloads)
+- Results go to JSON; --compare prints the p50 change against an earlier run (e.g. another commit)
+Usage: python -m benchmarks.run_benchmarks [--sizes 150,600,2000] [--repeat 20] [--stub-encoder]
+                                           [--json bench.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+from benchmarks.fixtures import (
+    JOB_TITLES, install_stub_models, resume_docx, resume_pdf, resume_texts, skill_test_responses
+)
+
+DEFAULT_SIZES = (150, 600, 2000)
+
+
+def summarize(samples):
+    samples = np.asarray(samples) * 1000
+    return {
+        'n': int(samples.size),
+        'mean_ms': round(float(samples.mean()), 3),
+        'p50_ms': round(float(np.percentile(samples, 50)), 3),
+        'p95_ms': round(float(np.percentile(samples, 95)), 3),
+        'min_ms': round(float(samples.min()), 3),
+        'max_ms': round(float(samples.max()), 3)
+    }
+
+
+def measure(fn, inputs, warmup):
+    """Call `fn` on the first `warmup` inputs untimed, then time one call per remaining input"""
+    for item in inputs[:warmup]:
+        fn(item)
+    samples = []
+    for item in inputs[warmup:]:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit.stdout.strip(), bool(status.stdout.strip())
+
+
+def prepare_app(stub_encoder):
+    """Import the app and run its warmup inline (the ASGI transport does not send lifespan events)"""
+    if stub_encoder:
+        install_stub_models()
+    import app as application
+    from startup import startup
+    startup.start_warmup(application.WARMUP_STEPS, mode='blocking')
+    if startup.state == 'failed':
+        raise SystemExit(f"🛑 Warmup failed: {startup.errors}")
+    return application
+
+
+def stage_benchmarks(application, sizes, repeat, warmup):
+    from model_registry import registry
+    from text_extraction import extract_text
+
+    resume_model = application.resume_model
+    job_predictor = application.job_predictor
+    encoder = registry.get_encoder(resume_model.embedding_model) if resume_model is not None else None
+    job = JOB_TITLES[0]
+
+    stages = []
+    if resume_model is not None:
+        stages += [
+            ('career.clean_text', 'text', resume_model.clean_text),
+            ('career.get_ner_entities', 'text', resume_model.get_ner_entities)
+        ]
+        if encoder is not None:
+            # Raw encoder: the cached wrapper would only measure a cache lookup
+            stages.append(('encode', 'text', lambda text: encoder.encode([resume_model.clean_text(text)])))
+        # Without a bundle predict_career retrains on every call: nothing meaningful to time
+        if resume_model.artifact_store.get() is not None:
+            stages.append(('career.predict_career', 'text', resume_model.predict_career))
+    if job_predictor is not None:
+        stages += [
+            ('job.clean_text', 'text', job_predictor.clean_text),
+            ('job._extract_skills', 'text', job_predictor._extract_skills),
+            ('job._extract_features', 'text', lambda text: job_predictor._extract_features(text, job)),
+            ('job.calculate_job_match', 'text', lambda text: job_predictor.calculate_job_match(text, job))
+        ]
+    stages += [
+        ('extract_pdf', 'pdf', extract_text),
+        ('extract_docx', 'docx', extract_text)
+    ]
+
+    results = []
+    for words in sizes:
+        texts = resume_texts(words, repeat + warmup, seed=words)
+        inputs = {'text': texts, 'pdf': [resume_pdf(t) for t in texts], 'docx': [resume_docx(t) for t in texts]}
+        for name, kind, fn in stages:
+            # Fresh resumes per stage: earlier stages must not warm the embedding cache for later ones
+            if kind == 'text':
+                items = resume_texts(words, repeat + warmup, seed=words * 1000 + len(results))
+            else:
+                items = inputs[kind]
+            result = {'kind': 'stage', 'name': name, 'words': words, 'input': kind, **measure(fn, items, warmup)}
+            results.append(result)
+            print(f"   {name:<26} {words:>5} words  p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms")
+    return results
+
+
+def parse_server_timing(header):
+    """{stage: wall ms} from a Server-Timing header"""
+    timings = {}
+    for entry in (header or '').split(','):
+        name, _, params = entry.strip().partition(';')
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'dur':
+                timings[name] = float(value)
+    return timings
+
+
+async def _endpoint_run(application, requests, warmup):
+    import httpx
+
+    transport = httpx.ASGITransport(app=application.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark', timeout=120) as client:
+        samples, statuses, stage_ms = [], {}, {}
+        for i, request in enumerate(requests):
+            start = time.perf_counter()
+            response = await client.request(**request)
+            elapsed = time.perf_counter() - start
+            if i < warmup:
+                continue
+            samples.append(elapsed)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            for stage, ms in parse_server_timing(response.headers.get('server-timing')).items():
+                stage_ms.setdefault(stage, []).append(ms)
+    return samples, statuses, {stage: round(sum(v) / len(v), 3) for stage, v in sorted(stage_ms.items())}
+
+
+def endpoint_benchmarks(application, sizes, repeat, warmup):
+    results = []
+    count = repeat + warmup
+    for words in sizes:
+        texts = resume_texts(words, count, seed=words * 7919)
+        pdfs = [resume_pdf(t) for t in texts]
+        docxs = [resume_docx(t) for t in texts]
+        cases = [
+            ('POST /analyze_resume', 'pdf', [
+                {'method': 'POST', 'url': '/analyze_resume', 'files': {'file': ('resume.pdf', pdf, 'application/pdf')}}
+                for pdf in pdfs]),
+            ('POST /analyze_resume', 'docx', [
+                {'method': 'POST', 'url': '/analyze_resume', 'files': {'file': ('resume.docx', docx, 'application/octet-stream')}}
+                for docx in docxs]),
+            ('POST /predict-job-probability', 'pdf', [
+                {'method': 'POST', 'url': '/predict-job-probability', 'data': {'targetJob': JOB_TITLES[i % len(JOB_TITLES)]},
+                 'files': {'file': ('resume.pdf', pdf, 'application/pdf')}}
+                for i, pdf in enumerate(pdfs)])
+        ]
+        for name, kind, requests in cases:
+            samples, statuses, stages = asyncio.run(_endpoint_run(application, requests, warmup))
+            result = {'kind': 'endpoint', 'name': name, 'words': words, 'input': kind,
+                      **summarize(samples), 'status': statuses, 'server_timing_ms': stages}
+            results.append(result)
+            print(f"   {name} ({kind}) {words:>5} words  p50 {result['p50_ms']:>9.3f} ms  "
+                  f"p95 {result['p95_ms']:>9.3f} ms  status {statuses}")
+
+    # Skill test: fixed-size JSON payload, independent of resume length
+    requests = [{'method': 'POST', 'url': '/predict', 'json': {'responses': skill_test_responses(i)}} for i in range(count)]
+    samples, statuses, stages = asyncio.run(_endpoint_run(application, requests, warmup))
+    result = {'kind': 'endpoint', 'name': 'POST /predict', 'words': None, 'input': 'json',
+              **summarize(samples), 'status': statuses, 'server_timing_ms': stages}
+    results.append(result)
+    print(f"   POST /predict (json)  p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms  status {statuses}")
+    return results
+
+
+def environment(application, stub_encoder, sizes, repeat, warmup):
+    from encoder_backends import ENCODER_BACKEND
+    from model_registry import registry
+    from spacy_profiles import NLP_PROFILE
+
+    commit, dirty = git_revision()
+    resume_model = application.resume_model
+    encoder = registry.get_encoder(resume_model.embedding_model) if resume_model is not None else None
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'encoder': 'stub' if stub_encoder else ENCODER_BACKEND,
+        'encoder_running': getattr(encoder, 'encoder_backend', None) if encoder is not None else None,
+        'spacy_profile': NLP_PROFILE,
+        'spacy_loaded': registry.get_nlp() is not None,
+        'career_bundle_loaded': resume_model is not None and resume_model.artifact_store.get() is not None,
+        'job_model_loaded': getattr(application.job_predictor, 'model', None) is not None,
+        'skill_model_loaded': application.skill_model is not None,
+        'sizes': list(sizes),
+        'repeat': repeat,
+        'warmup': warmup
+    }
+
+
+def compare(results, baseline_path):
+    """Print the p50 change of every benchmark present in both runs"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    before = {(r['kind'], r['name'], r['words'], r['input']): r for r in baseline['results']}
+    print(f"\n📊 Against {baseline_path} (commit {baseline['environment'].get('commit')}):")
+    for result in results:
+        old = before.get((result['kind'], result['name'], result['words'], result['input']))
+        if old is None or not old['p50_ms']:
+            continue
+        change = (result['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+        flag = '⚠️' if change > 10 else ('✅' if change < -10 else '  ')
+        label = f"{result['name']} ({result['input']}, {result['words'] or '-'} words)"
+        print(f"   {flag} {label:<52} {old['p50_ms']:>9.3f} -> {result['p50_ms']:>9.3f} ms  ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage and endpoint on synthetic resumes")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help="Resume lengths in words")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed calls per benchmark")
+    parser.add_argument('--warmup', type=int, default=2, help="Untimed calls per benchmark")
+    parser.add_argument('--stub-encoder', action='store_true', help="Hashed bag-of-words encoder instead of the transformer")
+    parser.add_argument('--skip-stages', action='store_true')
+    parser.add_argument('--skip-endpoints', action='store_true')
+    parser.add_argument('--json', default=None, help="Write the results to this file")
+    parser.add_argument('--compare', default=None, help="Earlier --json output to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    application = prepare_app(args.stub_encoder)
+    env = environment(application, args.stub_encoder, sizes, args.repeat, args.warmup)
+    print(f"⏳ Benchmarking commit {env['commit']}{' (dirty)' if env['dirty'] else ''} | "
+          f"encoder {env['encoder_running']} | spaCy {env['spacy_profile'] if env['spacy_loaded'] else 'off'}")
+
+    results = []
+    if not args.skip_stages:
+        print("\n⏱️ Stages:")
+        results += stage_benchmarks(application, sizes, args.repeat, args.warmup)
+    if not args.skip_endpoints:
+        print("\n⏱️ Endpoints (in-process ASGI):")
+        results += endpoint_benchmarks(application, sizes, args.repeat, args.warmup)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'environment': env, 'results': results}, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,123 @@
+"""
+Recruiter Candidate Pool
+- Resumes registered once: embedding, skills, YoE and cleaned text stored per candidate
+- Candidates keyed by a server-side content hash (the upload filename is metadata only)
+- Embeddings kept in a memory-mapped VectorIndex (float16/int8, optional IVF) for top-K retrieval
+- Registrations append to the index; IVF is re-trained only when the appended delta outgrows
+  CANDIDATE_INDEX_COMPACT_RATIO of the pool or is older than CANDIDATE_INDEX_COMPACT_AGE seconds
+- Only the retrieved shortlist is re-ranked by the XGBoost job-fit regressor
+"""
+
+import hashlib
+import os
+import time
+
+from analysis_context import AnalysisContext
+from job_probability_model import load_spacy
+from vector_index import VectorIndex
+
+# --- CONFIGURATION (environment overrides) ---
+CANDIDATE_POOL_DIR = os.environ.get('CANDIDATE_POOL_DIR', 'candidate_pool')
+CANDIDATE_INDEX_DTYPE = os.environ.get('CANDIDATE_INDEX_DTYPE', 'float16')  # 'float16' or 'int8'
+CANDIDATE_INDEX_LISTS = int(os.environ.get('CANDIDATE_INDEX_LISTS', '0'))  # 0 = exact scan
+CANDIDATE_INDEX_PROBE = int(os.environ.get('CANDIDATE_INDEX_PROBE', '8'))
+CANDIDATE_INDEX_COMPACT_RATIO = float(os.environ.get('CANDIDATE_INDEX_COMPACT_RATIO', '0.2'))
+CANDIDATE_INDEX_COMPACT_AGE = float(os.environ.get('CANDIDATE_INDEX_COMPACT_AGE', '3600'))  # 0 = size trigger only
+CANDIDATE_SHORTLIST = int(os.environ.get('CANDIDATE_SHORTLIST', '100'))
+
+
+class CandidatePool:
+    """
+    Reverse of JobProbabilityPredictor.calculate_job_match: many resumes, one job.
+
+    Registration does the expensive per-resume work (spaCy, skill matching,
+    encoding) exactly once. Ranking embeds the job, retrieves a shortlist from
+    the vector index and scores only that shortlist with the regressor.
+    """
+
+    def __init__(self, predictor, directory=CANDIDATE_POOL_DIR, dtype=CANDIDATE_INDEX_DTYPE,
+                 n_lists=CANDIDATE_INDEX_LISTS, n_probe=CANDIDATE_INDEX_PROBE,
+                 compact_ratio=CANDIDATE_INDEX_COMPACT_RATIO, compact_age=CANDIDATE_INDEX_COMPACT_AGE):
+        self.predictor = predictor
+        self.index = VectorIndex(directory, dtype=dtype, n_lists=n_lists, n_probe=n_probe,
+                                 compact_ratio=compact_ratio, compact_age=compact_age)
+
+    def _encoder(self):
+        encoder = self.predictor.transformer
+        if encoder is None or not hasattr(encoder, 'encode'):
+            raise RuntimeError("Transformer unavailable: candidate embeddings cannot be computed")
+        return encoder
+
+    @staticmethod
+    def candidate_id(text):
+        """Server-side id: content hash of the resume text (same resume -> same id)"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def register(self, candidates):
+        """
+        Add candidates given as (filename, resume_text) pairs (merged into the
+        newest on-disk generation, whichever process wrote it).
+        Returns [{'candidate_id', 'filename'}]; re-registering the same text replaces its entry.
+        """
+        by_id = {}
+        for filename, text in candidates:
+            by_id[self.candidate_id(text)] = (filename, text)
+        candidates = [(candidate_id, filename, text) for candidate_id, (filename, text) in by_id.items()]
+        if not candidates:
+            return []
+        encoder = self._encoder()
+
+        contexts = [AnalysisContext(text) for _, _, text in candidates]
+        AnalysisContext.parse_many(contexts, load_spacy)
+        profiles = [self.predictor.candidate_profile(ctx) for ctx in contexts]
+        vectors = AnalysisContext.embed(encoder, [(ctx, profile['clean']) for ctx, profile in zip(contexts, profiles)])
+
+        registered_at = time.time()
+        self.index.remove(lambda meta: meta['candidate_id'] in by_id)
+        self.index.add(vectors, [
+            {'candidate_id': candidate_id, 'filename': filename, 'registered_at': registered_at, **profile}
+            for (candidate_id, filename, _), profile in zip(candidates, profiles)
+        ])
+        self.index.flush()
+        return [{'candidate_id': candidate_id, 'filename': filename} for candidate_id, filename, _ in candidates]
+
+    def remove(self, candidate_ids):
+        self.index.load()
+        ids = set(candidate_ids)
+        removed = self.index.remove(lambda meta: meta['candidate_id'] in ids)
+        if removed:
+            self.index.flush()
+        return removed
+
+    def rank(self, job_text, top_k=10, shortlist=CANDIDATE_SHORTLIST):
+        """Top `top_k` candidates for a job: vector retrieval of `shortlist`, then regressor re-rank"""
+        # Another worker process may have registered or removed candidates since the last check
+        self.index.load()
+        job_ctx = AnalysisContext.of(job_text)
+        query = AnalysisContext.embed(self._encoder(), [(job_ctx, self.predictor._clean(job_ctx))])[0]
+        hits = self.index.search(query, k=max(shortlist, top_k))
+
+        profiles = [meta for _, meta in hits]
+        similarities = [score for score, _ in hits]
+        scored = self.predictor.rank_candidates(job_ctx, profiles, similarities)
+
+        results = []
+        for profile, similarity, (probability, explanation, matching, missing) in zip(profiles, similarities, scored):
+            results.append({
+                'candidate_id': profile['candidate_id'],
+                'filename': profile.get('filename'),
+                'probability': round(probability, 2),
+                'semantic_similarity': round(similarity, 4),
+                'years_experience': profile['years_experience'],
+                'matching_skills': matching,
+                'missing_skills': missing[:10],
+                'explanation': explanation
+            })
+        results.sort(key=lambda r: (r['probability'], r['semantic_similarity']), reverse=True)
+        results = results[:top_k]
+        for rank, result in enumerate(results, start=1):
+            result['rank'] = rank
+        return results
+
+    def stats(self):
+        return {**self.index.stats(), 'candidates': len(self.index), 'shortlist': CANDIDATE_SHORTLIST}
@@ -1,10 +1,15 @@
-import pandas as pd
 import numpy as np
-import pickle
 import re
 import os
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
+from artifact_store import ArtifactStore, atomic_pickle_dump
+from model_bundle import (write_bundle, load_bundle, manifest_path, pack_label_encoder, unpack_label_encoder,
+                          pack_isotonic, IsotonicCalibrator)
+from analysis_context import AnalysisContext
+from embedding_cache import cached_encoder
+from metrics import observe_stage
+from model_registry import registry
+from phrase_matcher import compile_phrases
+from spacy_profiles import NLP_PROFILE
 
 # Lazy loading flags
 SPACY_AVAILABLE = False
@@ -14,61 +19,62 @@ nlp = None
 def load_spacy():
     global nlp, SPACY_AVAILABLE
     if not SPACY_AVAILABLE:
-        try:
-            import spacy
-            from spacy.language import Language
-            from spacy.tokens import Doc
-            try:
-                from word2number import w2n
-            except ImportError:
-                w2n = None
-                
-            nlp = spacy.load("en_core_web_sm")
-            
-            if not Doc.has_extension("total_yoe"):
-                Doc.set_extension("total_yoe", default=0.0)
-                
-            @Language.component("extract_yoe")
-            def extract_yoe_component(doc):
-                total_years = 0.0
-                for token in doc:
-                    if token.lemma_ == "year":
-                        number_token = None
-                        for child in token.children:
-                            if child.pos_ == "NUM":
-                                number_token = child
-                                break
-                        if number_token:
-                            try:
-                                if w2n:
-                                    years = float(w2n.word_to_num(number_token.text))
-                                else:
-                                    years = float(number_token.text)
-                                start = max(0, token.i - 5)
-                                end = min(len(doc), token.i + 6)
-                                context = doc[start:end].text.lower()
-                                if any(kw in context for kw in ["experience", "worked", "developer", "engineer", "professional"]):
-                                    total_years += years
-                            except Exception:
-                                pass
-                doc._.total_yoe = total_years
-                return doc
-                
-            nlp.add_pipe("extract_yoe", after="ner")
-            SPACY_AVAILABLE = True
-            print("✅ spaCy loaded successfully with custom extract_yoe component")
-        except Exception as e:
-            print(f"⚠️ Warning: spaCy failed to load ({e}). Using fallback keyword matching.")
-            SPACY_AVAILABLE = False
+        # Shared, thread-safe pipeline (one copy per process for both models)
+        nlp = registry.get_nlp("en_core_web_sm")
+        SPACY_AVAILABLE = nlp is not None
+        if SPACY_AVAILABLE:
+            print(f"✅ spaCy loaded successfully with custom extract_yoe component ({NLP_PROFILE} profile)")
+        elif registry.nlp_error('en_core_web_sm') is not None:  # None: fast profile, spaCy off by choice
+            print(f"⚠️ Warning: spaCy failed to load ({registry.nlp_error('en_core_web_sm')}). Using fallback keyword matching.")
     return nlp
 
+def save_career_bundle(artifacts, directory):
+    """Write classifier (UBJSON), label classes and isotonic thresholds (.npy) as a model bundle"""
+    classifier = artifacts['classifier']
+    use_calibrator = bool(artifacts.get('use_calibrator')) and artifacts.get('calibrator') is not None
+    arrays = pack_label_encoder(artifacts['encoder'])
+    if use_calibrator:
+        arrays.update(pack_isotonic(artifacts['calibrator']))
+    return write_bundle(
+        directory, 'career-classifier',
+        boosters={'classifier': classifier},
+        arrays=arrays,
+        schema={
+            'input': 'sentence-embedding',
+            'embedding_model': artifacts['embedding_model'],
+            'embedding_dim': int(classifier.n_features_in_),
+            'classes': [str(c) for c in artifacts['encoder'].classes_]
+        },
+        metadata={'use_calibrator': use_calibrator}
+    )
+
+def load_career_bundle(directory, manifest_payload=None):
+    """Artifacts dict (same keys as the legacy pickle) rebuilt from a model bundle"""
+    from xgboost import XGBClassifier
+    bundle = load_bundle(directory, manifest_payload)
+    classifier = bundle.booster('classifier', XGBClassifier)
+    use_calibrator = bundle.metadata.get('use_calibrator', False)
+    return {
+        'classifier': classifier,
+        'encoder': unpack_label_encoder(bundle.arrays),
+        'embedding_model': bundle.schema['embedding_model'],
+        'calibrator': IsotonicCalibrator(classifier, bundle.arrays) if use_calibrator else None,
+        'use_calibrator': use_calibrator,
+        'model_version': bundle.manifest['model_version']
+    }
+
 class CareerModel:
     def __init__(self):
-        self.encoder = LabelEncoder()
-        self.model_path = 'career_model_v2.pkl'
+        self.encoder = None  # LabelEncoder, fitted by train_model (sklearn imported there)
+        self.model_path = 'career_model_v2.pkl'  # legacy pickle, read only when no bundle exists
+        self.bundle_path = 'career_model_v2.bundle'
         self.embedding_model = 'all-MiniLM-L6-v2'
         self._transformer = None
         
+        # Resident artifacts: loaded once here, hot-reloaded when the bundle manifest changes
+        self.artifact_store = self._artifact_store()
+        self.artifact_store.load()
+        
         # XGBoost import (Lazy)
         try:
             from xgboost import XGBClassifier
@@ -93,44 +99,68 @@ class CareerModel:
             "communication", "leadership", "problem solving", "agile", "scrum", "linux", 
             "devops", "azure", "jenkins", "spark", "hadoop", "flutter", "dart", "android", "ios"
         ]
+        
+        # Degree aliases (canonical label -> surface forms)
+        self.education_db = {
+            "B.TECH": ["b.tech", "btech", "bachelor of technology"],
+            "B.E": ["b.e", "bachelor of engineering"],
+            "M.TECH": ["m.tech", "mtech", "master of technology"],
+            "M.E": ["m.e"],
+            "BCA": ["bca"], "MCA": ["mca"], "BSC": ["bsc", "b.sc"], "MSC": ["msc", "m.sc"],
+            "MBA": ["mba"], "PHD": ["phd", "ph.d"], "BBA": ["bba"]
+        }
+        
+        # Compiled once per dictionary: one pass over the text finds every entry
+        self.skill_matcher = compile_phrases({skill.capitalize(): skill for skill in self.skills_db})
+        self.education_matcher = compile_phrases(self.education_db)
+
+    def _artifact_store(self):
+        bundle_manifest = manifest_path(self.bundle_path)
+        if os.path.exists(bundle_manifest) or not os.path.exists(self.model_path):
+            return ArtifactStore(bundle_manifest, loader=lambda payload: load_career_bundle(self.bundle_path, payload))
+        print(f"⚠️ Loading legacy pickle {self.model_path}; convert it with: python convert_artifacts.py")
+        return ArtifactStore(self.model_path)
 
     @property
     def transformer(self):
         global TRANSFORMER_AVAILABLE
         if self._transformer is None:
-            try:
-                from sentence_transformers import SentenceTransformer
-                print("⏳ Loading Transformer Model...")
-                self._transformer = SentenceTransformer(self.embedding_model)
-                TRANSFORMER_AVAILABLE = True
-                print("✅ Transformer loaded successfully")
-            except Exception as e:
-                print(f"⚠️ Warning: Transformer failed to load ({e}). Careers will be predicted using zero-vectors/fallback if needed.")
-                TRANSFORMER_AVAILABLE = False
+            # Shared with JobProbabilityPredictor through the process-wide registry,
+            # behind the content-addressed embedding cache
+            self._transformer = cached_encoder(self.embedding_model)
+            TRANSFORMER_AVAILABLE = self._transformer is not None
+            if not TRANSFORMER_AVAILABLE:
+                error = registry.encoder_error(self.embedding_model)
+                print(f"⚠️ Warning: Transformer failed to load ({error}). Careers will be predicted using zero-vectors/fallback if needed.")
         return self._transformer
 
     def clean_text(self, text):
         """Advanced cleaning of Resume/Docx text"""
         if not text: return ""
-        # Remove URLs
-        text = re.sub(r'http\S+\s*', ' ', text)
-        # Remove special characters but keep important ones for tech (e.g., C++, .NET)
-        text = re.sub(r'[^\w\s\+\.#]', ' ', text)
-        # Remove non-ascii
-        text = re.sub(r'[^\x00-\x7f]', r' ', text)
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text.lower()
+        with observe_stage('clean'):
+            # Remove URLs
+            text = re.sub(r'http\S+\s*', ' ', text)
+            # Remove special characters but keep important ones for tech (e.g., C++, .NET)
+            text = re.sub(r'[^\w\s\+\.#]', ' ', text)
+            # Remove non-ascii
+            text = re.sub(r'[^\x00-\x7f]', r' ', text)
+            # Normalize whitespace
+            text = re.sub(r'\s+', ' ', text).strip()
+            return text.lower()
 
     def get_ner_entities(self, text):
         """Extract 'Years of Experience' and 'Skills' using NER/Rule-based hybrid"""
+        ctx = AnalysisContext.of(text)
+        return ctx.get('career.entities', lambda: self._compute_ner_entities(ctx))
+
+    def _compute_ner_entities(self, ctx):
         entities = {
             "years_experience": 0,
             "technical_skills": set(),
             "education": []
         }
         
-        text_lower = text.lower()
+        text_lower = ctx.text_lower
         
         # 1. Extract Experience
         exp_patterns = [
@@ -144,11 +174,9 @@ class CareerModel:
                 entities["years_experience"] = max(entities["years_experience"], int(matches[0]))
 
         # 2. Extract Skills (Hybrid: NER + Keyword matching)
-        spacy_nlp = load_spacy()
-        if SPACY_AVAILABLE and spacy_nlp:
+        doc = ctx.spacy_doc(load_spacy)
+        if doc is not None:
             try:
-                doc = spacy_nlp(text)
-                
                 # Check for YoE extracted from custom component
                 if hasattr(doc._, 'total_yoe') and doc._.total_yoe > 0:
                     entities["years_experience"] = max(entities["years_experience"], int(doc._.total_yoe))
@@ -161,23 +189,13 @@ class CareerModel:
                 print(f"⚠️ NER Error: {e}")
         
         # Fallback keyword matching
-        for skill in self.skills_db:
-            if re.search(r'\b' + re.escape(skill) + r'\b', text_lower):
-                entities["technical_skills"].add(skill.capitalize())
+        with observe_stage('skills'):
+            entities["technical_skills"].update(self.skill_matcher.findall(text_lower))
 
         # 3. Extract Education
-        edu_patterns = [
-            r"(?i)(b\.?tech|b\.?e|bachelor of technology|bachelor of engineering)",
-            r"(?i)(m\.?tech|m\.?e|master of technology)",
-            r"(?i)(bca|mca|bsc|msc|mba|phd|bba)"
-        ]
-        for pattern in edu_patterns:
-            match = re.search(pattern, text)
-            if match:
-                entities["education"].append(match.group(0).upper())
+        entities["education"] = self.education_matcher.findall(text_lower)
                 
         entities["technical_skills"] = list(entities["technical_skills"])
-        entities["education"] = list(set(entities["education"]))
         return entities
 
     def train_model(self, csv_path='dataset9000.csv'):
@@ -185,6 +203,11 @@ class CareerModel:
             print(f"❌ Error: Dataset not found at {csv_path}")
             return False
 
+        # Training-only dependencies: kept out of the serving import path
+        import pandas as pd
+        from sklearn.preprocessing import LabelEncoder
+        from sklearn.model_selection import train_test_split
+
         print("⏳ Preparing Dataset for XGBoost...")
         df = pd.read_csv(csv_path)
         
@@ -198,10 +221,13 @@ class CareerModel:
             text_col = 'Resume'
 
         df['cleaned_resume'] = df[text_col].apply(lambda x: self.clean_text(str(x)))
+        self.encoder = LabelEncoder()
         y_encoded = self.encoder.fit_transform(df[target_col])
         
         print(f"⏳ Generating Embeddings with {self.embedding_model}...")
-        trans = self.transformer
+        # Raw encoder: one-off training vectors should not churn the request-time embedding
+        # cache, nor be rounded to its float16 storage
+        trans = registry.get_encoder(self.embedding_model)
         if trans is not None and hasattr(trans, 'encode'):
             try:
                 X_embeddings = trans.encode(df['cleaned_resume'].tolist(), show_progress_bar=True)
@@ -230,56 +256,98 @@ class CareerModel:
             self.calibrator = None
             
         # Save
-        print(f"✅ Saving Model to {self.model_path}...")
-        with open(self.model_path, 'wb') as f:
-            pickle.dump({
-                'classifier': self.classifier,
-                'encoder': self.encoder,
-                'embedding_model': self.embedding_model,
-                'calibrator': getattr(self, 'calibrator', None),
-                'use_calibrator': getattr(self, 'use_calibrator', False)
-            }, f)
+        artifacts = {
+            'classifier': self.classifier,
+            'encoder': self.encoder,
+            'embedding_model': self.embedding_model,
+            'calibrator': getattr(self, 'calibrator', None),
+            'use_calibrator': getattr(self, 'use_calibrator', False)
+        }
+        if hasattr(self.classifier, 'save_model'):
+            print(f"✅ Saving Model bundle to {self.bundle_path}...")
+            save_career_bundle(artifacts, self.bundle_path)
+        else:
+            # RandomForest fallback has no native format
+            print(f"✅ Saving Model to {self.model_path}...")
+            atomic_pickle_dump(artifacts, self.model_path)
+        self.artifact_store = self._artifact_store()
+        self.artifact_store.load(force=True)
         return True
 
     def predict_career(self, text):
-        if not os.path.exists(self.model_path):
+        return self.predict_careers([text])[0]
+
+    def predict_careers(self, texts):
+        """Batched predict_career: one encode and one predict_proba call for all texts"""
+        contexts = [AnalysisContext.of(t) for t in texts]
+        artifacts = self.artifact_store.get()
+        if artifacts is None:
             success = self.train_model()
-            if not success: return []
-            
-        with open(self.model_path, 'rb') as f:
-            artifacts = pickle.load(f)
+            if not success: return [[] for _ in contexts]
+            artifacts = self.artifact_store.get()
+            if artifacts is None: return [[] for _ in contexts]
         
-        cleaned_text = self.clean_text(text)
+        items = [(ctx, ctx.get('career.clean', lambda ctx=ctx: self.clean_text(ctx.text))) for ctx in contexts]
         
         # Handle Transformer Availability
         trans = self.transformer
         if trans is not None and hasattr(trans, 'encode'):
             try:
-                embedding = trans.encode([cleaned_text])
+                embeddings = AnalysisContext.embed(trans, items)
                 
                 # Use Calibrator if available
-                if artifacts.get('use_calibrator', False) and artifacts.get('calibrator') is not None:
-                    probs = artifacts['calibrator'].predict_proba(embedding)[0]
+                calibrator = artifacts.get('calibrator') if artifacts.get('use_calibrator', False) else None
+                if calibrator is not None and hasattr(calibrator, 'calibrate'):
+                    with observe_stage('predict'):
+                        raw_probs = artifacts['classifier'].predict_proba(embeddings)
+                    with observe_stage('calibrate'):
+                        probs_matrix = calibrator.calibrate(raw_probs)
+                elif calibrator is not None:
+                    # Legacy pickled CalibratedClassifierCV: predict + calibrate in one call
+                    with observe_stage('calibrate'):
+                        probs_matrix = calibrator.predict_proba(embeddings)
                 else:
-                    probs = artifacts['classifier'].predict_proba(embedding)[0]
+                    with observe_stage('predict'):
+                        probs_matrix = artifacts['classifier'].predict_proba(embeddings)
             except Exception as e:
                 print(f"⚠️ Inference Error: {e}. Falling back to error role.")
-                return [{"role": "Inference Error (Fallback)", "score": 0.0}]
+                return [[{"role": "Inference Error (Fallback)", "score": 0.0}] for _ in contexts]
         else:
             print("🛑 Error: Transformer unavailable or invalid. Using fallback.")
-            return [{"role": "System Loading/Error", "score": 0.0}]
+            return [[{"role": "System Loading/Error", "score": 0.0}] for _ in contexts]
         
+        return [self._top_predictions(probs, artifacts) for probs in probs_matrix]
+
+    def _top_predictions(self, probs, artifacts):
         # Top 5 Predictions for broader range
         top_indices = np.argsort(probs)[::-1][:5]
         results = []
         for idx in top_indices:
             if probs[idx] > 0.01:
                 results.append({
-                    "role": artifacts['encoder'].inverse_transform([idx])[0],
+                    "role": artifacts['encoder'].classes_[idx],
                     "score": round(float(probs[idx]) * 100, 1)
                 })
         return results
 
+    def analyze_batch(self, texts, batch_size=32):
+        """
+        Skills, education and career predictions for many resumes at once:
+        spaCy runs through nlp.pipe, encoding and classification in single batches.
+        """
+        contexts = [AnalysisContext.of(t) for t in texts]
+        AnalysisContext.parse_many(contexts, load_spacy, batch_size=batch_size)
+        predictions = self.predict_careers(contexts)
+        results = []
+        for ctx, preds in zip(contexts, predictions):
+            entities = self.get_ner_entities(ctx)
+            results.append({
+                'skills': entities["technical_skills"],
+                'education': entities["education"],
+                'predictions': preds
+            })
+        return results
+
     def extract_skills(self, text):
         """Wrapper for backward compatibility"""
         entities = self.get_ner_entities(text)
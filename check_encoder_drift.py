@@ -0,0 +1,137 @@
+"""
+Encoder Backend Drift Check (vs fp32 PyTorch)
+- Texts: cleaned resumes (archive/UpdatedResumeDataSet.csv) + resume / job title pairs (job_dataset.csv)
+- Per-text cosine between each backend's vector and the fp32 vector (mean / p1 / min)
+- Resume nearest-neighbour agreement (top-1, overlap@10) as used by similar-profiles search
+- |Δ semantic_similarity| on the job-match pairs (the job model's strongest feature)
+- Batch throughput and single-text latency per backend
+Usage: python check_encoder_drift.py [--backends torch-int8 onnx onnx-int8] [--min-cosine 0.98] [--json drift.json]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from career_model import CareerModel
+from encoder_backends import BACKENDS, load_encoder
+from job_probability_model import JobProbabilityPredictor
+from vector_index import normalize_rows
+
+
+def load_texts(resume_csv, job_csv, rows):
+    career_model = CareerModel()
+    job_predictor = JobProbabilityPredictor()
+    resumes = list(dict.fromkeys(career_model.clean_text(str(t)) for t in pd.read_csv(resume_csv)['Resume']))[:rows]
+    jobs = pd.read_csv(job_csv).head(rows)
+    pairs = [(job_predictor.clean_text(str(r)), job_predictor.clean_text(str(j)))
+             for r, j in zip(jobs['resume_text'], jobs['job_title'])]
+    return career_model.embedding_model, resumes, pairs
+
+
+def encode(encoder, texts, batch_size):
+    start = time.perf_counter()
+    vectors = normalize_rows(np.asarray(encoder.encode(texts, batch_size=batch_size, show_progress_bar=False), dtype=np.float32))
+    return vectors, len(texts) / max(time.perf_counter() - start, 1e-9)
+
+
+def single_latency(encoder, texts, samples=50):
+    latencies = []
+    for text in texts[:samples]:
+        start = time.perf_counter()
+        encoder.encode([text], show_progress_bar=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def neighbours(vectors, k=10):
+    sims = vectors @ vectors.T
+    np.fill_diagonal(sims, -np.inf)
+    return np.argsort(-sims, axis=1)[:, :k]
+
+
+def measure(encoder, texts, n_resumes, n_pairs, batch_size):
+    vectors, throughput = encode(encoder, texts, batch_size)
+    p50, p95 = single_latency(encoder, texts)
+    resumes = vectors[:n_resumes]
+    pair_resumes = vectors[n_resumes:n_resumes + n_pairs]
+    pair_jobs = vectors[n_resumes + n_pairs:]
+    return {
+        'vectors': vectors,
+        'neighbours': neighbours(resumes),
+        'pair_similarity': np.einsum('ij,ij->i', pair_resumes, pair_jobs),
+        'texts_per_s': round(throughput, 1),
+        'single_ms_p50': round(p50, 2),
+        'single_ms_p95': round(p95, 2)
+    }
+
+
+def compare(result, reference):
+    cosine = np.einsum('ij,ij->i', result['vectors'], reference['vectors'])
+    top1 = result['neighbours'][:, 0] == reference['neighbours'][:, 0]
+    overlap = [len(set(a) & set(b)) / len(b) for a, b in zip(result['neighbours'], reference['neighbours'])]
+    sim_diff = np.abs(result['pair_similarity'] - reference['pair_similarity'])
+    return {
+        'cosine_mean': round(float(cosine.mean()), 5),
+        'cosine_p1': round(float(np.percentile(cosine, 1)), 5),
+        'cosine_min': round(float(cosine.min()), 5),
+        'neighbour_top1_agreement': round(float(top1.mean()), 4),
+        'neighbour_overlap_at_10': round(float(np.mean(overlap)), 4),
+        'similarity_abs_diff_mean': round(float(sim_diff.mean()), 5),
+        'similarity_abs_diff_max': round(float(sim_diff.max()), 5)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure embedding drift of encoder backends against fp32 PyTorch")
+    parser.add_argument('--backends', nargs='+', default=[b for b in BACKENDS if b != 'torch'], choices=BACKENDS)
+    parser.add_argument('--resume-csv', default='archive/UpdatedResumeDataSet.csv')
+    parser.add_argument('--job-csv', default='job_dataset.csv')
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--min-cosine', type=float, default=0.98, help="Fail when any backend's p1 cosine is below this")
+    parser.add_argument('--json', default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    model_name, resumes, pairs = load_texts(args.resume_csv, args.job_csv, args.rows)
+    texts = resumes + [r for r, _ in pairs] + [j for _, j in pairs]
+    print(f"⏳ Checking {model_name} on {len(resumes)} resumes and {len(pairs)} job pairs...")
+
+    reference = measure(load_encoder(model_name, 'torch'), texts, len(resumes), len(pairs), args.batch_size)
+    results = [{'backend': 'torch', 'texts_per_s': reference['texts_per_s'],
+                'single_ms_p50': reference['single_ms_p50'], 'single_ms_p95': reference['single_ms_p95']}]
+    failed = False
+    for backend in args.backends:
+        try:
+            encoder = load_encoder(model_name, backend, fallback=False)
+        except Exception as e:
+            results.append({'backend': backend, 'error': str(e)})
+            continue
+        result = measure(encoder, texts, len(resumes), len(pairs), args.batch_size)
+        drift = compare(result, reference)
+        failed = failed or drift['cosine_p1'] < args.min_cosine
+        results.append({'backend': backend, 'texts_per_s': result['texts_per_s'],
+                        'single_ms_p50': result['single_ms_p50'], 'single_ms_p95': result['single_ms_p95'], **drift})
+
+    print("\n" + "=" * 60)
+    for result in results:
+        if 'error' in result:
+            print(f"⚠️ {result['backend']:>10}: unavailable ({result['error']})")
+            continue
+        print(f"{result['backend']:>10}: {result['texts_per_s']} texts/s | single p50 {result['single_ms_p50']} ms "
+              f"| p95 {result['single_ms_p95']} ms")
+        if 'cosine_mean' in result:
+            print(f"            cosine mean {result['cosine_mean']} p1 {result['cosine_p1']} | "
+                  f"NN top-1 {result['neighbour_top1_agreement']} @10 {result['neighbour_overlap_at_10']} | "
+                  f"|Δsim| max {result['similarity_abs_diff_max']}")
+    print("=" * 60)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    if failed:
+        print(f"🛑 A backend drifted below cosine {args.min_cosine}: keep ENCODER_BACKEND=torch")
+        raise SystemExit(1)
@@ -0,0 +1,83 @@
+"""
+Convert legacy pickled models to versioned model bundles
+- career_model_v2.pkl          -> career_model_v2.bundle/ (XGBoost UBJSON + classes + isotonic .npy)
+- job_probability_model_v2.pkl -> job_probability_model_v2.bundle/ (XGBoost UBJSON + scaler .npy)
+Each conversion is checksum-verified, checked for prediction parity and timed against the pickle load.
+The skill-test SVC (career_model.pkl / label_encoder.pkl) has no native format and stays joblib.
+"""
+
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+
+from career_model import save_career_bundle, load_career_bundle
+from job_probability_model import JobProbabilityPredictor, save_job_bundle, load_job_bundle
+from model_bundle import manifest_path, load_bundle
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def convert_career(pickle_path, bundle_path, samples=256):
+    legacy, pickle_ms = _timed(_load_pickle, pickle_path)
+    save_career_bundle(legacy, bundle_path)
+    load_bundle(bundle_path, verify=True)
+    artifacts, bundle_ms = _timed(load_career_bundle, bundle_path)
+
+    X = np.random.default_rng(0).normal(size=(samples, artifacts['classifier'].n_features_in_)).astype(np.float32)
+    key = 'calibrator' if artifacts['use_calibrator'] else 'classifier'
+    diff = np.abs(legacy[key].predict_proba(X) - artifacts[key].predict_proba(X)).max()
+    same_classes = list(legacy['encoder'].classes_) == list(artifacts['encoder'].classes_)
+    print(f"✅ {pickle_path} -> {bundle_path}: pickle load {pickle_ms:.1f} ms, bundle load {bundle_ms:.1f} ms, "
+          f"max |Δproba| {diff:.2e} ({key}), classes {'match' if same_classes else 'DIFFER'}")
+    return diff < 1e-5 and same_classes
+
+
+def convert_job(pickle_path, bundle_path, samples=256):
+    legacy, pickle_ms = _timed(_load_pickle, pickle_path)
+    embedding_model = legacy.get('embedding_model', 'all-MiniLM-L6-v2')
+    save_job_bundle(legacy['model'], legacy['scaler'], embedding_model, bundle_path)
+    load_bundle(bundle_path, verify=True)
+    (model, scaler, _), bundle_ms = _timed(load_job_bundle, bundle_path)
+
+    X = np.random.default_rng(0).normal(size=(samples, len(JobProbabilityPredictor.FEATURE_NAMES)))
+    expected = legacy['model'].predict(legacy['scaler'].transform(X))
+    diff = np.abs(expected - model.predict(scaler.transform(X))).max()
+    print(f"✅ {pickle_path} -> {bundle_path}: pickle load {pickle_ms:.1f} ms, bundle load {bundle_ms:.1f} ms, "
+          f"max |Δprediction| {diff:.2e}")
+    return diff < 1e-3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert legacy model pickles to model bundles")
+    parser.add_argument('--force', action='store_true', help="Overwrite bundles that already exist")
+    args = parser.parse_args()
+
+    ok = True
+    for pickle_path, bundle_path, convert in [
+        ('career_model_v2.pkl', 'career_model_v2.bundle', convert_career),
+        ('job_probability_model_v2.pkl', 'job_probability_model_v2.bundle', convert_job)
+    ]:
+        if not os.path.exists(pickle_path):
+            print(f"⚠️ {pickle_path} not found, skipping")
+            continue
+        if os.path.exists(manifest_path(bundle_path)) and not args.force:
+            print(f"⚠️ {bundle_path} already exists, skipping (use --force to overwrite)")
+            continue
+        ok = convert(pickle_path, bundle_path) and ok
+
+    print("⚠️ career_model.pkl / label_encoder.pkl (skill-test SVC) are left as joblib files")
+    if not ok:
+        print("🛑 Parity check failed: keep serving the pickles until this is investigated")
+        raise SystemExit(1)
@@ -0,0 +1,212 @@
+"""
+Content-Addressed Embedding Cache
+- Key: (model name[:backend], sha1 of whitespace-normalized text)
+- Bounded in-memory LRU of float16 vectors
+- Optional sqlite tier that survives restarts and is shared by workers
+- Hit/miss counters for capacity planning
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import observe_stage
+from micro_batcher import MicroBatcher, BATCH_WINDOW_MS
+from model_registry import registry
+
+# --- CONFIGURATION (environment overrides) ---
+CACHE_MAX_ENTRIES = int(os.environ.get('EMBEDDING_CACHE_SIZE', '20000'))
+CACHE_DB_PATH = os.environ.get('EMBEDDING_CACHE_DB') or None
+
+
+class EmbeddingCache:
+    """LRU of float16 embeddings with an optional on-disk sqlite tier"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, db_path=CACHE_DB_PATH):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            self._db = self._connect(db_path)
+
+    @staticmethod
+    def _connect(db_path):
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings ('
+            'model TEXT, key TEXT, dim INTEGER, vec BLOB, PRIMARY KEY (model, key))'
+        )
+        db.commit()
+        return db
+
+    def _after_fork(self):
+        # sqlite connections must not cross a fork: the child opens its own.
+        # The inherited handle is kept referenced, never closed, so the parent's stays intact.
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+        if self._db is not None:
+            _inherited_connections.append(self._db)
+            self._db = self._connect(self.db_path)
+
+    @staticmethod
+    def make_key(model_name, text):
+        normalized = ' '.join(str(text).split())
+        return model_name, hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_name, texts):
+        """Cached float16 vectors for `texts` (None where missing)"""
+        keys = [self.make_key(model_name, t) for t in texts]
+        found = [None] * len(keys)
+        pending = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                    self.hits += 1
+                else:
+                    pending.append(i)
+
+            if pending and self._db is not None:
+                still_missing = []
+                for i in pending:
+                    row = self._db.execute(
+                        'SELECT dim, vec FROM embeddings WHERE model = ? AND key = ?', keys[i]
+                    ).fetchone()
+                    if row is None:
+                        still_missing.append(i)
+                        continue
+                    vector = np.frombuffer(row[1], dtype=np.float16, count=row[0])
+                    self._remember(keys[i], vector)
+                    found[i] = vector
+                    self.disk_hits += 1
+                pending = still_missing
+
+            self.misses += len(pending)
+        return found
+
+    def put_many(self, model_name, texts, vectors):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model_name, text)
+                vector = np.asarray(vector, dtype=np.float16)
+                self._remember(key, vector)
+                if self._db is not None:
+                    rows.append((key[0], key[1], int(vector.shape[0]), vector.tobytes()))
+            if rows:
+                self._db.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)', rows)
+                self._db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._memory),
+            'max_entries': self.max_entries,
+            'disk_tier': self.db_path,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_ratio': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+class CachedEncoder:
+    """
+    Drop-in wrapper around a SentenceTransformer: `encode` serves repeated
+    texts from the cache and only sends new ones to the underlying model.
+    """
+
+    def __init__(self, encoder, model_name, cache):
+        self.encoder = encoder
+        self.model_name = model_name
+        self.cache = cache
+
+    def encode(self, sentences, **kwargs):
+        # Tensor outputs or custom pooling bypass the cache
+        if kwargs.get('convert_to_tensor') or kwargs.get('output_value') not in (None, 'sentence_embedding'):
+            return self.encoder.encode(sentences, **kwargs)
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return self.encoder.encode(texts, **kwargs)
+
+        vectors = self.cache.get_many(self.model_name, texts)
+        missing = list(dict.fromkeys(texts[i] for i, vector in enumerate(vectors) if vector is None))
+
+        if missing:
+            with observe_stage('encode'):
+                encoded = np.asarray(self.encoder.encode(missing, **kwargs))
+            self.cache.put_many(self.model_name, missing, encoded)
+            # Round fresh rows like cached ones so repeats return identical vectors
+            fresh = dict(zip(missing, encoded.astype(np.float16)))
+            vectors = [fresh[texts[i]] if vector is None else vector for i, vector in enumerate(vectors)]
+
+        result = np.asarray(vectors, dtype=np.float32)
+        return result[0] if single else result
+
+    def __getattr__(self, name):
+        return getattr(self.encoder, name)
+
+
+_default_cache = None
+_wrappers = {}
+_wrappers_lock = threading.Lock()
+_inherited_connections = []
+
+
+def default_cache():
+    global _default_cache
+    with _wrappers_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+    return _default_cache
+
+
+def _reset_after_fork():
+    global _wrappers_lock
+    _wrappers_lock = threading.Lock()
+    if _default_cache is not None:
+        _default_cache._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def cached_encoder(model_name='all-MiniLM-L6-v2'):
+    """Shared registry encoder behind the micro-batcher and process-wide embedding cache (None if unavailable)"""
+    wrapper = _wrappers.get(model_name)
+    if wrapper is not None:
+        return wrapper
+    encoder = registry.get_encoder(model_name)
+    if encoder is None:
+        return None
+    # Quantized / ONNX vectors drift slightly from fp32: never mix them in the shared sqlite tier
+    backend = getattr(encoder, 'encoder_backend', 'torch')
+    namespace = model_name if backend == 'torch' else f"{model_name}:{backend}"
+    if BATCH_WINDOW_MS > 0:
+        # Cache misses from concurrent requests share one forward pass
+        encoder = MicroBatcher(encoder)
+    cache = default_cache()
+    with _wrappers_lock:
+        wrapper = _wrappers.setdefault(model_name, CachedEncoder(encoder, namespace, cache))
+    return wrapper
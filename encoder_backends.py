@@ -0,0 +1,191 @@
+"""
+Pluggable Sentence-Encoder Backends
+- torch:      SentenceTransformer in fp32 PyTorch (reference)
+- torch-int8: same model with every nn.Linear dynamically quantized to int8
+- onnx:       exported transformer graph on ONNX Runtime + numpy mean pooling / L2 normalize
+- onnx-int8:  the ONNX graph with int8 dynamically quantized weights
+Selected with ENCODER_BACKEND; export the ONNX graphs once with
+`python encoder_backends.py all-MiniLM-L6-v2` and check drift with check_encoder_drift.py.
+"""
+
+import json
+import os
+
+import numpy as np
+
+# --- CONFIGURATION (environment overrides) ---
+ENCODER_BACKEND = os.environ.get('ENCODER_BACKEND', 'torch')
+ONNX_MODEL_DIR = os.environ.get('ONNX_MODEL_DIR', 'onnx_models')
+ONNX_THREADS = int(os.environ.get('ONNX_THREADS', '0'))  # 0 = onnxruntime default
+
+BACKENDS = ('torch', 'torch-int8', 'onnx', 'onnx-int8')
+
+
+def onnx_model_dir(name):
+    return os.path.join(ONNX_MODEL_DIR, name.replace('/', '__'))
+
+
+def _load_torch(name, **config):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name, **config)
+
+
+def _load_torch_int8(name):
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+    if torch.backends.quantized.engine == 'none' or 'fbgemm' not in torch.backends.quantized.supported_engines:
+        # ARM nodes ship qnnpack instead of fbgemm
+        torch.backends.quantized.engine = 'qnnpack'
+    # Quantized kernels are CPU-only
+    model = _load_torch(name, device='cpu')
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class OnnxEncoder:
+    """
+    SentenceTransformer-compatible `encode` over an exported ONNX graph.
+
+    Texts are tokenized with the model's own tokenizer, batched by length
+    (like SentenceTransformer) and mean-pooled over the attention mask.
+    """
+
+    def __init__(self, model_dir, quantized=False, threads=ONNX_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, 'encoder.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        graph = self.meta['files']['int8' if quantized else 'fp32']
+        if graph is None:
+            raise FileNotFoundError(f"No int8 graph exported in {model_dir}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(os.path.join(model_dir, graph), options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = self.meta['max_seq_length']
+        self.dimension = self.meta['dimension']
+        self.normalize = self.meta['normalize']
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=None, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        # Longest first, so each batch pads to similar lengths
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            batch = self.tokenizer([texts[i] for i in rows], padding=True, truncation=True,
+                                   max_length=self.max_seq_length, return_tensors='np')
+            feeds = {
+                name: np.asarray(batch[name] if name in batch else np.zeros_like(batch['input_ids']), dtype=np.int64)
+                for name in self.input_names
+            }
+            hidden = self.session.run(None, feeds)[0]
+            mask = batch['attention_mask'][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize or normalize_embeddings:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings[rows] = pooled
+
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(name, backend='torch', fallback=True):
+    """
+    Registry factory. A non-reference backend that cannot be loaded (missing
+    onnxruntime, graph not exported, ...) falls back to fp32 PyTorch unless
+    `fallback` is False; `encoder.encoder_backend` reports what is actually running.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend}")
+    try:
+        if backend == 'torch':
+            encoder = _load_torch(name)
+        elif backend == 'torch-int8':
+            encoder = _load_torch_int8(name)
+        else:
+            encoder = OnnxEncoder(onnx_model_dir(name), quantized=backend == 'onnx-int8')
+    except Exception as e:
+        if backend == 'torch' or not fallback:
+            raise
+        print(f"⚠️ Encoder backend '{backend}' unavailable for {name} ({e}). Falling back to fp32 PyTorch.")
+        encoder, backend = _load_torch(name), 'torch'
+    encoder.encoder_backend = backend
+    return encoder
+
+
+def export_onnx(name, out_dir=None, quantize=True, opset=14):
+    """Export the transformer of a mean-pooling SentenceTransformer to ONNX (+ int8 copy)"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = out_dir or onnx_model_dir(name)
+    os.makedirs(out_dir, exist_ok=True)
+    model = SentenceTransformer(name, device='cpu')
+    transformer, pooling = model[0], model[1]
+    if not getattr(pooling, 'pooling_mode_mean_tokens', False):
+        raise ValueError(f"{name} does not use mean pooling; only mean-pooling models can be exported")
+    normalize = any(type(module).__name__ == 'Normalize' for module in model)
+
+    hf_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(['export sample text'], return_tensors='pt')
+    input_names = [n for n in ('input_ids', 'attention_mask', 'token_type_ids') if n in sample]
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = hf_model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic = {'batch': 0, 'sequence': 1}
+    fp32_path = os.path.join(out_dir, 'model.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(), tuple(sample[n] for n in input_names), fp32_path,
+            input_names=input_names, output_names=['last_hidden_state'],
+            dynamic_axes={n: {v: k for k, v in dynamic.items()} for n in input_names + ['last_hidden_state']},
+            opset_version=opset
+        )
+    tokenizer.save_pretrained(out_dir)
+
+    int8_file = None
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_file = 'model.int8.onnx'
+        quantize_dynamic(fp32_path, os.path.join(out_dir, int8_file), weight_type=QuantType.QInt8)
+
+    with open(os.path.join(out_dir, 'encoder.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': name,
+            'max_seq_length': model.max_seq_length,
+            'dimension': model.get_sentence_embedding_dimension(),
+            'pooling': 'mean',
+            'normalize': normalize,
+            'inputs': input_names,
+            'opset': opset,
+            'files': {'fp32': 'model.onnx', 'int8': int8_file}
+        }, f, indent=2)
+    print(f"✅ Exported {name} to {out_dir} (int8: {'yes' if int8_file else 'no'})")
+    return out_dir
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Export a SentenceTransformer to ONNX for the onnx / onnx-int8 backends")
+    parser.add_argument('model', nargs='?', default='all-MiniLM-L6-v2')
+    parser.add_argument('--out', default=None)
+    parser.add_argument('--no-quantize', action='store_true')
+    parser.add_argument('--opset', type=int, default=14)
+    args = parser.parse_args()
+    export_onnx(args.model, args.out, quantize=not args.no_quantize, opset=args.opset)
@@ -0,0 +1,127 @@
+"""
+Bounded Inference Executor
+- Runs blocking stages (PDF/DOCX parsing, spaCy, encode, XGBoost, SHAP) off the event loop
+- Thread or process pool with a hard cap on queued work
+- Fails fast with ExecutorSaturated instead of building unbounded latency
+- Exposes in-flight, queue depth and queue-wait statistics
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from tracing import record
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor queue is full; the API maps it to 503 + Retry-After"""
+
+    def __init__(self, retry_after):
+        super().__init__("Server busy: inference queue is full")
+        self.retry_after = retry_after
+
+
+def _timed_call(submitted_at, fn, args, kwargs):
+    """Runs inside the worker; reports when the task actually started"""
+    started_at = time.time()
+    return started_at - submitted_at, fn(*args, **kwargs)
+
+
+class InferenceExecutor:
+    """
+    Pool of `max_workers` threads (or processes) accepting at most
+    `max_queue` tasks waiting on top of the ones already running.
+
+    Process mode pickles the callable and its arguments, so only submit
+    module-level functions there (forked workers inherit loaded models).
+    """
+
+    def __init__(self, kind='thread', max_workers=4, max_queue=16, retry_after=2):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pool = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    @property
+    def pool(self):
+        # Created on first use so the pool is not inherited across a fork
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == 'process':
+                        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+        return self._pool
+
+    def _acquire(self):
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def _release(self, wait):
+        with self._lock:
+            self.in_flight -= 1
+            if wait is not None:
+                self.completed += 1
+                self.total_wait += wait
+                self.last_wait = wait
+                self.max_wait = max(self.max_wait, wait)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` in the pool, or raise ExecutorSaturated if the queue is full"""
+        if not self._acquire():
+            raise ExecutorSaturated(self.retry_after)
+
+        call = functools.partial(_timed_call, time.time(), fn, args, kwargs)
+        if self.kind == 'thread':
+            # Carry request-scoped context (trace spans, etc.) into the worker thread
+            call = functools.partial(contextvars.copy_context().run, call)
+
+        wait = None
+        try:
+            wait, result = await asyncio.get_running_loop().run_in_executor(self.pool, call)
+            return result
+        finally:
+            self._release(wait)
+            if wait is not None:
+                record('queue_wait', wait)
+
+    @property
+    def queue_depth(self):
+        return max(0, self.in_flight - self.max_workers)
+
+    def stats(self):
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_wait_ms': round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 2),
+            'last_wait_ms': round(self.last_wait * 1000, 2)
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
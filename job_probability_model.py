@@ -7,15 +7,16 @@ Enhanced Dataset-Based Job Probability Predictor - v2.0
 
 import re
 import numpy as np
-import pandas as pd
-import re
-import numpy as np
-import pandas as pd
 import pickle
 import os
 import random
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
+import time
+from analysis_context import AnalysisContext
+from embedding_cache import cached_encoder
+from metrics import observe_stage
+from model_registry import registry
+from phrase_matcher import compile_phrases
+from model_bundle import write_bundle, load_bundle, manifest_path, pack_scaler, unpack_scaler
 
 # Lazy loading flags
 SPACY_AVAILABLE = False
@@ -26,67 +27,62 @@ nlp = None
 def load_spacy():
     global nlp, SPACY_AVAILABLE
     if not SPACY_AVAILABLE:
-        try:
-            import spacy
-            from spacy.language import Language
-            from spacy.tokens import Doc
-            try:
-                from word2number import w2n
-            except ImportError:
-                w2n = None
-            
-            nlp = spacy.load("en_core_web_sm")
-            
-            if not Doc.has_extension("total_yoe"):
-                Doc.set_extension("total_yoe", default=0.0)
-                
-            @Language.component("extract_yoe")
-            def extract_yoe_component(doc):
-                total_years = 0.0
-                for token in doc:
-                    if token.lemma_ == "year":
-                        number_token = None
-                        for child in token.children:
-                            if child.pos_ == "NUM":
-                                number_token = child
-                                break
-                        if number_token:
-                            try:
-                                if w2n:
-                                    years = float(w2n.word_to_num(number_token.text))
-                                else:
-                                    years = float(number_token.text)
-                                start = max(0, token.i - 5)
-                                end = min(len(doc), token.i + 6)
-                                context = doc[start:end].text.lower()
-                                if any(kw in context for kw in ["experience", "worked", "developer", "engineer", "professional"]):
-                                    total_years += years
-                            except Exception:
-                                pass
-                doc._.total_yoe = total_years
-                return doc
-                
-            nlp.add_pipe("extract_yoe", after="ner")
-            SPACY_AVAILABLE = True
-        except Exception as e:
-            print(f"⚠️ Warning: spaCy failed to load in Job Predictor ({e})")
-            SPACY_AVAILABLE = False
+        # Same registry entry as career_model: the pipeline is loaded once per process
+        nlp = registry.get_nlp("en_core_web_sm")
+        SPACY_AVAILABLE = nlp is not None
+        if not SPACY_AVAILABLE and registry.nlp_error('en_core_web_sm') is not None:
+            print(f"⚠️ Warning: spaCy failed to load in Job Predictor ({registry.nlp_error('en_core_web_sm')})")
     return nlp
 
 
+def save_job_bundle(model, scaler, embedding_model, directory):
+    """Write the regressor (UBJSON) and scaler parameters (.npy) as a model bundle"""
+    return write_bundle(
+        directory, 'job-fit-regressor',
+        boosters={'regressor': model},
+        arrays=pack_scaler(scaler),
+        schema={
+            'input': 'job-fit-features',
+            'features': JobProbabilityPredictor.FEATURE_NAMES,
+            'embedding_model': embedding_model,
+            'target': 'match_score (0-100)'
+        }
+    )
+
+def load_job_bundle(directory, manifest_payload=None):
+    """(regressor, scaler, manifest) rebuilt from a model bundle"""
+    from xgboost import XGBRegressor
+    bundle = load_bundle(directory, manifest_payload)
+    features = bundle.schema.get('features')
+    if features != JobProbabilityPredictor.FEATURE_NAMES:
+        raise ValueError(f"Bundle feature schema {features} does not match this build")
+    return bundle.booster('regressor', XGBRegressor), unpack_scaler(bundle.arrays), bundle.manifest
+
+
 class JobProbabilityPredictor:
     """
     Advanced ML-based job probability predictor with synthetic data augmentation
     """
     
+    FEATURE_NAMES = [
+        "Semantic Similarity", "Skill Match Ratio", "Skill Overlap", "Years of Experience",
+        "Keyword Density", "Title Match", "Bigram Overlap", "Total Resume Skills", "Total Job Skills"
+    ]
+    
     def __init__(self, force_retrain=False):
         self.model = None
         self.scaler = None
-        self.model_path = 'job_probability_model_v2.pkl'
+        self.model_path = 'job_probability_model_v2.pkl'  # legacy pickle, read only when no bundle exists
+        self.bundle_path = 'job_probability_model_v2.bundle'
         self.dataset_path = 'job_dataset.csv'
         self.embedding_model = 'all-MiniLM-L6-v2'
         self._transformer = None
         
+        # Explainability: 'native' = XGBoost pred_contribs (no shap at request time), 'shap' = cached TreeExplainer
+        self.explain_engine = os.environ.get('JOB_EXPLAIN_ENGINE', 'native')
+        self._explainer = None
+        self._explainer_model = None
+        
         # XGBoost (Lazy)
         global XGBOOST_AVAILABLE
         self.XGBRegressor = None
@@ -100,13 +96,30 @@ class JobProbabilityPredictor:
         
         # Comprehensive skill database
         self.all_skills = self._load_skill_database()
+        self.soft_skills = [
+            'communication', 'leadership', 'teamwork', 'problem solving', 'adaptability', 
+            'critical thinking', 'time management', 'collaboration', 'creativity', 
+            'mentoring', 'agile', 'scrum', 'presentation'
+        ]
+        self.education_db = {
+            'PhD': ['phd', 'doctorate'],
+            'Masters': ['master', 'ms', 'msc', 'm.tech', 'mba'],
+            'Bachelors': ['bachelor', 'bs', 'bsc', 'b.tech', 'b.e', 'undergraduate'],
+            'Diploma': ['diploma']
+        }
+        
+        # Compiled dictionary matchers (built once, single pass per text)
+        self.skill_matcher = compile_phrases({skill.title(): skill for skill in self.all_skills})
+        self.soft_skill_matcher = compile_phrases({skill.title(): skill for skill in self.soft_skills})
+        self.education_matcher = compile_phrases(self.education_db)
         
         # --- CAREER ARCHITECT DATA ---
         self.resource_db = self._load_resource_database()
         self.roadmap_templates = self._load_roadmap_templates()
         
         # Auto-load or fallback
-        if os.path.exists(self.model_path) and not force_retrain:
+        has_artifacts = os.path.exists(manifest_path(self.bundle_path)) or os.path.exists(self.model_path)
+        if has_artifacts and not force_retrain:
             print("Loading pre-trained job probability model v2...")
             if not self.load_model():
                 print("⚠️ Model load failed. Using rule-based fallback.")
@@ -117,15 +130,11 @@ class JobProbabilityPredictor:
     def transformer(self):
         global TRANSFORMER_AVAILABLE
         if self._transformer is None:
-            try:
-                from sentence_transformers import SentenceTransformer, util
-                self.util = util
-                print("⏳ Loading Transformer Model (Job Predictor)...")
-                self._transformer = SentenceTransformer(self.embedding_model)
-                TRANSFORMER_AVAILABLE = True
-            except Exception as e:
-                print(f"⚠️ Warning: Transformer failed to load in Job Predictor ({e})")
-                TRANSFORMER_AVAILABLE = False
+            # Same cached instance CareerModel uses (process-wide registry)
+            self._transformer = cached_encoder(self.embedding_model)
+            TRANSFORMER_AVAILABLE = self._transformer is not None
+            if not TRANSFORMER_AVAILABLE:
+                print(f"⚠️ Warning: Transformer failed to load in Job Predictor ({registry.encoder_error(self.embedding_model)})")
         return self._transformer
     
     def _load_skill_database(self):
@@ -227,6 +236,10 @@ class JobProbabilityPredictor:
     
     def train_model(self):
         """Train ML model on dataset with augmentation"""
+        # Training-only dependencies: kept out of the serving import path
+        import pandas as pd
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
         try:
             print("\n" + "="*60)
             print("TRAINING ENHANCED JOB PROBABILITY MODEL V2 (XGBOOST)")
@@ -253,20 +266,16 @@ class JobProbabilityPredictor:
             # 1. Warm up transformer
             _ = self.transformer
             
-            # 2. Extract Features
+            # 2. Extract Features (unique texts only, batched encode + nlp.pipe)
             print(f"\nExtracting features for {len(df)} rows...")
-            X_features = []
             y = df['match_score'].values
-            
-            # Pre-calculate embeddings for efficiency if needed, but here we'll do it per row in _extract_features
-            for idx, row in df.iterrows():
-                if idx % 50 == 0:
-                    print(f"   Processing {idx}/{len(df)}...", end='\r')
-                features = self._extract_features(row['resume_text'], row['job_title'])
-                X_features.append(features)
-            
-            X = np.array(X_features)
-            print(f"\nFeature extraction complete. Shape: {X.shape}")
+            start = time.perf_counter()
+            X = self._extract_features_batch(
+                df['resume_text'].fillna('').astype(str).tolist(),
+                df['job_title'].fillna('').astype(str).tolist()
+            )
+            elapsed = time.perf_counter() - start
+            print(f"Feature extraction complete. Shape: {X.shape} in {elapsed:.1f}s ({len(X) / max(elapsed, 1e-9):.0f} rows/s)")
             
             # 3. Scale Features
             print(f"\nScaling features...")
@@ -302,7 +311,7 @@ class JobProbabilityPredictor:
             
             # Save model
             self.save_model()
-            print(f"\nModel saved to: {self.model_path}")
+            print(f"\nModel saved to: {self.bundle_path}")
             
             print("\n" + "="*60)
             print("MODEL TRAINING COMPLETE!")
@@ -320,70 +329,208 @@ class JobProbabilityPredictor:
             traceback.print_exc()
             self.model = None
             
+    def _clean(self, ctx):
+        return ctx.get('job.clean', lambda: self.clean_text(ctx.text))
+
     def _extract_features(self, resume_text, job_text):
         """Extract robust numerical features using Transformers"""
-        resume_clean = self.clean_text(resume_text)
-        job_clean = self.clean_text(job_text)
+        return self._extract_features_matrix(resume_text, [job_text])[0].tolist()
+
+    def _extract_features_matrix(self, resume_text, job_texts):
+        """
+        9-column feature matrix for one resume against many jobs. Resume-side
+        work (cleaning, skills, YoE, bigrams, embedding) runs once; all jobs are
+        embedded in one batch and scored with a single cosine-similarity product.
+        """
+        resume_ctx = AnalysisContext.of(resume_text)
+        job_ctxs = [AnalysisContext.of(job) for job in job_texts]
+        resume_clean = self._clean(resume_ctx)
+        job_cleans = [self._clean(ctx) for ctx in job_ctxs]
+        n_jobs = len(job_ctxs)
         
-        # 1. Transformer Semantic Similarity
-        semantic_sim = 0
+        # 1. Transformer Semantic Similarity (vectorized cosine)
         trans = self.transformer
         if trans is not None and hasattr(trans, 'encode'):
             try:
-                embeddings = trans.encode([resume_clean, job_clean])
-                if self.util and hasattr(self.util, 'cos_sim'):
-                    semantic_sim = float(self.util.cos_sim(embeddings[0], embeddings[1])[0][0])
-                else:
-                    semantic_sim = 0.5 # Baseline if util missing
+                embeddings = AnalysisContext.embed(
+                    trans, [(resume_ctx, resume_clean)] + list(zip(job_ctxs, job_cleans))
+                ).astype(np.float64)
+                norms = np.linalg.norm(embeddings, axis=1)
+                norms[norms == 0] = 1.0
+                embeddings /= norms[:, None]
+                semantic_sim = embeddings[1:] @ embeddings[0]
             except Exception as e:
                 print(f"⚠️ Job Inference Error: {e}")
-                semantic_sim = 0.1
+                semantic_sim = np.full(n_jobs, 0.1)
         else:
             # Fallback semantic sim using bigrams or skip
-            semantic_sim = 0.1 # Small default
-            
-        # 2. Skill Matching
-        resume_skills = self._extract_skills(resume_text)
-        job_skills = self._extract_skills(job_text)
+            semantic_sim = np.full(n_jobs, 0.1) # Small default
+        
+        # Resume side (once)
+        profile = self.candidate_profile(resume_ctx)
+        resume_bigrams = set(self._get_bigrams(resume_clean))
+        
+        return np.array([
+            self._pair_features(profile, job_clean, self._extract_skills(job_ctx), sim, resume_bigrams)
+            for job_ctx, job_clean, sim in zip(job_ctxs, job_cleans, semantic_sim)
+        ], dtype=np.float64).reshape(n_jobs, len(self.FEATURE_NAMES))
+
+    def _extract_features_batch(self, resume_texts, job_texts, encode_batch_size=256, spacy_batch_size=64):
+        """
+        Feature matrix for many (resume, job) pairs, as used for training.
+        Each distinct resume / job text is analysed once (spaCy via nlp.pipe,
+        one batched encode over all distinct cleaned texts), each distinct pair is
+        featurized once, and the rows are gathered back with NumPy indexing.
+        """
+        pairs = list(zip(resume_texts, job_texts))
+        unique_resumes = list(dict.fromkeys(resume_texts))
+        unique_jobs = list(dict.fromkeys(job_texts))
+        unique_pairs = list(dict.fromkeys(pairs))
+        print(f"   {len(pairs)} pairs -> {len(unique_pairs)} unique pairs, "
+              f"{len(unique_resumes)} unique resumes, {len(unique_jobs)} unique jobs")
+        
+        # spaCy (years of experience) for distinct resumes only
+        start = time.perf_counter()
+        resume_ctxs = [AnalysisContext(text) for text in unique_resumes]
+        job_ctxs = [AnalysisContext(text) for text in unique_jobs]
+        AnalysisContext.parse_many(resume_ctxs, load_spacy, batch_size=spacy_batch_size)
+        profiles = [self.candidate_profile(ctx) for ctx in resume_ctxs]
+        job_cleans = [self._clean(ctx) for ctx in job_ctxs]
+        job_skills = [self._extract_skills(ctx) for ctx in job_ctxs]
+        elapsed = time.perf_counter() - start
+        print(f"   Parsed {len(resume_ctxs)} resumes + {len(job_ctxs)} jobs in {elapsed:.1f}s "
+              f"({(len(resume_ctxs) + len(job_ctxs)) / max(elapsed, 1e-9):.0f} texts/s)")
+        
+        # 1. Semantic similarity: encode every distinct cleaned text once, in large batches
+        resume_index = {text: i for i, text in enumerate(unique_resumes)}
+        job_index = {text: i for i, text in enumerate(unique_jobs)}
+        pair_resume = np.fromiter((resume_index[r] for r, _ in unique_pairs), dtype=np.int64, count=len(unique_pairs))
+        pair_job = np.fromiter((job_index[j] for _, j in unique_pairs), dtype=np.int64, count=len(unique_pairs))
+        similarities = np.full(len(unique_pairs), 0.1)
+        
+        # Raw encoder: training texts should not churn the request-time embedding cache
+        encoder = registry.get_encoder(self.embedding_model)
+        if encoder is not None:
+            texts = list(dict.fromkeys([p['clean'] for p in profiles] + job_cleans))
+            start = time.perf_counter()
+            try:
+                vectors = []
+                for i in range(0, len(texts), encode_batch_size):
+                    vectors.append(np.asarray(encoder.encode(texts[i:i + encode_batch_size], batch_size=encode_batch_size), dtype=np.float64))
+                    done = min(i + encode_batch_size, len(texts))
+                    print(f"   Encoded {done}/{len(texts)} texts "
+                          f"({done / max(time.perf_counter() - start, 1e-9):.0f} texts/s)", end='\r')
+                print()
+                embeddings = np.vstack(vectors)
+                norms = np.linalg.norm(embeddings, axis=1)
+                norms[norms == 0] = 1.0
+                embeddings /= norms[:, None]
+                
+                text_index = {text: i for i, text in enumerate(texts)}
+                resume_rows = embeddings[[text_index[p['clean']] for p in profiles]]
+                job_rows = embeddings[[text_index[clean] for clean in job_cleans]]
+                similarities = np.einsum('ij,ij->i', resume_rows[pair_resume], job_rows[pair_job])
+            except Exception as e:
+                print(f"⚠️ Job Inference Error: {e}")
+        else:
+            print(f"⚠️ Transformer unavailable ({registry.encoder_error(self.embedding_model)}). Using default semantic similarity.")
         
-        skill_overlap = len(set(resume_skills) & set(job_skills))
-        job_skill_count = max(len(job_skills), 1)
-        skill_match_ratio = skill_overlap / job_skill_count
+        # 2-9. Remaining features once per distinct pair, gathered back to every row
+        resume_bigrams = [set(self._get_bigrams(p['clean'])) for p in profiles]
+        unique_rows = np.array([
+            self._pair_features(profiles[r], job_cleans[j], job_skills[j], sim, resume_bigrams[r])
+            for r, j, sim in zip(pair_resume, pair_job, similarities)
+        ], dtype=np.float64).reshape(len(unique_pairs), len(self.FEATURE_NAMES))
         
-        # 3. Experience
-        exp_years = self._extract_years_experience(resume_text)
+        pair_index = {pair: i for i, pair in enumerate(unique_pairs)}
+        return unique_rows[np.fromiter((pair_index[pair] for pair in pairs), dtype=np.int64, count=len(pairs))]
+
+    def candidate_profile(self, resume_text):
+        """Resume-side inputs of the feature vector in JSON-serializable form (stored per pooled candidate)"""
+        ctx = AnalysisContext.of(resume_text)
+        return {
+            'clean': self._clean(ctx),
+            'skills': self._extract_skills(ctx),
+            'years_experience': self._extract_years_experience(ctx)
+        }
+
+    def _pair_features(self, profile, job_clean, job_skills, semantic_sim, resume_bigrams=None):
+        """One feature row from a resume profile, a cleaned job text and its skills"""
+        resume_clean = profile['clean']
+        resume_skills = set(profile['skills'])
+        if resume_bigrams is None:
+            resume_bigrams = set(self._get_bigrams(resume_clean))
+        
+        # 2. Skill Matching
+        skill_overlap = len(resume_skills & set(job_skills))
+        skill_match_ratio = skill_overlap / max(len(job_skills), 1)
         
         # 4. Keyword Density
-        resume_words = len(resume_clean.split())
-        resume_density = len(resume_skills) / max(resume_words, 1)
+        resume_density = len(resume_skills) / max(len(resume_clean.split()), 1)
         
         # 5. Title/Role Match
-        title_match = 0
-        job_title_words = self.clean_text(job_text).split()
-        for word in job_title_words:
-            if word in resume_clean and len(word) > 3:
-                title_match += 1
+        job_title_words = job_clean.split()
+        title_match = sum(1 for word in job_title_words if word in resume_clean and len(word) > 3)
         title_match_score = title_match / max(len(job_title_words), 1)
-
+        
         # 6. Bigram overlap
-        resume_bigrams = set(self._get_bigrams(resume_clean))
-        job_bigrams = set(self._get_bigrams(job_clean))
-        bigram_overlap = len(resume_bigrams & job_bigrams)
-
+        bigram_overlap = len(resume_bigrams & set(self._get_bigrams(job_clean)))
+        
         return [
-            semantic_sim,        # 0
-            skill_match_ratio,   # 1
-            skill_overlap,       # 2
-            exp_years,           # 3
-            resume_density,      # 4
-            title_match_score,   # 5
-            bigram_overlap,      # 6
-            len(resume_skills),  # 7
-            len(job_skills)      # 8
+            float(semantic_sim),             # 0 semantic similarity
+            skill_match_ratio,               # 1 skill match ratio
+            skill_overlap,                   # 2 skill overlap
+            profile['years_experience'],     # 3 years of experience
+            resume_density,                  # 4 keyword density
+            title_match_score,               # 5 title match
+            bigram_overlap,                  # 6 bigram overlap
+            len(resume_skills),              # 7 total resume skills
+            len(job_skills)                  # 8 total job skills
         ]
+
+    def rank_candidates(self, job_text, profiles, similarities):
+        """
+        Recruiter-side re-rank: one job against a shortlist of stored candidate
+        profiles whose semantic similarities were already computed by the vector
+        index. Builds the feature matrix and calls the regressor once.
+        Returns one (probability, explanation, matching_skills, missing_skills) per profile.
+        """
+        job_ctx = AnalysisContext.of(job_text)
+        job_clean = self._clean(job_ctx)
+        job_skills = self._extract_skills(job_ctx)
+        if not profiles:
+            return []
+        
+        if self.model and self.scaler:
+            X = np.array([self._pair_features(p, job_clean, job_skills, sim) for p, sim in zip(profiles, similarities)])
+            features_scaled = self.scaler.transform(X)
+            with observe_stage('predict'):
+                probabilities = np.clip(self.model.predict(features_scaled), 0, 100)
+            try:
+                with observe_stage('shap'):
+                    contributions, base_values = self.explain(features_scaled)
+                explanations = [self._format_explanation(c, b) for c, b in zip(contributions, base_values)]
+            except Exception as e:
+                print(f"SHAP Error: {e}")
+                explanations = ["AI explanation unavailable."] * len(profiles)
+        else:
+            probabilities = [self._rule_based_prediction(None, job_text, p['skills'], job_skills) for p in profiles]
+            explanations = ["Based on basic skill overlap."] * len(profiles)
+        
+        results = []
+        for profile, probability, explanation in zip(profiles, probabilities, explanations):
+            resume_skills = set(profile['skills'])
+            results.append((
+                float(probability),
+                explanation,
+                [s for s in job_skills if s in resume_skills],
+                [s for s in job_skills if s not in resume_skills]
+            ))
+        return results
     
     def _generate_synthetic_data(self, count):
         """Generate high-quality synthetic training data"""
+        import pandas as pd
         roles_data = {
             'Python Developer': ['Python', 'Django', 'Flask', 'SQL', 'REST API', 'Redis', 'Celery', 'PostgreSQL'],
             'Java Developer': ['Java', 'Spring Boot', 'Hibernate', 'Microservices', 'Maven', 'Kafka', 'Junit'],
@@ -465,17 +612,20 @@ class JobProbabilityPredictor:
         return pd.DataFrame(data)
 
     def _extract_years_experience(self, text):
-        spacy_nlp = load_spacy()
-        if SPACY_AVAILABLE and spacy_nlp:
+        ctx = AnalysisContext.of(text)
+        return ctx.get('job.yoe', lambda: self._compute_years_experience(ctx))
+
+    def _compute_years_experience(self, ctx):
+        doc = ctx.spacy_doc(load_spacy)
+        if doc is not None:
             try:
-                doc = spacy_nlp(text)
                 if hasattr(doc._, 'total_yoe') and doc._.total_yoe > 0:
                     return int(doc._.total_yoe)
             except Exception:
                 pass
         
         # Fallback to Regex
-        matches = re.findall(r'(\d+)\s*(?:\+)?\s*(?:years?|yrs?)', text.lower())
+        matches = re.findall(r'(\d+)\s*(?:\+)?\s*(?:years?|yrs?)', ctx.text_lower)
         if matches:
             return int(max([int(m) for m in matches]))
         return 0
@@ -486,175 +636,203 @@ class JobProbabilityPredictor:
     
     def _extract_skills(self, text):
         """Extract skills from text"""
-        # CLEAN TEXT FIRST to ensure separation of concatenated words
-        text_lower = self.clean_text(text)
-        found_skills = set()
-        
-        for skill in self.all_skills:
-            # Word boundary check for accurate matching
-            if re.search(r'\b' + re.escape(skill) + r'\b', text_lower):
-                found_skills.add(skill.title())
-        return list(found_skills)
+        ctx = AnalysisContext.of(text)
+        return ctx.get('job.skills', lambda: self._compute_skills(ctx))
+
+    def _compute_skills(self, ctx):
+        # Strip URLs only: the matcher is token aligned, so concatenated words
+        # ("Python/Django") still separate while "c++" and "ci/cd" survive
+        with observe_stage('skills'):
+            text_lower = re.sub(r'http\S+', ' ', ctx.text_lower)
+            return self.skill_matcher.findall(text_lower)
 
     def calculate_job_match(self, resume_text, dream_job):
         """Calculate prediction using trained model"""
+        resume_ctx = AnalysisContext.of(resume_text)
+        job_ctx = AnalysisContext.of(dream_job)
+        result = self.calculate_job_matches(resume_ctx, [job_ctx])[0]
+        
+        return result
+
+    def calculate_job_matches(self, resume_text, dream_jobs):
+        """
+        Score one resume against many jobs (results in input order). The resume is
+        analysed once; features, the XGBoost regressor and explanations run as
+        single batched calls over all jobs.
+        """
         try:
-            resume_skills = self._extract_skills(resume_text)
-            job_skills = self._extract_skills(dream_job)
-            
-            matching_skills = [s for s in job_skills if s in resume_skills]
-            missing_skills = [s for s in job_skills if s not in resume_skills]
-            
-            # --- DEEP ANALYSIS ---
-            # 1. Experience Analysis
-            resume_exp = self._extract_years_experience(resume_text)
-            job_exp = self._extract_years_experience(dream_job)
-            exp_status = "Match"
-            if resume_exp < job_exp:
-                exp_status = "Gap"
-            elif resume_exp > job_exp + 2:
-                exp_status = "Exceeds"
-                
-            # 2. Education Analysis
-            resume_edu = self._extract_education(resume_text)
-            job_edu = self._extract_education(dream_job)
-            edu_match = any(e in resume_edu for e in job_edu) if job_edu else True
+            resume_ctx = AnalysisContext.of(resume_text)
+            job_ctxs = [AnalysisContext.of(job) for job in dream_jobs]
+            if not job_ctxs:
+                return []
             
-            # 3. Soft Skills Analysis
-            soft_skills = self._extract_soft_skills(resume_text)
+            resume_skills = self._extract_skills(resume_ctx)
             
             # Inference
-            explanation = ""
             if self.model and self.scaler:
-                features = self._extract_features(resume_text, dream_job)
-                features_scaled = self.scaler.transform([features])
-                probability = self.model.predict(features_scaled)[0]
+                features_scaled = self.scaler.transform(self._extract_features_matrix(resume_ctx, job_ctxs))
+                with observe_stage('predict'):
+                    probabilities = self.model.predict(features_scaled)
                 model_used = 'XGBoost Regressor v2.0'
                 
                 # --- SHAP EXPLAINABILITY ---
                 try:
-                    import shap
-                    explainer = shap.TreeExplainer(self.model)
-                    shap_values = explainer.shap_values(features_scaled)
-                    
-                    feature_names = [
-                        "Semantic Similarity", "Skill Match Ratio", "Skill Overlap", "Years of Experience",
-                        "Keyword Density", "Title Match", "Bigram Overlap", "Total Resume Skills", "Total Job Skills"
-                    ]
-                    
-                    contributions = dict(zip(feature_names, shap_values[0]))
-                    
-                    # Handle expected_value datatype
-                    base_val = explainer.expected_value
-                    if isinstance(base_val, np.ndarray):
-                        base_val = float(base_val[0])
-                    else:
-                        base_val = float(base_val)
-                        
-                    sorted_contributions = sorted(contributions.items(), key=lambda item: abs(item[1]), reverse=True)
-                    
-                    explanation = f"Base fit is {base_val:.1f}%. "
-                    positives, negatives = [], []
-                    for feat, impact in sorted_contributions[:3]:
-                        if impact > 0:
-                            positives.append(f"increased by {impact:.1f}% due to {feat}")
-                        else:
-                            negatives.append(f"dropped {abs(impact):.1f}% due to {feat}")
-                            
-                    explanation += ", ".join(positives)
-                    if negatives:
-                        explanation += f", but {', '.join(negatives)}."
+                    with observe_stage('shap'):
+                        contributions, base_values = self.explain(features_scaled)
+                    explanations = [self._format_explanation(c, b) for c, b in zip(contributions, base_values)]
                 except Exception as e:
                     print(f"SHAP Error: {e}")
-                    explanation = "AI explanation unavailable."
+                    explanations = ["AI explanation unavailable."] * len(job_ctxs)
             else:
                 # Fallback if model missing
-                probability = self._rule_based_prediction(resume_text, dream_job, resume_skills, job_skills)
+                probabilities = [
+                    self._rule_based_prediction(resume_ctx.text, job_ctx.text, resume_skills, self._extract_skills(job_ctx))
+                    for job_ctx in job_ctxs
+                ]
                 model_used = 'Rule-Based Fallback'
-                explanation = "Based on basic skill overlap."
-            
-            probability = float(np.clip(probability, 0, 100))
-            
-            # Determine confidence/message
-            if probability >= 80:
-                confidence, message = 'High', 'Excellent match! Your profile aligns perfectly.'
-            elif probability >= 60:
-                confidence, message = 'Medium-High', 'Good match! You have strong potential.'
-            elif probability >= 40:
-                confidence, message = 'Medium', 'Decent match, but some gaps exist.'
-            else:
-                confidence, message = 'Low', 'Significant skill gaps found. Recommended upskilling.'
-            
-            
-            recommendations = self._get_recommendations(dream_job, resume_skills, missing_skills)
-            
-            # --- 4. NEW: GENERATE CAREER ROADMAP ---
-            roadmap = self._generate_enhanced_roadmap(dream_job, missing_skills, resume_exp)
+                explanations = ["Based on basic skill overlap."] * len(job_ctxs)
             
-            print(f"DEBUG: Resume Length: {len(resume_text)}")
-            print(f"DEBUG: Extracted User Skills: {resume_skills}")
-            print(f"DEBUG: Extracted Job Skills: {job_skills}")
-
-            return {
-                'probability': round(probability, 2),
-                'confidence': confidence,
-                'message': message,
-                'user_skills': resume_skills[:20],
-                'job_required_skills': job_skills[:15],
-                'matching_skills': matching_skills,
-                'missing_skills': missing_skills[:10],
-                'skill_recommendations': recommendations,
-                'skill_match_percentage': round((len(matching_skills) / max(len(job_skills), 1)) * 100, 1),
-                'total_skills_found': len(resume_skills),
-                'model_used': model_used,
-                'explanation': explanation,
-                # Deep Analysis Fields
-                'experience_analysis': {
-                    'resume_years': resume_exp,
-                    'job_years_required': job_exp,
-                    'status': exp_status
-                },
-                'education_analysis': {
-                    'detected_degrees': resume_edu,
-                    'job_requirements': job_edu,
-                    'match': edu_match
-                },
-                'soft_skills': soft_skills,
-                # New Transformation Architect Fields
-                'roadmap': roadmap,
-                'resource_materials': self._get_specific_resources(missing_skills + recommendations)
-            }
+            return [
+                self._build_match_result(resume_ctx, job_ctx, probability, model_used, explanation)
+                for job_ctx, probability, explanation in zip(job_ctxs, probabilities, explanations)
+            ]
             
         except Exception as e:
             print(f"Prediction Error: {e}")
-            return self._get_error_response(str(e))
+            return [self._get_error_response(str(e)) for _ in dream_jobs]
 
-    def _extract_education(self, text):
-        text_lower = text.lower()
-        degrees = []
-        patterns = {
-            'PhD': r'\b(phd|doctorate)\b',
-            'Masters': r'\b(master|ms|msc|m\.tech|mba)\b',
-            'Bachelors': r'\b(bachelor|bs|bsc|b\.tech|b\.e|undergraduate)\b',
-            'Diploma': r'\b(diploma)\b'
+    def _build_match_result(self, resume_ctx, job_ctx, probability, model_used, explanation):
+        resume_skills = self._extract_skills(resume_ctx)
+        job_skills = self._extract_skills(job_ctx)
+        
+        matching_skills = [s for s in job_skills if s in resume_skills]
+        missing_skills = [s for s in job_skills if s not in resume_skills]
+        
+        # --- DEEP ANALYSIS ---
+        # 1. Experience Analysis
+        resume_exp = self._extract_years_experience(resume_ctx)
+        job_exp = self._extract_years_experience(job_ctx)
+        exp_status = "Match"
+        if resume_exp < job_exp:
+            exp_status = "Gap"
+        elif resume_exp > job_exp + 2:
+            exp_status = "Exceeds"
+            
+        # 2. Education Analysis
+        resume_edu = self._extract_education(resume_ctx)
+        job_edu = self._extract_education(job_ctx)
+        edu_match = any(e in resume_edu for e in job_edu) if job_edu else True
+        
+        # 3. Soft Skills Analysis
+        soft_skills = self._extract_soft_skills(resume_ctx)
+        
+        probability = float(np.clip(probability, 0, 100))
+        
+        # Determine confidence/message
+        if probability >= 80:
+            confidence, message = 'High', 'Excellent match! Your profile aligns perfectly.'
+        elif probability >= 60:
+            confidence, message = 'Medium-High', 'Good match! You have strong potential.'
+        elif probability >= 40:
+            confidence, message = 'Medium', 'Decent match, but some gaps exist.'
+        else:
+            confidence, message = 'Low', 'Significant skill gaps found. Recommended upskilling.'
+        
+        recommendations = self._get_recommendations(job_ctx.text, resume_skills, missing_skills)
+        
+        # --- 4. NEW: GENERATE CAREER ROADMAP ---
+        with observe_stage('roadmap'):
+            roadmap = self._generate_enhanced_roadmap(job_ctx.text, missing_skills, resume_exp)
+        
+        return {
+            'probability': round(probability, 2),
+            'confidence': confidence,
+            'message': message,
+            'user_skills': resume_skills[:20],
+            'job_required_skills': job_skills[:15],
+            'matching_skills': matching_skills,
+            'missing_skills': missing_skills[:10],
+            'skill_recommendations': recommendations,
+            'skill_match_percentage': round((len(matching_skills) / max(len(job_skills), 1)) * 100, 1),
+            'total_skills_found': len(resume_skills),
+            'model_used': model_used,
+            'explanation': explanation,
+            # Deep Analysis Fields
+            'experience_analysis': {
+                'resume_years': resume_exp,
+                'job_years_required': job_exp,
+                'status': exp_status
+            },
+            'education_analysis': {
+                'detected_degrees': resume_edu,
+                'job_requirements': job_edu,
+                'match': edu_match
+            },
+            'soft_skills': soft_skills,
+            # New Transformation Architect Fields
+            'roadmap': roadmap,
+            'resource_materials': self._get_specific_resources(missing_skills + recommendations)
         }
-        for degree, pattern in patterns.items():
-            if re.search(pattern, text_lower):
-                degrees.append(degree)
-        return degrees
+
+    def explain(self, features_scaled):
+        """
+        Per-feature contributions for any number of scaled feature rows in one
+        vectorized call. Returns (contributions [n, 9], base_values [n]).
+        """
+        X = np.asarray(features_scaled, dtype=np.float32)
+        if self.explain_engine == 'native':
+            try:
+                import xgboost
+                # Tree SHAP computed inside XGBoost; last column is the bias (expected value)
+                contribs = self.model.get_booster().predict(xgboost.DMatrix(X), pred_contribs=True)
+                return contribs[:, :-1], contribs[:, -1]
+            except Exception as e:
+                print(f"⚠️ Native contributions unavailable ({e}). Falling back to SHAP.")
+        
+        explainer = self._get_explainer()
+        shap_values = np.asarray(explainer.shap_values(X)).reshape(len(X), -1)
+        base_val = explainer.expected_value
+        base_val = float(np.ravel(base_val)[0]) if isinstance(base_val, (np.ndarray, list)) else float(base_val)
+        return shap_values, np.full(len(X), base_val)
+
+    def _get_explainer(self):
+        """TreeExplainer built once per loaded model (rebuilt only when the model object changes)"""
+        if self._explainer is None or self._explainer_model is not self.model:
+            import shap
+            self._explainer = shap.TreeExplainer(self.model)
+            self._explainer_model = self.model
+        return self._explainer
+
+    def _format_explanation(self, contribution_row, base_val):
+        contributions = dict(zip(self.FEATURE_NAMES, contribution_row))
+        sorted_contributions = sorted(contributions.items(), key=lambda item: abs(item[1]), reverse=True)
+        
+        explanation = f"Base fit is {float(base_val):.1f}%. "
+        positives, negatives = [], []
+        for feat, impact in sorted_contributions[:3]:
+            if impact > 0:
+                positives.append(f"increased by {impact:.1f}% due to {feat}")
+            else:
+                negatives.append(f"dropped {abs(impact):.1f}% due to {feat}")
+                
+        explanation += ", ".join(positives)
+        if negatives:
+            explanation += f", but {', '.join(negatives)}."
+        return explanation
+
+    def _extract_education(self, text):
+        ctx = AnalysisContext.of(text)
+        return ctx.get('job.education', lambda: self._compute_education(ctx))
+
+    def _compute_education(self, ctx):
+        return self.education_matcher.findall(ctx.text_lower)
 
     def _extract_soft_skills(self, text):
-        soft_skills_list = [
-            'communication', 'leadership', 'teamwork', 'problem solving', 'adaptability', 
-            'critical thinking', 'time management', 'collaboration', 'creativity', 
-            'mentoring', 'agile', 'scrum', 'presentation'
-        ]
-        text_lower = text.lower()
-        found = []
-        for skill in soft_skills_list:
-            if skill in text_lower:
-                found.append(skill.title())
-        return found
+        ctx = AnalysisContext.of(text)
+        return ctx.get('job.soft_skills', lambda: self._compute_soft_skills(ctx))
+
+    def _compute_soft_skills(self, ctx):
+        return self.soft_skill_matcher.findall(ctx.text_lower)
 
 
     def _generate_enhanced_roadmap(self, job_title, gaps, experience):
@@ -669,7 +847,7 @@ class JobProbabilityPredictor:
             "title": "Phase 1: Foundations & Prerequisites",
             "period": "Months 1-2",
             "focus": foundations if foundations else ["Core Fundamentals"],
-            "tasks": [f"Deep dive into {s if foundations else 'programming basics'}", "Build 3 mini-utility projects", "Master debugging and Git workflow"],
+            "tasks": [f"Deep dive into {', '.join(foundations) if foundations else 'programming basics'}", "Build 3 mini-utility projects", "Master debugging and Git workflow"],
             "milestone": "Portfolio Site & Basic Scripts deployed"
         })
         
@@ -769,24 +947,25 @@ class JobProbabilityPredictor:
     
     def clean_text(self, text):
         if not text: return ""
-        text = re.sub(r'http\S+', '', text)
-        text = re.sub(r'[^\w\s]', ' ', text)
-        return text.lower().strip()
+        with observe_stage('clean'):
+            text = re.sub(r'http\S+', '', text)
+            text = re.sub(r'[^\w\s]', ' ', text)
+            return text.lower().strip()
     
     def save_model(self):
-        with open(self.model_path, 'wb') as f:
-            pickle.dump({
-                'model': self.model,
-                'scaler': self.scaler,
-                'embedding_model': self.embedding_model
-            }, f)
+        save_job_bundle(self.model, self.scaler, self.embedding_model, self.bundle_path)
             
     def load_model(self):
         try:
-            with open(self.model_path, 'rb') as f:
-                data = pickle.load(f)
-                self.model = data['model']
-                self.scaler = data['scaler']
+            if os.path.exists(manifest_path(self.bundle_path)):
+                self.model, self.scaler, manifest = load_job_bundle(self.bundle_path)
+                print(f"✅ Loaded {self.bundle_path} (model v{manifest['model_version']})")
+            else:
+                print(f"⚠️ Loading legacy pickle {self.model_path}; convert it with: python convert_artifacts.py")
+                with open(self.model_path, 'rb') as f:
+                    data = pickle.load(f)
+                    self.model = data['model']
+                    self.scaler = data['scaler']
             return True
         except Exception as e:
             print(f"Error loading model: {e}")
@@ -0,0 +1,294 @@
+"""
+Prometheus Metrics (text exposition format, no client library)
+- Counter / Gauge / Histogram with labels, thread-safe, near-zero cost per observation
+- Per-stage latency histograms: `with observe_stage('encode'): ...` (also a tracing span)
+- Collectors refresh values pulled from other components (cache, executor, registry) at scrape time
+- Pre-forked workers (METRICS_DIR set by serve.py) publish snapshots that /metrics merges:
+  counters and histograms are summed over every worker, gauges over live workers only
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from tracing import span
+
+# --- CONFIGURATION (environment overrides) ---
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '1'))
+
+NAMESPACE = 'pathintel'
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = f"{NAMESPACE}_{name}"
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def snapshot(self):
+        with self._lock:
+            values = {json.dumps(key): (list(v) if isinstance(v, list) else v) for key, v in self._values.items()}
+        return {'kind': self.kind, 'help': self.documentation, 'labels': list(self.labels), 'values': values}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """Mirror a cumulative count kept elsewhere (e.g. cache hit counters)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), merge='sum'):
+        super().__init__(name, documentation, labels)
+        self.merge = merge  # across workers: 'sum' (queue depths), 'max' (load times) or 'mean' (ratios)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def snapshot(self):
+        return {**super().snapshot(), 'merge': self.merge}
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                # Per-bucket (non-cumulative) counts, +Inf, then sum
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[index] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        return {**super().snapshot(), 'buckets': list(self.buckets)}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._flusher = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=(), merge='sum'):
+        return self.register(Gauge(name, documentation, labels, merge))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, fn):
+        """`fn()` runs before every snapshot to refresh pulled values"""
+        self._collectors.append(fn)
+
+    def reset(self):
+        for metric in self._metrics:
+            metric.reset()
+
+    def snapshot(self):
+        for collect in list(self._collectors):
+            try:
+                collect()
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    # --- pre-forked workers ---
+
+    def _snapshot_path(self, pid=None):
+        return os.path.join(METRICS_DIR, f"metrics-{pid or os.getpid()}.json")
+
+    def flush(self):
+        if METRICS_DIR is None:
+            return
+        tmp_path = f"{self._snapshot_path()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, self._snapshot_path())
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️ Metrics flush failed: {e}")
+
+    def start_flusher(self):
+        """Publish this worker's snapshot every METRICS_FLUSH_SECONDS (only with METRICS_DIR)"""
+        if METRICS_DIR is None or (self._flusher is not None and self._flusher.is_alive()):
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def _worker_snapshots(self):
+        own = os.getpid()
+        yield self.snapshot(), True
+        if METRICS_DIR is None:
+            return
+        for filename in os.listdir(METRICS_DIR):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            try:
+                pid = int(filename[len('metrics-'):-len('.json')])
+            except ValueError:
+                continue
+            if pid == own:
+                continue
+            try:
+                with open(os.path.join(METRICS_DIR, filename), 'r', encoding='utf-8') as f:
+                    yield json.load(f), _alive(pid)
+            except (OSError, ValueError):
+                continue
+
+    def merged(self):
+        merged = {}
+        contributors = {}
+        for snapshot, alive in self._worker_snapshots():
+            for name, metric in snapshot.items():
+                target = merged.setdefault(name, {**metric, 'values': {}})
+                if metric['kind'] == 'gauge' and not alive:
+                    continue
+                for key, value in metric['values'].items():
+                    contributors[name, key] = contributors.get((name, key), 0) + 1
+                    current = target['values'].get(key)
+                    if current is None:
+                        target['values'][key] = value
+                    elif metric['kind'] == 'histogram':
+                        target['values'][key] = [a + b for a, b in zip(current, value)]
+                    elif metric['kind'] == 'gauge' and metric.get('merge') == 'max':
+                        target['values'][key] = max(current, value)
+                    else:
+                        target['values'][key] = current + value
+        for (name, key), count in contributors.items():
+            if merged[name].get('merge') == 'mean':
+                merged[name]['values'][key] /= count
+        return merged
+
+    def render(self):
+        """Prometheus text exposition (version 0.0.4) of every worker's metrics"""
+        lines = []
+        for name, metric in self.merged().items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            for key, value in sorted(metric['values'].items()):
+                label_values = json.loads(key)
+                if metric['kind'] != 'histogram':
+                    lines.append(f"{name}{_format_labels(metric['labels'], label_values)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric['buckets'] + [float('inf')], value[:-1]):
+                    cumulative += count
+                    le = (('le', _format_value(float(bound))),)
+                    lines.append(f"{name}_bucket{_format_labels(metric['labels'], label_values, le)} {cumulative}")
+                labels = _format_labels(metric['labels'], label_values)
+                lines.append(f"{name}_sum{labels} {_format_value(float(value[-1]))}")
+                lines.append(f"{name}_count{labels} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Process-wide registry and the metrics shared by every module
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    'stage_seconds', "Latency of one pipeline stage (upload read, extraction, cleaning, spaCy, "
+                     "skill matching, encode, XGBoost predict, calibration, SHAP, roadmap)", ('stage',))
+REQUESTS = metrics.counter('requests_total', "HTTP requests by endpoint and outcome", ('endpoint', 'outcome'))
+REQUEST_SECONDS = metrics.histogram('request_seconds', "HTTP request latency by endpoint", ('endpoint',))
+
+
+@contextmanager
+def observe_stage(stage):
+    """Time one pipeline stage into pathintel_stage_seconds{stage=...} and the request's trace"""
+    start = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def _reset_after_fork():
+    # A forked worker starts from zero: the parent's warmup observations are not its traffic
+    metrics.reset()
+    metrics._flusher = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
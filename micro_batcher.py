@@ -0,0 +1,146 @@
+"""
+Dynamic Micro-Batching for Transformer Encoding
+- Concurrent request threads submit small encode() calls
+- A single scheduler thread waits a few milliseconds (or until the batch is full)
+- One batched forward pass, rows handed back to each waiting caller
+"""
+
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import numpy as np
+
+# --- CONFIGURATION (environment overrides) ---
+BATCH_MAX_SIZE = int(os.environ.get('ENCODE_BATCH_MAX', '32'))
+BATCH_WINDOW_MS = float(os.environ.get('ENCODE_BATCH_WINDOW_MS', '5'))
+
+_instances = weakref.WeakSet()
+_direct = False
+
+
+class MicroBatcher:
+    """
+    Drop-in `encode` wrapper that coalesces concurrent calls.
+
+    Calls that already carry a large batch (training) or non-default encode
+    options go straight to the underlying encoder.
+    """
+
+    def __init__(self, encoder, max_batch=BATCH_MAX_SIZE, window_ms=BATCH_WINDOW_MS):
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.batched_texts = 0
+        self.largest_batch = 0
+        _instances.add(self)
+
+    def _ensure_worker(self):
+        # Started on first use. A pre-fork parent warms up under direct_encodes() and never
+        # starts it; _reset_after_fork still drops a thread inherited from any other fork
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='encode-batcher', daemon=True)
+                    self._thread.start()
+
+    def encode(self, sentences, **kwargs):
+        passthrough = {k: v for k, v in kwargs.items() if k not in ('show_progress_bar', 'batch_size')}
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if _direct or passthrough or not texts or len(texts) >= self.max_batch:
+            return self.encoder.encode(sentences, **kwargs)
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((texts, future))
+        rows = future.result()
+        return rows[0] if single else rows
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch, size
+
+    def _run(self):
+        while True:
+            batch, size = self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = np.asarray(self.encoder.encode(texts, batch_size=max(size, 1)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_texts += size
+            self.largest_batch = max(self.largest_batch, size)
+
+            offset = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def _after_fork(self):
+        # A forked child inherits the queue and lock, but not the scheduler thread
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def stats(self):
+        return {
+            'max_batch': self.max_batch,
+            'window_ms': self.window * 1000.0,
+            'batches': self.batches,
+            'texts': self.batched_texts,
+            'avg_batch_size': round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'pending': self._queue.qsize()
+        }
+
+    def __getattr__(self, name):
+        return getattr(self.encoder, name)
+
+
+@contextmanager
+def direct_encodes():
+    """Bypass every batcher (no scheduler thread is started), e.g. for warmup in a pre-fork parent"""
+    global _direct
+    previous, _direct = _direct, True
+    try:
+        yield
+    finally:
+        _direct = previous
+
+
+def batching_stats():
+    return [batcher.stats() for batcher in list(_instances)]
+
+
+def _reset_after_fork():
+    for batcher in list(_instances):
+        batcher._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
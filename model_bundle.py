@@ -0,0 +1,244 @@
+"""
+Versioned Model Artifact Bundles (no pickle)
+- One directory per model: XGBoost boosters as native UBJSON, every other parameter as .npy
+- manifest.json: format version, model version, feature schema, library versions, size + sha256 per file
+- Loads check the format version and file sizes; sha256 is verified at conversion time or with MODEL_BUNDLE_VERIFY=1
+- Arrays are opened with mmap_mode='r' so pre-forked workers share the same pages
+- Writes go to versioned file names and the manifest is swapped last (atomic for readers)
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+BUNDLE_FORMAT = 'pathintel-model-bundle'
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+# --- CONFIGURATION (environment overrides) ---
+BUNDLE_VERIFY = os.environ.get('MODEL_BUNDLE_VERIFY', '0') == '1'  # re-hash every file on each load
+
+
+class BundleError(Exception):
+    """Bundle missing, corrupt (size / checksum mismatch) or written by an unsupported format version"""
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _library_versions():
+    versions = {'numpy': np.__version__}
+    for module in ('xgboost', 'sklearn'):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def manifest_path(directory):
+    return os.path.join(directory, MANIFEST_NAME)
+
+
+def write_bundle(directory, kind, boosters=None, arrays=None, schema=None, metadata=None):
+    """
+    Write `boosters` ({name: XGBoost sklearn model}) and `arrays` ({name: ndarray})
+    as a new version of the bundle in `directory`. Returns the manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = None
+    try:
+        with open(manifest_path(directory), 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        pass
+    version = previous['model_version'] + 1 if previous else 1
+
+    files = {}
+    for name, model in (boosters or {}).items():
+        filename = f"{name}-v{version}.ubj"
+        model.save_model(os.path.join(directory, filename))
+        files[name] = {'type': 'xgboost', 'path': filename}
+    for name, array in (arrays or {}).items():
+        filename = f"{name}-v{version}.npy"
+        np.save(os.path.join(directory, filename), np.asarray(array), allow_pickle=False)
+        files[name] = {'type': 'npy', 'path': filename}
+    for entry in files.values():
+        path = os.path.join(directory, entry['path'])
+        entry['bytes'] = os.path.getsize(path)
+        entry['sha256'] = _sha256(path)
+
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'kind': kind,
+        'model_version': version,
+        'created_at': time.time(),
+        'libraries': _library_versions(),
+        'schema': schema or {},
+        'metadata': metadata or {},
+        'files': files
+    }
+    tmp_path = f"{manifest_path(directory)}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path(directory))
+
+    # Older versions: readers that already mapped them keep their (unlinked) pages
+    if previous:
+        for entry in previous.get('files', {}).values():
+            try:
+                os.remove(os.path.join(directory, entry['path']))
+            except OSError:
+                pass
+    return manifest
+
+
+class Bundle:
+    """A loaded bundle: the manifest, memory-mapped arrays and booster file paths"""
+
+    def __init__(self, directory, manifest, verify=None):
+        if manifest.get('format') != BUNDLE_FORMAT:
+            raise BundleError(f"{directory} is not a model bundle")
+        if manifest.get('format_version', 0) > BUNDLE_FORMAT_VERSION:
+            raise BundleError(f"{directory} uses bundle format v{manifest['format_version']}; "
+                              f"this build reads up to v{BUNDLE_FORMAT_VERSION}")
+        self.directory = directory
+        self.manifest = manifest
+        self.arrays = {}
+        verify = BUNDLE_VERIFY if verify is None else verify
+        for name, entry in manifest['files'].items():
+            path = os.path.join(directory, entry['path'])
+            try:
+                size = os.path.getsize(path)
+            except OSError as e:
+                raise BundleError(f"Missing bundle file {path}: {e}")
+            # Cheap truncation / partial-copy check; hashing re-reads every byte
+            if size != entry['bytes']:
+                raise BundleError(f"Size mismatch for {path}: {size} bytes, manifest says {entry['bytes']}")
+            if verify and _sha256(path) != entry['sha256']:
+                raise BundleError(f"Checksum mismatch for {path}")
+            if entry['type'] == 'npy':
+                self.arrays[name] = np.load(path, mmap_mode='r', allow_pickle=False)
+
+    @property
+    def schema(self):
+        return self.manifest['schema']
+
+    @property
+    def metadata(self):
+        return self.manifest['metadata']
+
+    def booster(self, name, model_class):
+        """Instantiate `model_class` (e.g. XGBRegressor) from the stored UBJSON booster"""
+        model = model_class()
+        model.load_model(os.path.join(self.directory, self.manifest['files'][name]['path']))
+        return model
+
+
+def load_bundle(directory, manifest_payload=None, verify=None):
+    """
+    Open a bundle; pass the manifest bytes when the caller already read them (ArtifactStore).
+    `verify` re-hashes every file (default: MODEL_BUNDLE_VERIFY).
+    """
+    try:
+        if manifest_payload is None:
+            with open(manifest_path(directory), 'rb') as f:
+                manifest_payload = f.read()
+        manifest = json.loads(manifest_payload)
+    except (OSError, ValueError) as e:
+        raise BundleError(f"Cannot read bundle manifest in {directory}: {e}")
+    return Bundle(directory, manifest, verify=verify)
+
+
+# --- sklearn parameter packing ---
+
+def pack_scaler(scaler, prefix='scaler'):
+    return {f'{prefix}_mean': scaler.mean_, f'{prefix}_scale': scaler.scale_, f'{prefix}_var': scaler.var_}
+
+
+def unpack_scaler(arrays, prefix='scaler'):
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    scaler.mean_ = np.asarray(arrays[f'{prefix}_mean'])
+    scaler.scale_ = np.asarray(arrays[f'{prefix}_scale'])
+    scaler.var_ = np.asarray(arrays[f'{prefix}_var'])
+    scaler.n_features_in_ = len(scaler.mean_)
+    scaler.n_samples_seen_ = 0
+    return scaler
+
+
+def pack_label_encoder(encoder, prefix='classes'):
+    return {prefix: np.asarray(encoder.classes_).astype(str)}
+
+
+def unpack_label_encoder(arrays, prefix='classes'):
+    from sklearn.preprocessing import LabelEncoder
+    encoder = LabelEncoder()
+    encoder.classes_ = np.asarray(arrays[prefix])
+    return encoder
+
+
+def pack_isotonic(calibrated, prefix='isotonic'):
+    """
+    Thresholds of a prefit CalibratedClassifierCV(method='isotonic'), one
+    piecewise-linear curve per calibrated class, concatenated with offsets.
+    """
+    fitted = calibrated.calibrated_classifiers_[0]
+    calibrators = fitted.calibrators
+    classes = list(calibrated.classes_)
+    n_classes = len(classes)
+    # Binary problems calibrate only the positive class (column 1)
+    class_index = [1] if n_classes == 2 else list(range(len(calibrators)))
+    xs = [np.asarray(c.X_thresholds_, dtype=np.float64) for c in calibrators]
+    ys = [np.asarray(c.y_thresholds_, dtype=np.float64) for c in calibrators]
+    return {
+        f'{prefix}_x': np.concatenate(xs),
+        f'{prefix}_y': np.concatenate(ys),
+        f'{prefix}_offsets': np.cumsum([0] + [len(x) for x in xs]).astype(np.int64),
+        f'{prefix}_class_index': np.asarray(class_index, dtype=np.int64),
+        f'{prefix}_n_classes': np.asarray([n_classes], dtype=np.int64)
+    }
+
+
+class IsotonicCalibrator:
+    """
+    Drop-in for CalibratedClassifierCV(method='isotonic', cv='prefit').predict_proba:
+    per-class np.interp over the stored thresholds (clipped like out_of_bounds='clip'),
+    then the same normalization sklearn applies.
+    """
+
+    def __init__(self, classifier, arrays, prefix='isotonic'):
+        self.classifier = classifier
+        self.x = np.asarray(arrays[f'{prefix}_x'])
+        self.y = np.asarray(arrays[f'{prefix}_y'])
+        self.offsets = np.asarray(arrays[f'{prefix}_offsets'])
+        self.class_index = np.asarray(arrays[f'{prefix}_class_index'])
+        self.n_classes = int(np.asarray(arrays[f'{prefix}_n_classes'])[0])
+
+    def calibrate(self, raw_proba):
+        raw_proba = np.asarray(raw_proba, dtype=np.float64)
+        proba = np.zeros((len(raw_proba), self.n_classes))
+        for i, class_idx in enumerate(self.class_index):
+            start, stop = self.offsets[i], self.offsets[i + 1]
+            proba[:, class_idx] = np.interp(raw_proba[:, class_idx], self.x[start:stop], self.y[start:stop])
+
+        if self.n_classes == 2:
+            proba[:, 0] = 1.0 - proba[:, 1]
+        else:
+            denominator = proba.sum(axis=1, keepdims=True)
+            uniform = np.full_like(proba, 1.0 / self.n_classes)
+            proba = np.divide(proba, denominator, out=uniform, where=denominator != 0)
+        proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+        return proba
+
+    def predict_proba(self, X):
+        return self.calibrate(self.classifier.predict_proba(X))
@@ -0,0 +1,157 @@
+"""
+Process-Wide Model Registry
+- One shared sentence encoder / spaCy pipeline per (name, backend / profile)
+- Thread-safe lazy loading: concurrent first requests load a model once
+- Per-model memory accounting (parameter bytes + resident-set delta)
+"""
+
+import os
+import threading
+import time
+
+from encoder_backends import ENCODER_BACKEND, load_encoder
+from spacy_profiles import NLP_PROFILE, load_pipeline
+
+
+def _rss_bytes():
+    """Current resident set size, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
+
+def process_memory():
+    """
+    RSS / PSS / shared / private MB of this process (Linux smaps_rollup). For
+    pre-forked workers, private is what the worker costs on top of the parent.
+    """
+    fields = {'Rss': 'rss_mb', 'Pss': 'pss_mb', 'Shared_Clean': 'shared_mb', 'Shared_Dirty': 'shared_mb',
+              'Private_Clean': 'private_mb', 'Private_Dirty': 'private_mb'}
+    report = {'pid': os.getpid()}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    report[fields[name]] = report.get(fields[name], 0.0) + int(value.split()[0]) / 1024
+    except (OSError, ValueError):
+        return report
+    return {k: round(v, 1) if isinstance(v, float) else v for k, v in report.items()}
+
+
+def _parameter_bytes(model):
+    """Bytes held by torch parameters and buffers (None for non-torch models)"""
+    try:
+        params = list(model.parameters()) + list(model.buffers())
+    except Exception:
+        return None
+    return sum(p.numel() * p.element_size() for p in params)
+
+
+class ModelEntry:
+    __slots__ = ('kind', 'name', 'config', 'model', 'error', 'load_seconds', 'rss_delta', 'param_bytes')
+
+    def __init__(self, kind, name, config):
+        self.kind = kind
+        self.name = name
+        self.config = config
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+        self.rss_delta = None
+        self.param_bytes = None
+
+
+class ModelRegistry:
+    """
+    Hands out shared model instances keyed by (kind, name, config).
+
+    Each key is loaded at most once per process; a failed load is remembered
+    so callers fall back immediately instead of retrying on every request.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @staticmethod
+    def _key(kind, name, config):
+        return (kind, name, tuple(sorted(config.items())))
+
+    def get(self, kind, name, factory, **config):
+        key = self._key(kind, name, config)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry.model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.model
+
+            entry = ModelEntry(kind, name, config)
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            try:
+                entry.model = factory(name, **config)
+            except Exception as e:
+                entry.error = str(e)
+            entry.load_seconds = time.perf_counter() - start
+            rss_after = _rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                entry.rss_delta = max(0, rss_after - rss_before)
+            if entry.model is not None:
+                entry.param_bytes = _parameter_bytes(entry.model)
+            self._entries[key] = entry
+            return entry.model
+
+    def get_encoder(self, name='all-MiniLM-L6-v2', backend=None):
+        """
+        Shared sentence encoder for a backend (torch / torch-int8 / onnx / onnx-int8,
+        default ENCODER_BACKEND). None if it cannot be loaded.
+        """
+        return self.get('encoder', name, load_encoder, backend=backend or ENCODER_BACKEND)
+
+    def get_nlp(self, name='en_core_web_sm', profile=None):
+        """
+        Shared spaCy pipeline with the 'extract_yoe' component for a profile
+        (full / lean / fast, default SPACY_PROFILE). None if unavailable or fast.
+        """
+        return self.get('nlp', name, load_pipeline, profile=profile or NLP_PROFILE)
+
+    def error(self, kind, name, **config):
+        entry = self._entries.get(self._key(kind, name, config))
+        return entry.error if entry is not None else None
+
+    def encoder_error(self, name='all-MiniLM-L6-v2', backend=None):
+        return self.error('encoder', name, backend=backend or ENCODER_BACKEND)
+
+    def nlp_error(self, name='en_core_web_sm', profile=None):
+        return self.error('nlp', name, profile=profile or NLP_PROFILE)
+
+    def memory_report(self):
+        """Load time and memory footprint of every model loaded so far"""
+        report = []
+        for entry in list(self._entries.values()):
+            report.append({
+                'kind': entry.kind,
+                'name': entry.name,
+                'config': dict(entry.config),
+                'backend': getattr(entry.model, 'encoder_backend', None),
+                'loaded': entry.model is not None,
+                'error': entry.error,
+                'load_time_ms': round(entry.load_seconds * 1000, 1) if entry.load_seconds is not None else None,
+                'rss_delta_mb': round(entry.rss_delta / 2**20, 1) if entry.rss_delta is not None else None,
+                'parameter_mb': round(entry.param_bytes / 2**20, 1) if entry.param_bytes is not None else None
+            })
+        return report
+
+
+# Process-wide singleton shared by every model class
+registry = ModelRegistry()
@@ -0,0 +1,91 @@
+"""
+Compiled Single-Pass Phrase Matcher
+- Token trie over every dictionary phrase (skills, soft skills, degrees)
+- One tokenizer pass + one trie walk per text, independent of dictionary size
+- Word-boundary aware for punctuated terms like c++, node.js, ci/cd, b.tech
+"""
+
+import re
+
+# Word runs, or single punctuation characters ("c++" -> "c", "+", "+")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_COMPILED = {}
+
+
+def _tokenize(text):
+    """Yield (token, preceded_by_whitespace) pairs"""
+    prev_end = 0
+    for m in TOKEN_RE.finditer(text):
+        yield m.group(0), m.start() != prev_end
+        prev_end = m.end()
+
+
+class PhraseMatcher:
+    """
+    Finds every dictionary phrase in a text in one linear pass.
+
+    `dictionary` maps a canonical name to one or more surface variants
+    (a plain iterable of phrases maps each phrase to itself). Matching is
+    case-insensitive and token aligned, so "java" does not fire inside
+    "javascript" while "c++" and "ci/cd" match as whole terms. Results are
+    canonical names in dictionary order, each reported once.
+    """
+
+    def __init__(self, dictionary):
+        if not isinstance(dictionary, dict):
+            dictionary = {phrase: [phrase] for phrase in dictionary}
+
+        self.canonical = list(dictionary.keys())
+        self._root = {}
+        for index, variants in enumerate(dictionary.values()):
+            if isinstance(variants, str):
+                variants = [variants]
+            for variant in variants:
+                self._add(variant.lower(), index)
+
+    def _add(self, phrase, index):
+        tokens = list(_tokenize(phrase))
+        if not tokens:
+            return
+        # First token is keyed by text only; later tokens also record whether
+        # whitespace separates them from the previous one ("node.js" != "node . js")
+        node = self._root.setdefault(tokens[0][0], {})
+        for token, spaced in tokens[1:]:
+            node = node.setdefault((spaced, token), {})
+        node.setdefault(None, set()).add(index)
+
+    def find_indices(self, text):
+        tokens = list(_tokenize(text.lower()))
+        root = self._root
+        hits = set()
+        n = len(tokens)
+        for i in range(n):
+            node = root.get(tokens[i][0])
+            j = i + 1
+            while node is not None:
+                terminal = node.get(None)
+                if terminal:
+                    hits.update(terminal)
+                if j >= n:
+                    break
+                token, spaced = tokens[j]
+                node = node.get((spaced, token))
+                j += 1
+        return hits
+
+    def findall(self, text):
+        """Canonical names of all dictionary entries present in `text`"""
+        return [self.canonical[i] for i in sorted(self.find_indices(text))]
+
+
+def compile_phrases(dictionary):
+    """Return the PhraseMatcher for this dictionary, building it once per dictionary version"""
+    if isinstance(dictionary, dict):
+        key = tuple((k, tuple([v] if isinstance(v, str) else v)) for k, v in dictionary.items())
+    else:
+        key = tuple(dictionary)
+    matcher = _COMPILED.get(key)
+    if matcher is None:
+        matcher = _COMPILED[key] = PhraseMatcher(dictionary)
+    return matcher
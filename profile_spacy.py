@@ -0,0 +1,113 @@
+"""
+spaCy Profile Benchmark (full / lean / fast)
+- Latency: per-resume extraction time (mean / p50 / p95) and nlp.pipe throughput
+- Agreement with the full profile on what the models actually use:
+  JobProbabilityPredictor years of experience, CareerModel years and skill set
+Usage: python profile_spacy.py [--rows 300] [--json spacy_profiles.json]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis_context import AnalysisContext
+from career_model import CareerModel
+from job_probability_model import JobProbabilityPredictor
+from model_registry import registry
+from spacy_profiles import PROFILES
+
+
+def load_resumes(csv_path, rows):
+    df = pd.read_csv(csv_path)
+    texts = list(dict.fromkeys(df['Resume'].astype(str)))
+    return texts[:rows]
+
+
+def run_profile(profile, texts, career_model, job_predictor, batch_size):
+    start = time.perf_counter()
+    nlp = registry.get_nlp("en_core_web_sm", profile=profile)
+    load_seconds = time.perf_counter() - start
+    error = registry.nlp_error("en_core_web_sm", profile=profile)
+    if error is not None:
+        return {'profile': profile, 'error': error}, None
+
+    # One resume at a time, as a single request would see it
+    latencies = []
+    outputs = []
+    for text in texts:
+        ctx = AnalysisContext(text)
+        start = time.perf_counter()
+        AnalysisContext.parse_many([ctx], lambda: nlp)
+        entities = career_model._compute_ner_entities(ctx)
+        years = job_predictor._compute_years_experience(ctx)
+        latencies.append((time.perf_counter() - start) * 1000)
+        outputs.append((years, entities['years_experience'], frozenset(entities['technical_skills'])))
+
+    # Batched parse throughput (bulk endpoints / training)
+    contexts = [AnalysisContext(text) for text in texts]
+    start = time.perf_counter()
+    AnalysisContext.parse_many(contexts, lambda: nlp, batch_size=batch_size)
+    pipe_seconds = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    return {
+        'profile': profile,
+        'components': list(getattr(nlp, 'pipe_names', [])) if nlp is not None else [],
+        'load_ms': round(load_seconds * 1000, 1),
+        'resumes': len(texts),
+        'latency_ms_mean': round(float(latencies.mean()), 2),
+        'latency_ms_p50': round(float(np.percentile(latencies, 50)), 2),
+        'latency_ms_p95': round(float(np.percentile(latencies, 95)), 2),
+        'pipe_resumes_per_s': round(len(texts) / max(pipe_seconds, 1e-9), 1)
+    }, outputs
+
+
+def agreement(outputs, reference):
+    n = len(reference)
+    return {
+        'job_yoe': round(sum(o[0] == r[0] for o, r in zip(outputs, reference)) / n, 4),
+        'career_yoe': round(sum(o[1] == r[1] for o, r in zip(outputs, reference)) / n, 4),
+        'skills_exact': round(sum(o[2] == r[2] for o, r in zip(outputs, reference)) / n, 4)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure latency and agreement of the spaCy profiles")
+    parser.add_argument('--csv', default='archive/UpdatedResumeDataSet.csv')
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--json', default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    texts = load_resumes(args.csv, args.rows)
+    print(f"⏳ Profiling {len(texts)} unique resumes from {args.csv}...")
+    career_model = CareerModel()
+    job_predictor = JobProbabilityPredictor()
+
+    results, reference = [], None
+    for profile in PROFILES:
+        result, outputs = run_profile(profile, texts, career_model, job_predictor, args.batch_size)
+        if profile == 'full':
+            reference = outputs
+        if outputs is not None and reference is not None:
+            result['agreement_with_full'] = agreement(outputs, reference)
+        results.append(result)
+
+    print("\n" + "=" * 60)
+    for result in results:
+        if 'error' in result:
+            print(f"⚠️ {result['profile']:>4}: unavailable ({result['error']})")
+            continue
+        print(f"{result['profile']:>4}: mean {result['latency_ms_mean']} ms | p95 {result['latency_ms_p95']} ms | "
+              f"pipe {result['pipe_resumes_per_s']} resumes/s | components {result['components']}")
+        if 'agreement_with_full' in result:
+            print(f"      agreement with full: {result['agreement_with_full']}")
+    print("=" * 60)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.json}")
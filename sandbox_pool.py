@@ -0,0 +1,202 @@
+"""
+Killable Sandbox Worker Pool
+- Long-lived worker processes, each running one task at a time over a pipe
+- Hard per-call deadline: a worker that overruns is killed and replaced
+- Unlike ProcessPoolExecutor, one stuck task never takes down the others
+- A pool used from a forked child starts over with its own workers (never the parent's pipes)
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import wait as wait_connections
+
+
+class SandboxTimeout(Exception):
+    """A sandboxed task exceeded its deadline and its worker was killed"""
+
+
+class SandboxBusy(Exception):
+    """Every worker stayed busy with other tasks until the deadline (pool saturated)"""
+
+
+class SandboxTaskError(Exception):
+    """A sandboxed task raised inside the worker process"""
+
+
+def _worker_main(conn):
+    while True:
+        try:
+            fn, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send((True, fn(*args)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    __slots__ = ('process', 'conn')
+
+    def __init__(self, context):
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(1)
+        finally:
+            self.conn.close()
+
+
+class SandboxPool:
+    """
+    Up to `size` worker processes shared by all requests.
+
+    Workers use the 'spawn' start method so they never inherit the server's
+    threads or model memory; tasks must be module-level functions.
+    """
+
+    def __init__(self, size=2, start_method='spawn'):
+        self.size = size
+        self.start_method = start_method
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.killed = 0
+
+    def _reset_if_forked(self):
+        # Inherited workers belong to the parent: sharing their pipes would hand one
+        # process's results to another, and only the parent can join them
+        if self._pid == os.getpid():
+            return
+        while True:
+            try:
+                self._idle.get_nowait().conn.close()  # this process's copy of the fd only
+            except queue.Empty:
+                break
+            except OSError:
+                pass
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _checkout(self, deadline, block=True):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return _Worker(multiprocessing.get_context(self.start_method))
+                except Exception:
+                    self._created -= 1
+                    raise
+        if not block:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise SandboxBusy("No sandbox worker became available in time")
+        try:
+            return self._idle.get(timeout=remaining)
+        except queue.Empty:
+            raise SandboxBusy("No sandbox worker became available in time")
+
+    def _checkin(self, worker):
+        self._idle.put(worker)
+
+    def _discard(self, worker):
+        worker.kill()
+        self.killed += 1
+        with self._lock:
+            self._created -= 1
+
+    def run(self, fn, args, timeout):
+        """Run one task with a hard timeout"""
+        results = self.imap([args], fn, timeout)
+        try:
+            return next(results)
+        finally:
+            results.close()
+
+    def imap(self, args_list, fn, timeout):
+        """
+        Run `fn(*args)` for each args tuple across the pool, yielding results
+        in input order. All tasks share one deadline; on expiry every busy
+        worker is killed and SandboxTimeout is raised (SandboxBusy if no worker
+        ever became free). Closing the generator early stops dispatching and
+        kills the workers still busy with its tasks.
+        """
+        self._reset_if_forked()
+        deadline = time.monotonic() + timeout
+        pending = list(enumerate(args_list))
+        pending.reverse()
+        busy = {}
+        done = {}
+        next_index = 0
+        dead_on_send = 0
+        try:
+            while pending or busy:
+                # Dispatch onto every worker we can get (block only if none are busy)
+                while pending:
+                    worker = self._checkout(deadline, block=not busy)
+                    if worker is None:
+                        break
+                    index, args = pending[-1]
+                    try:
+                        worker.conn.send((fn, args))
+                    except OSError:
+                        # Died while idle (e.g. OOM-killed): free its slot and retry on a fresh worker
+                        self._discard(worker)
+                        dead_on_send += 1
+                        if dead_on_send > self.size:
+                            raise SandboxTaskError("Sandbox workers keep dying before accepting a task")
+                        continue
+                    except BaseException:
+                        self._discard(worker)
+                        raise
+                    pending.pop()
+                    busy[worker.conn] = (worker, index)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise SandboxTimeout(f"Task exceeded {timeout:.1f}s")
+                for conn in wait_connections(list(busy), timeout=remaining):
+                    worker, index = busy.pop(conn)
+                    try:
+                        ok, value = conn.recv()
+                    except (EOFError, OSError):
+                        self._discard(worker)
+                        raise SandboxTaskError("Sandbox worker crashed")
+                    self._checkin(worker)
+                    if not ok:
+                        raise SandboxTaskError(value)
+                    done[index] = value
+
+                while next_index in done:
+                    yield done.pop(next_index)
+                    next_index += 1
+        finally:
+            # Timeout, error, overrun or early close: never leave a worker mid-task in the pool
+            # (waiting for results nobody reads would hold workers other requests need)
+            for worker, _ in busy.values():
+                self._discard(worker)
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'workers': self._created,
+            'idle': self._idle.qsize(),
+            'killed': self.killed
+        }
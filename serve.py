@@ -0,0 +1,228 @@
+"""
+Pre-Forked Production Launcher
+- The parent imports the app, loads and warms every model once, then gc.freeze()s the heap
+- N uvicorn workers are forked onto one shared listening socket: model weights, spaCy
+  vocab and bundle arrays stay shared copy-on-write instead of being loaded N times
+- Worker count adapts to the CPUs actually available (affinity mask + cgroup CPU quota)
+- A worker that dies is re-forked from the warm parent; SIGTERM / SIGINT stop them all
+- Workers publish metrics snapshots to METRICS_DIR so /metrics on any worker covers all of them
+Usage: python serve.py [--workers N] [--host 0.0.0.0] [--port 5000]
+"""
+
+import argparse
+import gc
+import math
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+# --- CONFIGURATION (environment overrides) ---
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', '5000'))
+WEB_WORKERS = int(os.environ.get('WEB_WORKERS', '0'))  # 0 = one per available CPU
+WEB_WORKERS_MAX = int(os.environ.get('WEB_WORKERS_MAX', '8'))
+RESPAWN_DELAY = float(os.environ.get('WORKER_RESPAWN_DELAY', '1'))
+MEMORY_REPORT_DELAY = float(os.environ.get('WORKER_MEMORY_REPORT_DELAY', '15'))  # 0 = off
+
+
+def _cgroup_cpu_quota():
+    """CPUs granted by the container's CFS quota (cgroup v2, then v1); None when unlimited"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def worker_count(requested=WEB_WORKERS, cpus=None):
+    if requested > 0:
+        return requested
+    return max(1, min(cpus or available_cpus(), WEB_WORKERS_MAX))
+
+
+def _smaps(pid):
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    fields[name] = int(value.split()[0]) / 1024
+    except (OSError, ValueError):
+        return None
+    return fields
+
+
+def print_memory_report(parent_pid, workers):
+    parent = _smaps(parent_pid)
+    if parent is None:
+        return
+    print(f"📊 Memory: parent RSS {parent['Rss']:.0f} MB")
+    for pid in sorted(workers):
+        stats = _smaps(pid)
+        if stats is not None:
+            private = stats['Private_Clean'] + stats['Private_Dirty']
+            print(f"   worker {pid}: RSS {stats['Rss']:.0f} MB | PSS {stats['Pss']:.0f} MB | private {private:.0f} MB")
+
+
+def bind_socket(host, port, backlog=2048):
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def prepare_metrics_dir():
+    """Private snapshot directory unless METRICS_DIR is given; stale snapshots from a previous run are dropped"""
+    directory = os.environ.get('METRICS_DIR')
+    if not directory:
+        directory = os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='pathintel-metrics-')
+        return directory, True
+    os.makedirs(directory, exist_ok=True)
+    for filename in os.listdir(directory):
+        if filename.startswith('metrics-'):
+            os.remove(os.path.join(directory, filename))
+    return directory, False
+
+
+def preload(threads_per_worker, workers):
+    """Import the app and run its shareable warmup steps in this (parent) process"""
+    # Workers inherit an empty OpenMP pool (forking after libgomp spun up threads can hang);
+    # each worker sets its own thread count after the fork
+    os.environ.setdefault('OMP_NUM_THREADS', '1')
+    os.environ.setdefault('INFERENCE_WORKERS', str(max(2, threads_per_worker)))
+    metrics_dir, owned = prepare_metrics_dir()
+    # Collections during the load would only touch (and un-share) the pages we are about to freeze
+    gc.disable()
+
+    import app as application
+    from micro_batcher import direct_encodes
+    from startup import startup
+    # Encode straight through the model: the parent must not own a batcher thread at fork time
+    with direct_encodes():
+        startup.start_warmup(application.MODEL_WARMUP_STEPS, mode='blocking')
+    if startup.state == 'failed':
+        print("🛑 Model warmup failed in the parent; not starting workers")
+        sys.exit(1)
+
+    gc.collect()
+    # Everything loaded so far moves to the permanent generation: the workers' collector
+    # never writes to those objects' headers, so their pages stay shared
+    gc.freeze()
+    print(f"✅ Models warm in parent {os.getpid()} ({gc.get_freeze_count()} objects frozen), forking {workers} workers")
+    return application.app, (metrics_dir if owned else None)
+
+
+def run_worker(app, sock, threads):
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    gc.enable()
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, lifespan='on'))
+    code = 0
+    try:
+        server.run(sockets=[sock])
+    except BaseException as e:
+        print(f"❌ Worker {os.getpid()} crashed: {e}")
+        code = 1
+    finally:
+        # Never fall back into the parent's supervisor loop
+        os._exit(code)
+
+
+def serve(host=HOST, port=PORT, workers=None):
+    cpus = available_cpus()
+    workers = workers or worker_count(cpus=cpus)
+    threads = max(1, cpus // workers)
+    print(f"⏳ Pre-fork launcher: {cpus} CPUs available -> {workers} workers x {threads} inference threads")
+
+    app, owned_metrics_dir = preload(threads, workers)
+    sock = bind_socket(host, port)
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(app, sock, threads)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f"🚀 Serving on http://{host}:{port} with {workers} workers (parent {os.getpid()})")
+
+    report_at = time.monotonic() + MEMORY_REPORT_DELAY if MEMORY_REPORT_DELAY > 0 else None
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if report_at is not None and time.monotonic() >= report_at:
+                print_memory_report(os.getpid(), children)
+                report_at = None
+            time.sleep(0.2)
+            continue
+        if children.pop(pid, None) is None or stopping:
+            continue
+        print(f"⚠️ Worker {pid} exited (status {os.waitstatus_to_exitcode(status)}); re-forking")
+        time.sleep(RESPAWN_DELAY)
+        if not stopping:
+            spawn()
+
+    sock.close()
+    if owned_metrics_dir:
+        shutil.rmtree(owned_metrics_dir, ignore_errors=True)
+    print("✅ All workers stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-forked multi-worker server with copy-on-write shared models")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=WEB_WORKERS, help="0 = one per available CPU")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers or None)
@@ -0,0 +1,157 @@
+"""
+Similar-Profiles Search over the UpdatedResumeDataSet Corpus
+- Offline: `python similar_profiles.py` embeds archive/UpdatedResumeDataSet.csv in chunks
+  into an on-disk VectorIndex (float16/int8, IVF-partitioned once the corpus is large)
+- Online: the index is memory-mapped at startup; one query is a blocked matrix-vector
+  product over the probed IVF lists, no Python loop over reference rows
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+from analysis_context import AnalysisContext
+from model_registry import registry
+from vector_index import VectorIndex, normalize_rows
+
+# --- CONFIGURATION (environment overrides) ---
+PROFILE_CORPUS_CSV = os.environ.get('PROFILE_CORPUS_CSV', os.path.join('archive', 'UpdatedResumeDataSet.csv'))
+PROFILE_INDEX_DIR = os.environ.get('PROFILE_INDEX_DIR', 'profile_index')
+PROFILE_INDEX_DTYPE = os.environ.get('PROFILE_INDEX_DTYPE', 'float16')  # 'float16' or 'int8'
+PROFILE_INDEX_PROBE = int(os.environ.get('PROFILE_INDEX_PROBE', '16'))
+PROFILE_SNIPPET_CHARS = int(os.environ.get('PROFILE_SNIPPET_CHARS', '200'))
+PROFILE_IVF_MIN_ROWS = 20000  # below this an exact scan is already sub-millisecond
+
+
+def default_lists(rows):
+    """IVF list count for a corpus size (~4 * sqrt(N)); 0 keeps the exact scan for small corpora"""
+    return int(4 * math.sqrt(rows)) if rows >= PROFILE_IVF_MIN_ROWS else 0
+
+
+class SimilarProfiles:
+    """
+    k nearest reference resumes (with their categories) for an uploaded resume.
+
+    Queries reuse CareerModel's cleaning and encoder, memoized on the request's
+    AnalysisContext, so a resume that is also classified is encoded only once.
+    """
+
+    def __init__(self, career_model, directory=PROFILE_INDEX_DIR, n_probe=PROFILE_INDEX_PROBE):
+        self.career_model = career_model
+        self.index = VectorIndex(directory, n_probe=n_probe)
+
+    def load(self):
+        """Map the index now (startup) instead of on the first query"""
+        self.index.load()
+        return self.available
+
+    @property
+    def available(self):
+        return len(self.index) > 0
+
+    def search(self, resume, k=5):
+        """[{'rank', 'category', 'similarity', 'snippet'}] best first, plus category votes over the k hits"""
+        if not self.available:
+            raise RuntimeError(f"Profile index not built: run `python similar_profiles.py` (expected in {self.index.directory})")
+        built_with = self.index.attributes.get('embedding_model')
+        if built_with and built_with != self.career_model.embedding_model:
+            raise RuntimeError(f"Profile index was built with {built_with}, not {self.career_model.embedding_model}")
+
+        encoder = self.career_model.transformer
+        if encoder is None or not hasattr(encoder, 'encode'):
+            raise RuntimeError("Transformer unavailable: cannot embed the resume")
+        # fp32 / int8 / ONNX vectors drift apart: neighbours from another backend are silently skewed
+        built_backend = self.index.attributes.get('encoder_backend')
+        backend = getattr(registry.get_encoder(self.career_model.embedding_model), 'encoder_backend', None)
+        if built_backend and backend and built_backend != backend:
+            raise RuntimeError(f"Profile index was built with the {built_backend} encoder backend, not {backend}: "
+                               f"rebuild it with `python similar_profiles.py`")
+        ctx = AnalysisContext.of(resume)
+        cleaned = ctx.get('career.clean', lambda: self.career_model.clean_text(ctx.text))
+        query = AnalysisContext.embed(encoder, [(ctx, cleaned)])[0]
+
+        hits = self.index.search(query, k)
+        results = [
+            {'rank': rank, 'category': meta['category'], 'similarity': round(score, 4), 'snippet': meta['snippet']}
+            for rank, (score, meta) in enumerate(hits, start=1)
+        ]
+        votes = Counter(r['category'] for r in results)
+        return {
+            'results': results,
+            'category_votes': [{'category': c, 'count': n} for c, n in votes.most_common()]
+        }
+
+    def stats(self):
+        return {**self.index.stats(), 'attributes': self.index.attributes}
+
+
+def build_index(csv_path=PROFILE_CORPUS_CSV, directory=PROFILE_INDEX_DIR, dtype=PROFILE_INDEX_DTYPE,
+                n_lists=None, chunk_rows=5000, batch_size=64):
+    """
+    Embed the reference corpus chunk by chunk and write a fresh index generation.
+    Duplicate resumes (same cleaned text) are indexed once; only a 16-byte digest
+    per resume and one float16 block per chunk are held until the final write.
+    """
+    import pandas as pd
+    from career_model import CareerModel
+
+    model = CareerModel()
+    # Raw encoder: a one-off corpus pass should not churn the request-time embedding cache
+    encoder = registry.get_encoder(model.embedding_model)
+    if encoder is None:
+        print(f"🛑 Fatal Error: Transformer failed to load ({registry.encoder_error(model.embedding_model)})")
+        return False
+
+    index = VectorIndex(directory, dtype=dtype)
+    seen = set()
+    blocks, metadata = [], []
+    rows = 0
+    start = time.perf_counter()
+    print(f"⏳ Embedding {csv_path} with {model.embedding_model}...")
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+        texts = []
+        for row_id, category, resume in zip(chunk.index, chunk['Category'], chunk['Resume']):
+            resume = str(resume)
+            cleaned = model.clean_text(resume)
+            digest = hashlib.blake2b(cleaned.encode('utf-8'), digest_size=16).digest()
+            if not cleaned or digest in seen:
+                continue
+            seen.add(digest)
+            texts.append(cleaned)
+            metadata.append({'row': int(row_id), 'category': str(category), 'snippet': resume[:PROFILE_SNIPPET_CHARS]})
+        rows += len(chunk)
+        if texts:
+            vectors = encoder.encode(texts, batch_size=batch_size, show_progress_bar=False)
+            blocks.append(normalize_rows(vectors).astype(np.float16))
+        elapsed = time.perf_counter() - start
+        print(f"   {rows} rows read, {len(seen)} unique embedded ({len(seen) / max(elapsed, 1e-9):.0f}/s)")
+
+    if not blocks:
+        print(f"🛑 No resumes to index in {csv_path}")
+        return False
+    vectors = np.concatenate(blocks)
+    del blocks
+
+    index.n_lists = default_lists(len(seen)) if n_lists is None else n_lists
+    print(f"⏳ Writing index ({dtype}, {index.n_lists or 'no'} IVF lists) to {directory}...")
+    index.rebuild(vectors, metadata, attributes={'embedding_model': model.embedding_model, 'source': csv_path,
+                                                 'source_rows': rows,
+                                                 'encoder_backend': getattr(encoder, 'encoder_backend', None)})
+    print(f"✅ Profile index built: {len(seen)} profiles in {time.perf_counter() - start:.1f}s")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the similar-profiles index from the resume corpus")
+    parser.add_argument('--csv', default=PROFILE_CORPUS_CSV)
+    parser.add_argument('--out', default=PROFILE_INDEX_DIR)
+    parser.add_argument('--dtype', default=PROFILE_INDEX_DTYPE, choices=['float16', 'int8'])
+    parser.add_argument('--lists', type=int, default=None, help="IVF lists (default: 4*sqrt(N) above 20k profiles)")
+    parser.add_argument('--chunk-rows', type=int, default=5000)
+    args = parser.parse_args()
+    build_index(args.csv, args.out, args.dtype, args.lists, args.chunk_rows)
@@ -0,0 +1,145 @@
+"""
+spaCy Pipeline Profiles
+- full: en_core_web_sm as shipped + extract_yoe (NER, parser, lemmas over the whole resume)
+- lean: no NER/senter; only windows around "year" mentions are parsed (all extract_yoe needs)
+- fast: no spaCy at all; years/skills/education come from the compiled regex and phrase rules
+Selected with SPACY_PROFILE; every profile is loaded through the shared ModelRegistry.
+"""
+
+import os
+import re
+
+# --- CONFIGURATION (environment overrides) ---
+NLP_PROFILE = os.environ.get('SPACY_PROFILE', 'full')
+SNIPPET_WINDOW_CHARS = int(os.environ.get('SPACY_SNIPPET_WINDOW', '200'))
+
+PROFILES = ('full', 'lean', 'fast')
+
+# Components each profile drops at load time (excluded components are never built)
+EXCLUDED_COMPONENTS = {
+    'full': [],
+    # extract_yoe needs tagger (NUM), parser (children) and lemmatizer ("year");
+    # the NER skill pass only ever confirms entries the phrase matcher already finds
+    'lean': ['ner', 'senter']
+}
+
+YEAR_RE = re.compile(r'year', re.IGNORECASE)
+
+
+def register_yoe_component():
+    """Register the custom 'extract_yoe' spaCy component (idempotent)"""
+    from spacy.language import Language
+    from spacy.tokens import Doc
+    try:
+        from word2number import w2n
+    except ImportError:
+        w2n = None
+
+    if not Doc.has_extension("total_yoe"):
+        Doc.set_extension("total_yoe", default=0.0)
+
+    if "extract_yoe" in Language.factories:
+        return
+
+    @Language.component("extract_yoe")
+    def extract_yoe_component(doc):
+        total_years = 0.0
+        for token in doc:
+            if token.lemma_ == "year":
+                number_token = None
+                for child in token.children:
+                    if child.pos_ == "NUM":
+                        number_token = child
+                        break
+                if number_token:
+                    try:
+                        if w2n:
+                            years = float(w2n.word_to_num(number_token.text))
+                        else:
+                            years = float(number_token.text)
+                        start = max(0, token.i - 5)
+                        end = min(len(doc), token.i + 6)
+                        context = doc[start:end].text.lower()
+                        if any(kw in context for kw in ["experience", "worked", "developer", "engineer", "professional"]):
+                            total_years += years
+                    except Exception:
+                        pass
+        doc._.total_yoe = total_years
+        return doc
+
+
+def year_windows(text, window=SNIPPET_WINDOW_CHARS):
+    """Merged (start, end) character windows around every "year" mention, snapped to whitespace"""
+    spans = []
+    for match in YEAR_RE.finditer(text):
+        start = max(0, match.start() - window)
+        end = min(len(text), match.end() + window)
+        # Never cut a word in half
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        while end < len(text) and not text[end].isspace():
+            end += 1
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+
+class SnippetPipeline:
+    """
+    Wraps a pruned pipeline so only the text around "year" mentions is parsed.
+
+    Returns one Doc per input (the parsed windows joined) with `total_yoe`
+    summed over the windows; everything else is delegated to the wrapped nlp.
+    """
+
+    def __init__(self, nlp, window=SNIPPET_WINDOW_CHARS):
+        self.nlp = nlp
+        self.window = window
+
+    def _snippets(self, text):
+        return [text[start:end] for start, end in year_windows(text, self.window)]
+
+    def _combine(self, docs):
+        from spacy.tokens import Doc
+        doc = Doc.from_docs(docs) if docs else self.nlp.make_doc("")
+        doc._.total_yoe = sum(d._.total_yoe for d in docs)
+        return doc
+
+    def __call__(self, text):
+        return self._combine(list(self.nlp.pipe(self._snippets(text))))
+
+    def pipe(self, texts, batch_size=32, **kwargs):
+        """Same contract as Language.pipe: all windows of all texts go through one stream"""
+        texts = list(texts)
+        owners, snippets = [], []
+        for i, text in enumerate(texts):
+            for snippet in self._snippets(text):
+                owners.append(i)
+                snippets.append(snippet)
+
+        grouped = [[] for _ in texts]
+        for owner, doc in zip(owners, self.nlp.pipe(snippets, batch_size=batch_size, **kwargs)):
+            grouped[owner].append(doc)
+        for docs in grouped:
+            yield self._combine(docs)
+
+    def __getattr__(self, name):
+        return getattr(self.nlp, name)
+
+
+def load_pipeline(name, profile='full'):
+    """Registry factory: the spaCy pipeline for `profile` (None for the fast, spaCy-free profile)"""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown spaCy profile: {profile}")
+    if profile == 'fast':
+        return None
+
+    import spacy
+    register_yoe_component()
+    pipeline = spacy.load(name, exclude=EXCLUDED_COMPONENTS[profile])
+    pipeline.add_pipe("extract_yoe", last=True)
+    if profile == 'lean':
+        return SnippetPipeline(pipeline)
+    return pipeline
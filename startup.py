@@ -0,0 +1,135 @@
+"""
+Startup Timing & Background Warmup
+- Per-stage wall time for import blocks and model loads, printed at boot and served by /readyz
+- Warmup steps (model loads + one dummy inference) run on a background thread so the port binds at once
+- Liveness (/healthz: process up) is separate from readiness (/readyz: warmup finished)
+- Steps completed before a fork (serve.py parent) are skipped by the forked workers
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- CONFIGURATION (environment overrides) ---
+STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', 'background')  # 'background', 'blocking' or 'off'
+
+
+class StartupTracker:
+    """
+    Records startup stages and runs the warmup.
+
+    State goes starting -> warming -> ready, or failed when a required step
+    raised. Optional steps that fail only mark the service degraded.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.stages = []
+        self.state = 'starting'
+        self.errors = {}
+        self.ready_seconds = None
+        self.completed = set()
+        self._last_mark = self.started
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _record(self, name, seconds, error=None):
+        with self._lock:
+            self.stages.append({'stage': name, 'ms': round(seconds * 1000, 1), 'ok': error is None})
+            if error is not None:
+                self.errors[name] = error
+
+    def mark(self, name):
+        """Close an import block: records the time since the previous mark"""
+        now = time.perf_counter()
+        self._record(name, now - self._last_mark)
+        self._last_mark = now
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._record(name, time.perf_counter() - start, error=str(e))
+            raise
+        else:
+            self._record(name, time.perf_counter() - start)
+        finally:
+            self._last_mark = time.perf_counter()
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    def wait(self, timeout=None):
+        """Block until the warmup finished (ready or failed); True when ready"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def _run(self, steps):
+        failed = False
+        for name, fn, required in steps:
+            if name in self.completed:
+                continue
+            try:
+                with self.stage(name):
+                    fn()
+                self.completed.add(name)
+            except Exception as e:
+                print(f"{'🛑' if required else '⚠️'} Warmup step '{name}' failed: {e}")
+                failed = failed or required
+        self.ready_seconds = time.perf_counter() - self.started
+        self.state = 'failed' if failed else 'ready'
+        self._done.set()
+        self.print_summary()
+
+    def start_warmup(self, steps, mode=STARTUP_WARMUP):
+        """
+        Run `steps` ([(name, fn, required)]) in order: on a daemon thread
+        ('background'), inline ('blocking'), or not at all ('off': models
+        load lazily on the first request and readiness is immediate).
+        """
+        if self.state != 'starting':
+            return
+        self.state = 'warming'
+        if mode == 'off':
+            steps = []
+        if mode == 'background':
+            self._thread = threading.Thread(target=self._run, args=(steps,), name='startup-warmup', daemon=True)
+            self._thread.start()
+        else:
+            self._run(steps)
+
+    def _after_fork(self):
+        # Forked worker: keep the parent's stages, run its own per-process steps
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        if self.state != 'failed':
+            self.state = 'starting'
+
+    def print_summary(self):
+        print("\n⏱️ Startup stages:")
+        for stage in list(self.stages):
+            print(f"   {'✅' if stage['ok'] else '❌'} {stage['stage']:<32} {stage['ms']:>9.1f} ms")
+        print(f"   {'=' * 44}\n   {self.state.upper()} after {self.ready_seconds:.2f}s\n")
+
+    def report(self):
+        return {
+            'state': self.state,
+            'uptime_s': round(time.perf_counter() - self.started, 1),
+            'ready_after_s': round(self.ready_seconds, 2) if self.ready_seconds is not None else None,
+            'stages': list(self.stages),
+            'errors': dict(self.errors)
+        }
+
+
+# Process-wide tracker; import this module first so the clock covers every import
+startup = StartupTracker()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=startup._after_fork)
@@ -0,0 +1,348 @@
+"""
+Resume Upload Reading & Text Extraction
+- Uploads are copied in chunks into memory with a hard size limit (no uploads/ folder); the
+  multipart body is already spooled by then, so app.py rejects oversized Content-Length up front
+- Format detected from magic bytes, not the client filename
+- PDF / DOCX text extracted straight from the in-memory buffer
+- PDF pages extracted in parallel sandbox processes with page/char budgets and a hard timeout
+- DOCX streamed from word/document.xml only (no media), with zip-bomb limits
+"""
+
+import io
+import os
+import threading
+import time
+import zipfile
+from xml.parsers import expat
+
+from metrics import observe_stage
+from sandbox_pool import SandboxPool, SandboxBusy, SandboxTimeout, SandboxTaskError
+
+# --- CONFIGURATION (environment overrides) ---
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', '30'))
+PDF_MAX_CHARS = int(os.environ.get('PDF_MAX_CHARS', '100000'))
+PDF_TIMEOUT_SECONDS = float(os.environ.get('PDF_TIMEOUT_SECONDS', '10'))
+PDF_PAGES_PER_TASK = int(os.environ.get('PDF_PAGES_PER_TASK', '4'))
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', '2'))
+PDF_SANDBOX = os.environ.get('PDF_SANDBOX', '1') == '1'
+PDF_RETRY_AFTER = int(os.environ.get('PDF_RETRY_AFTER', '2'))
+
+DOCX_MAX_XML_BYTES = int(os.environ.get('DOCX_MAX_XML_BYTES', str(20 * 1024 * 1024)))
+DOCX_MAX_RATIO = int(os.environ.get('DOCX_MAX_RATIO', '100'))
+DOCX_MAX_CHARS = int(os.environ.get('DOCX_MAX_CHARS', str(PDF_MAX_CHARS)))
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main}'  # expat name prefix
+W_BREAKS = {W_NS + 'tab': '\t', W_NS + 'br': '\n', W_NS + 'cr': '\n', W_NS + 'p': '\n\n'}
+
+
+class UploadTooLarge(Exception):
+    """Upload (or a whole batch request) exceeded its byte limit (HTTP 413)"""
+
+    def __init__(self, limit, subject='File'):
+        super().__init__(f"{subject} too large: limit is {limit // (1024 * 1024)} MB")
+        self.limit = limit
+
+
+class UnsupportedFormat(Exception):
+    """Upload is neither a PDF nor a DOCX document (HTTP 415)"""
+
+    def __init__(self):
+        super().__init__("Unsupported file type: please upload a PDF or DOCX resume")
+
+
+class ExtractionFailed(Exception):
+    """Document is malformed or took too long to parse (HTTP 422)"""
+
+
+class ExtractionBusy(Exception):
+    """Every PDF sandbox worker is busy with other uploads (HTTP 503 + Retry-After)"""
+
+    def __init__(self, retry_after=PDF_RETRY_AFTER):
+        super().__init__("Server busy: no PDF extraction worker available")
+        self.retry_after = retry_after
+
+
+async def read_upload(upload, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Copy an UploadFile into memory chunk by chunk, aborting once it exceeds `max_bytes`.
+    Starlette has already spooled the whole multipart body at this point: the cap bounds
+    memory, not bytes received (those are bounded by the Content-Length check in app.py).
+    """
+    size = getattr(upload, 'size', None)
+    if size is not None and size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+    buffer = bytearray()
+    with observe_stage('upload_read'):
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            buffer += chunk
+            if len(buffer) > max_bytes:
+                raise UploadTooLarge(max_bytes)
+    return bytes(buffer)
+
+
+def detect_format(data):
+    """'pdf' or 'docx' from the file signature, None otherwise"""
+    # Zip first: a stored (uncompressed) archive can carry a PDF header in its first KB
+    if data[:4] == b'PK\x03\x04':
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                if 'word/document.xml' in archive.namelist():
+                    return 'docx'
+        except zipfile.BadZipFile:
+            pass
+        return None
+    # PDF header may be preceded by junk bytes; readers accept it within the first 1 KB
+    if b'%PDF-' in data[:1024]:
+        return 'pdf'
+    return None
+
+
+def is_zip_archive(data):
+    """A plain .zip (e.g. a folder of resumes), as opposed to a DOCX package"""
+    return data[:4] == b'PK\x03\x04' and detect_format(data) is None
+
+
+def expand_zip_archive(data, max_files, max_bytes=None, max_member_bytes=MAX_UPLOAD_BYTES, max_ratio=DOCX_MAX_RATIO):
+    """
+    (name, bytes) for every PDF/DOCX inside a resume archive. Members over the
+    per-file size or compression-ratio limits are skipped, never inflated.
+    Raises UploadTooLarge once the members kept would exceed `max_bytes` in total
+    (declared sizes and bytes actually inflated both count).
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise ExtractionFailed(f"Could not read archive: {e}")
+
+    members = []
+    expanded = 0
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or info.filename.startswith('__MACOSX/'):
+                continue
+            if not info.filename.lower().endswith(('.pdf', '.docx')):
+                continue
+            if info.file_size > max_member_bytes or info.file_size > max(info.compress_size, 1) * max_ratio:
+                continue
+            if len(members) >= max_files:
+                raise ExtractionFailed(f"Archive holds more than {max_files} resumes")
+            remaining = max_bytes - expanded if max_bytes is not None else max_member_bytes
+            if info.file_size > remaining:
+                raise UploadTooLarge(max_bytes, 'Expanded batch')
+            with archive.open(info) as member:
+                content = member.read(min(max_member_bytes, remaining) + 1)
+            if len(content) > max_member_bytes:
+                continue
+            if len(content) > remaining:
+                raise UploadTooLarge(max_bytes, 'Expanded batch')
+            expanded += len(content)
+            members.append((info.filename, content))
+    return members
+
+
+def _count_pdf_pages(data):
+    import PyPDF2
+    return len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+
+
+def _extract_pdf_pages(data, start, stop, char_budget):
+    """Text of pages [start, stop), stopping early once `char_budget` characters are collected"""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    texts = []
+    collected = 0
+    for i in range(start, min(stop, len(reader.pages))):
+        text = reader.pages[i].extract_text() or ""
+        texts.append(text)
+        collected += len(text)
+        if collected >= char_budget:
+            break
+    return texts
+
+
+def _join_within_budget(page_texts, max_chars):
+    text = " ".join(page_texts)
+    return text[:max_chars]
+
+
+_pdf_sandbox = None
+_pdf_sandbox_lock = threading.Lock()
+
+
+def pdf_sandbox():
+    global _pdf_sandbox
+    with _pdf_sandbox_lock:
+        if _pdf_sandbox is None:
+            _pdf_sandbox = SandboxPool(size=PDF_WORKERS)
+    return _pdf_sandbox
+
+
+def _reset_after_fork():
+    # Forked children (process executor) spawn their own sandbox on first use; the
+    # inherited lock may have been held by another thread at fork time
+    global _pdf_sandbox, _pdf_sandbox_lock
+    _pdf_sandbox = None
+    _pdf_sandbox_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _load_pdf_reader():
+    import PyPDF2  # noqa: F401
+    return 1
+
+
+def warm_pdf_sandbox(timeout=PDF_TIMEOUT_SECONDS * 3):
+    """Spawn every PDF worker and import PyPDF2 in it, so the first upload pays neither (startup warmup)"""
+    if not PDF_SANDBOX:
+        return _load_pdf_reader()
+    return sum(pdf_sandbox().imap([()] * PDF_WORKERS, _load_pdf_reader, timeout))
+
+
+def extract_pdf_text(data, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS, timeout=PDF_TIMEOUT_SECONDS):
+    """
+    Extract at most `max_pages` pages / `max_chars` characters. Page ranges are
+    parsed in parallel sandbox processes sharing one hard deadline; a PDF that
+    hangs the parser gets its workers killed instead of stalling the server.
+    """
+    if not PDF_SANDBOX:
+        return _join_within_budget(_extract_pdf_pages(data, 0, max_pages, max_chars), max_chars)
+
+    sandbox = pdf_sandbox()
+    deadline = time.monotonic() + timeout
+    try:
+        page_count = min(sandbox.run(_count_pdf_pages, (data,), timeout), max_pages)
+        tasks = [
+            (data, start, min(start + PDF_PAGES_PER_TASK, page_count), max_chars)
+            for start in range(0, page_count, PDF_PAGES_PER_TASK)
+        ]
+        page_texts = []
+        collected = 0
+        results = sandbox.imap(tasks, _extract_pdf_pages, max(deadline - time.monotonic(), 0.001))
+        try:
+            for chunk in results:
+                page_texts.extend(chunk)
+                collected += sum(len(t) for t in chunk)
+                # Early termination: enough text, stop dispatching further page ranges
+                if collected >= max_chars:
+                    break
+        finally:
+            results.close()
+    except SandboxBusy:
+        # Server saturation, not the document's fault
+        raise ExtractionBusy()
+    except SandboxTimeout:
+        raise ExtractionFailed(f"PDF text extraction exceeded {timeout:.0f}s")
+    except SandboxTaskError as e:
+        raise ExtractionFailed(f"Could not read PDF: {e}")
+    return _join_within_budget(page_texts, max_chars)
+
+
+def iter_docx_text(data, max_xml_bytes=DOCX_MAX_XML_BYTES, max_ratio=DOCX_MAX_RATIO):
+    """
+    Yield text fragments of the main document part as it is decompressed.
+    Only word/document.xml is opened (embedded images and other media are never
+    read); its declared and actual decompressed sizes are both capped.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise ExtractionFailed(f"Could not read DOCX: {e}")
+
+    with archive:
+        try:
+            info = archive.getinfo('word/document.xml')
+        except KeyError:
+            raise ExtractionFailed("Could not read DOCX: word/document.xml missing")
+        if info.file_size > max_xml_bytes or info.file_size > max(info.compress_size, 1) * max_ratio:
+            raise ExtractionFailed("DOCX rejected: document.xml decompresses beyond the allowed size")
+
+        fragments = []
+        parser = _docx_parser(fragments)
+        decompressed = 0
+        with archive.open(info) as stream:
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                # Declared sizes can lie: enforce the limit on what is actually inflated
+                decompressed += len(chunk)
+                if decompressed > max_xml_bytes:
+                    raise ExtractionFailed("DOCX rejected: document.xml decompresses beyond the allowed size")
+                try:
+                    parser.Parse(chunk, False)
+                except expat.ExpatError as e:
+                    raise ExtractionFailed(f"Could not read DOCX: {e}")
+                yield from fragments
+                fragments.clear()
+
+
+def _reject_dtd(*args):
+    raise ExtractionFailed("DOCX rejected: DTDs are not allowed")
+
+
+def _docx_parser(fragments):
+    """
+    Streaming expat parser appending the text of w:t runs (and tab / break /
+    paragraph separators) to `fragments`. No tree is built. A DOCTYPE or entity
+    declaration anywhere in the document aborts the parse before any entity can
+    be expanded.
+    """
+    parser = expat.ParserCreate(namespace_separator='}')
+    parser.SetParamEntityParsing(expat.XML_PARAM_ENTITY_PARSING_NEVER)
+    parser.StartDoctypeDeclHandler = _reject_dtd
+    parser.EntityDeclHandler = _reject_dtd
+    parser.buffer_text = True
+    in_text = False
+
+    def start(name, attrs):
+        nonlocal in_text
+        in_text = name == W_NS + 't'
+
+    def end(name):
+        nonlocal in_text
+        in_text = False
+        if name in W_BREAKS:
+            fragments.append(W_BREAKS[name])
+
+    def characters(data):
+        if in_text:
+            fragments.append(data)
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = characters
+    return parser
+
+
+def extract_docx_text(data, max_chars=DOCX_MAX_CHARS):
+    """Stream DOCX text, stopping once `max_chars` characters are collected"""
+    parts = []
+    collected = 0
+    for fragment in iter_docx_text(data):
+        parts.append(fragment)
+        collected += len(fragment)
+        if collected >= max_chars:
+            break
+    return "".join(parts)[:max_chars].strip()
+
+
+def extract_text(data):
+    """Extract plain text from an in-memory PDF or DOCX"""
+    kind = detect_format(data)
+    if kind == 'pdf':
+        with observe_stage('extract_pdf'):
+            return extract_pdf_text(data)
+    if kind == 'docx':
+        with observe_stage('extract_docx'):
+            return extract_docx_text(data)
+    raise UnsupportedFormat()
@@ -0,0 +1,175 @@
+"""
+Per-Request Tracing (Server-Timing + sampled span trees)
+- A trace lives in a ContextVar: spans opened on the event loop or in executor threads
+  (context copied by InferenceExecutor) nest under the request's root span
+- Every span records wall time and CPU time of the thread it ran on
+- server_timing(): one `Server-Timing` entry per stage (summed), readable in browser devtools
+- Opt-in debug log: full span trees of sampled requests appended to a JSONL file
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# --- CONFIGURATION (environment overrides) ---
+TRACE_LOG_PATH = os.environ.get('TRACE_LOG_PATH') or None  # enables the debug span log
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.1'))
+TRACE_MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS', '500'))
+
+_TRACE_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+_current = ContextVar('pathintel_span', default=None)
+_log_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'started', 'wall', 'cpu', 'thread', 'children', 'attributes')
+
+    def __init__(self, trace, name, started):
+        self.trace = trace
+        self.name = name
+        self.started = started
+        self.wall = None
+        self.cpu = None
+        self.thread = threading.current_thread().name
+        self.children = []
+        self.attributes = {}
+
+    def to_dict(self, origin):
+        return {
+            'name': self.name,
+            'start_ms': round((self.started - origin) * 1000, 3),
+            'wall_ms': round(self.wall * 1000, 3) if self.wall is not None else None,
+            'cpu_ms': round(self.cpu * 1000, 3) if self.cpu is not None else None,
+            'thread': self.thread,
+            **({'attributes': self.attributes} if self.attributes else {}),
+            'children': [child.to_dict(origin) for child in self.children]
+        }
+
+
+class Trace:
+    def __init__(self, trace_id, name, sampled):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.span_count = 0
+        self.dropped = 0
+        self.totals = {}
+        self.top_level_cpu = 0.0
+        self._lock = threading.Lock()
+        self.root = Span(self, name, time.perf_counter())
+        self.started_at = time.time()
+
+    def _attach(self, parent, span):
+        # Spans can close concurrently on several executor threads
+        with self._lock:
+            if self.span_count >= TRACE_MAX_SPANS:
+                self.dropped += 1
+                return False
+            self.span_count += 1
+            parent.children.append(span)
+            return True
+
+    def _close(self, parent, span):
+        # Totals cover every span, including the ones past TRACE_MAX_SPANS left out of the tree
+        with self._lock:
+            total = self.totals.setdefault(span.name, [0.0, 0.0])
+            total[0] += span.wall
+            total[1] += span.cpu
+            if parent is self.root:
+                self.top_level_cpu += span.cpu
+
+    def stage_totals(self):
+        """{stage: [wall, cpu]} summed over every span below the root"""
+        with self._lock:
+            return {name: list(total) for name, total in self.totals.items()}
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'started_at': self.started_at,
+            **({'dropped_spans': self.dropped} if self.dropped else {}),
+            **self.root.to_dict(self.root.started)
+        }
+
+
+def new_trace_id(incoming=None):
+    """Honour a well-formed incoming ID (X-Trace-Id) so support can correlate, else a fresh one"""
+    if incoming and _TRACE_ID.match(incoming):
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def start_trace(name, trace_id=None, force_sample=False):
+    """Root span for one request; yields the Trace"""
+    sampled = TRACE_LOG_PATH is not None and (force_sample or random.random() < TRACE_SAMPLE_RATE)
+    trace = Trace(trace_id or new_trace_id(), name, sampled)
+    token = _current.set(trace.root)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.root.wall = time.perf_counter() - trace.root.started
+        # Thread CPU of the event loop would include other requests: sum the top-level stages instead
+        trace.root.cpu = trace.top_level_cpu
+
+
+@contextmanager
+def span(name, **attributes):
+    """Child span of the current one; a no-op outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    current = Span(parent.trace, name, time.perf_counter())
+    current.attributes.update(attributes)
+    attached = parent.trace._attach(parent, current)
+    token = _current.set(current) if attached else None
+    cpu_start = time.thread_time()
+    try:
+        yield current
+    finally:
+        current.cpu = time.thread_time() - cpu_start
+        current.wall = time.perf_counter() - current.started
+        if token is not None:
+            _current.reset(token)
+        parent.trace._close(parent, current)
+
+
+def record(name, wall, cpu=0.0):
+    """Attach an already-measured interval (e.g. executor queue wait) to the current span"""
+    parent = _current.get()
+    if parent is None:
+        return
+    current = Span(parent.trace, name, time.perf_counter() - wall)
+    current.wall = wall
+    current.cpu = cpu
+    parent.trace._attach(parent, current)
+    parent.trace._close(parent, current)
+
+
+def server_timing(trace):
+    """`Server-Timing` value: per-stage wall time as dur, CPU time in desc, then the request total"""
+    entries = [
+        f'{name};dur={wall * 1000:.1f};desc="cpu {cpu * 1000:.1f}ms"'
+        for name, (wall, cpu) in sorted(trace.stage_totals().items(), key=lambda item: -item[1][0])
+    ]
+    root = trace.root
+    entries.append(f'total;dur={root.wall * 1000:.1f};desc="cpu {root.cpu * 1000:.1f}ms"')
+    return ', '.join(entries)
+
+
+def write_sampled(trace, **fields):
+    """Append the full span tree of a sampled trace to TRACE_LOG_PATH"""
+    if not trace.sampled or TRACE_LOG_PATH is None:
+        return
+    line = json.dumps({**trace.to_dict(), **fields}, separators=(',', ':')) + '\n'
+    with _log_lock:
+        # One write per line on an O_APPEND file: workers never interleave partial lines
+        with open(TRACE_LOG_PATH, 'a', encoding='utf-8') as f:
+            f.write(line)
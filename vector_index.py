@@ -0,0 +1,523 @@
+"""
+Memory-Mapped Vector Index
+- L2-normalized embeddings stored on disk as float16 or int8 (+ per-row scale) .npy files
+- Searched through np.load(mmap_mode='r'): pages are shared by every worker via the OS cache
+- Optional IVF partitioning (numpy spherical k-means): only the closest `n_probe` lists are scanned
+- Appends are buffered in memory; save() writes a new generation and switches the manifest atomically
+- flush() persists only the delta (appended segment + deleted positions); a full save re-trains IVF
+  once the delta outgrows `compact_ratio` of the base or is older than `compact_age` seconds
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer deployments only
+    fcntl = None
+
+SEARCH_BLOCK_ROWS = 65536
+IVF_MIN_ROWS_PER_LIST = 4
+
+
+def normalize_rows(vectors):
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize(vectors, dtype):
+    """(codes, scales) for normalized float32 rows; scales is None for float16"""
+    if dtype == 'float16':
+        return vectors.astype(np.float16), None
+    if dtype == 'int8':
+        scales = np.abs(vectors).max(axis=1).astype(np.float32) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown index dtype: {dtype}")
+
+
+def _assign(vectors, centroids):
+    """Closest centroid (by dot product) for every row, computed block by block"""
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+        assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def spherical_kmeans(vectors, n_lists, iterations=20, seed=0, sample=100000):
+    """Unit-length centroids for IVF partitioning, trained on at most `sample` rows"""
+    rng = np.random.default_rng(seed)
+    train = vectors if len(vectors) <= sample else vectors[np.sort(rng.choice(len(vectors), sample, replace=False))]
+    train = np.asarray(train, dtype=np.float32)
+    centroids = np.array(train[rng.choice(len(train), n_lists, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assignment = _assign(train, centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=n_lists)
+        sums = np.zeros_like(centroids)
+        filled = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        sums[filled] = np.add.reduceat(train[order], starts, axis=0)
+        if not filled.all():
+            # Re-seed empty lists from random rows
+            sums[~filled] = train[rng.choice(len(train), int((~filled).sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class _Segment:
+    """One immutable run of rows on disk (the base or an appended segment), memory-mapped"""
+
+    def __init__(self, directory, files):
+        path = lambda name: os.path.join(directory, files[name])
+        self.files = dict(files)
+        self.paths = [path(name) for name in files]
+        self.codes = np.load(path('vectors'), mmap_mode='r')
+        self.scales = np.load(path('scales')) if 'scales' in files else None
+        self.centroids = np.load(path('centroids')) if 'centroids' in files else None
+        self.offsets = np.load(path('offsets')) if 'offsets' in files else None
+        with open(path('metadata'), 'r', encoding='utf-8') as f:
+            self.metadata = json.load(f)
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def _ranges(self, query, n_probe):
+        if self.centroids is None:
+            return [(0, len(self))]
+        lists = np.argsort(-(self.centroids @ query))[:n_probe]
+        return [(int(self.offsets[i]), int(self.offsets[i + 1])) for i in sorted(lists)]
+
+    def score(self, query, n_probe):
+        """(row positions, cosine scores) for every row in the probed lists"""
+        positions, scores = [], []
+        for start, stop in self._ranges(query, n_probe):
+            for block_start in range(start, stop, SEARCH_BLOCK_ROWS):
+                block_stop = min(block_start + SEARCH_BLOCK_ROWS, stop)
+                block_scores = np.asarray(self.codes[block_start:block_stop], dtype=np.float32) @ query
+                if self.scales is not None:
+                    block_scores *= self.scales[block_start:block_stop]
+                positions.append(np.arange(block_start, block_stop))
+                scores.append(block_scores)
+        if not positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return np.concatenate(positions), np.concatenate(scores)
+
+    def vectors(self):
+        """Dequantized float32 rows (used when merging into the next generation)"""
+        vectors = np.asarray(self.codes, dtype=np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[:, None]
+        return vectors
+
+
+class _Generation:
+    """
+    One immutable version of the index: the base segment (IVF-partitioned at
+    the last full save) followed by appended segments, plus deleted positions.
+    Segments unchanged since `previous` are reused instead of re-read.
+    """
+
+    def __init__(self, directory, manifest, previous=None):
+        self.generation = manifest['generation']
+        self.dtype = manifest['dtype']
+        self.attributes = manifest.get('attributes', {})
+        self.created_at = manifest.get('created_at', 0.0)
+        self.appended_at = manifest.get('appended_at')
+        self.deleted = frozenset(manifest.get('deleted', []))
+        mapped = {tuple(sorted(s.files.items())): s for s in previous.segments} if previous is not None else {}
+        self.segments = [
+            mapped.get(tuple(sorted(files.items()))) or _Segment(directory, files)
+            for files in [manifest['files']] + manifest.get('segments', [])
+        ]
+        self.base = self.segments[0]
+        self.starts = np.cumsum([0] + [len(segment) for segment in self.segments[:-1]])
+        self.metadata = [meta for segment in self.segments for meta in segment.metadata]
+        self.files = [path for segment in self.segments for path in segment.paths]
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def score(self, query, n_probe):
+        """(row positions, cosine scores): probed IVF lists of the base, every appended row"""
+        results = [segment.score(query, n_probe) for segment in self.segments]
+        positions = np.concatenate([p + start for start, (p, _) in zip(self.starts, results)])
+        return positions, np.concatenate([s for _, s in results])
+
+    def vectors(self):
+        """Dequantized float32 rows of every segment (used when merging into the next generation)"""
+        return np.concatenate([segment.vectors() for segment in self.segments])
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over unit-normalized embeddings with one JSON
+    metadata dict per row.
+
+    Readers search the resident generation while `add` / `remove` only touch
+    an in-memory delta; `save()` merges everything into a new generation on
+    disk (re-training IVF lists) and swaps it in, `flush()` appends the delta
+    without rewriting existing rows. Other processes pick the new generation up
+    on their next search (manifest checked every `check_interval`).
+    """
+
+    MANIFEST = 'index.json'
+
+    def __init__(self, directory, dtype='float16', n_lists=0, n_probe=8, check_interval=2.0,
+                 compact_ratio=0.2, compact_age=3600.0):
+        self.directory = directory
+        self.dtype = dtype
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.check_interval = check_interval
+        self.compact_ratio = compact_ratio
+        self.compact_age = compact_age
+        self.last_error = None
+        self._generation = None
+        self._manifest_mtime = None
+        self._last_check = 0.0
+        self._pending_vectors = []
+        self._pending_metadata = []
+        self._pending_removals = []
+        self._removed = frozenset()
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, self.MANIFEST)
+
+    def load(self):
+        """(Re)open the generation named by the manifest if it changed. Returns True if a new one was mapped."""
+        self._last_check = time.monotonic()
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._manifest_mtime:
+            return False
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            current = self._generation
+            if current is not None and current.generation == manifest['generation']:
+                self._manifest_mtime = mtime
+                return False
+            generation = _Generation(self.directory, manifest, current)
+        except Exception as e:
+            # Keep serving the mapped generation (e.g. files replaced mid-read)
+            self.last_error = str(e)
+            print(f"⚠️ Vector index load failed for {self.directory}: {e}")
+            return False
+
+        with self._lock:
+            if current is not self._generation:
+                return False
+            self._generation = generation
+            self._manifest_mtime = mtime
+            self._removed = generation.deleted | self._matching(generation, self._pending_removals)
+        self.last_error = None
+        print(f"✅ Mapped vector index {self.directory} (generation {generation.generation}, {len(generation)} rows)")
+        return True
+
+    def refresh(self):
+        if self._generation is None or time.monotonic() - self._last_check >= self.check_interval:
+            self.load()
+
+    @property
+    def attributes(self):
+        """Free-form build info stored in the manifest (e.g. the embedding model name)"""
+        self.refresh()
+        generation = self._generation
+        return generation.attributes if generation is not None else {}
+
+    def __len__(self):
+        self.refresh()
+        generation = self._generation
+        base = len(generation) - len(self._removed) if generation is not None else 0
+        return base + len(self._pending_metadata)
+
+    def add(self, vectors, metadata):
+        """Buffer rows (visible to search immediately, persisted by save())"""
+        vectors = normalize_rows(vectors)
+        if len(vectors) != len(metadata):
+            raise ValueError("One metadata entry is required per vector")
+        with self._lock:
+            self._pending_vectors = self._pending_vectors + list(vectors)
+            self._pending_metadata = self._pending_metadata + list(metadata)
+
+    @staticmethod
+    def _matching(generation, predicates):
+        if generation is None or not predicates:
+            return frozenset()
+        return frozenset(
+            i for i, meta in enumerate(generation.metadata)
+            if i not in generation.deleted and any(p(meta) for p in predicates)
+        )
+
+    def remove(self, predicate):
+        """Drop every row whose metadata matches `predicate`. Returns the number removed."""
+        self.refresh()
+        with self._lock:
+            removed = self._removed | self._matching(self._generation, [predicate])
+            keep = [i for i, meta in enumerate(self._pending_metadata) if not predicate(meta)]
+            count = len(removed) - len(self._removed) + len(self._pending_metadata) - len(keep)
+            self._pending_removals = self._pending_removals + [predicate]
+            self._removed = removed
+            self._pending_vectors = [self._pending_vectors[i] for i in keep]
+            self._pending_metadata = [self._pending_metadata[i] for i in keep]
+        return count
+
+    def search(self, query, k=10, n_probe=None):
+        """[(score, metadata)] for the `k` rows most cosine-similar to `query`, best first"""
+        self.refresh()
+        query = normalize_rows(query)[0]
+        with self._lock:
+            generation, removed = self._generation, self._removed
+            pending_vectors, pending_metadata = self._pending_vectors, self._pending_metadata
+
+        scores = np.empty(0, dtype=np.float32)
+        refs = np.empty(0, dtype=np.int64)
+        if generation is not None and len(generation):
+            refs, scores = generation.score(query, n_probe or self.n_probe)
+            if removed:
+                alive = ~np.isin(refs, np.fromiter(removed, dtype=np.int64, count=len(removed)))
+                refs, scores = refs[alive], scores[alive]
+        if pending_vectors:
+            # Pending rows are referenced as -1, -2, ... to keep one score array
+            scores = np.concatenate([scores, np.vstack(pending_vectors) @ query])
+            refs = np.concatenate([refs, -1 - np.arange(len(pending_vectors))])
+
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [
+            (float(scores[i]), generation.metadata[refs[i]] if refs[i] >= 0 else pending_metadata[-1 - refs[i]])
+            for i in top
+        ]
+
+    @contextmanager
+    def _writer_lock(self):
+        """Serialize save() across processes (e.g. pre-forked workers) via an advisory file lock"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self, attributes=None):
+        """Merge the delta into a new on-disk generation and map it (IVF lists re-trained)"""
+        with self._writer_lock():
+            # Build on the newest generation, even if another process wrote it
+            self.load()
+            return self._save_locked(attributes)
+
+    def rebuild(self, vectors, metadata, attributes=None):
+        """
+        Replace every row with `vectors` (unit-normalized, float16 is fine) in one
+        new generation, bypassing the per-row delta (offline corpus builds).
+        """
+        if len(vectors) != len(metadata):
+            raise ValueError("One metadata entry is required per vector")
+        with self._writer_lock():
+            self.load()
+            return self._save_locked(attributes, (vectors, list(metadata)))
+
+    def _save_locked(self, attributes, replacement=None):
+        with self._lock:
+            generation, removed = self._generation, self._removed
+            if attributes is None:
+                attributes = generation.attributes if generation is not None else {}
+            pending_vectors, pending_metadata = self._pending_vectors, self._pending_metadata
+
+            parts, metadata = [], []
+            if replacement is not None:
+                parts.append(replacement[0])
+                metadata.extend(replacement[1])
+            elif generation is not None:
+                alive = np.ones(len(generation), dtype=bool)
+                alive[list(removed)] = False
+                parts.append(generation.vectors()[alive])
+                metadata.extend(meta for meta, keep in zip(generation.metadata, alive) if keep)
+            if pending_vectors and replacement is None:
+                parts.append(np.vstack(pending_vectors))
+                metadata.extend(pending_metadata)
+            if not parts:
+                if generation is None or not removed:
+                    return False
+                parts.append(np.empty((0, generation.base.codes.shape[1]), dtype=np.float32))
+            vectors = np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+            number = generation.generation + 1 if generation is not None else 1
+            manifest = self._write_generation(number, vectors, metadata, attributes)
+            self._generation = _Generation(self.directory, manifest)
+            self._manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+            self._removed = frozenset()
+            self._pending_removals = []
+            self._pending_vectors = []
+            self._pending_metadata = []
+
+        if generation is not None:
+            self._unlink(generation.files)
+        return True
+
+    @staticmethod
+    def _unlink(paths):
+        # Processes still mapping the old files keep their (unlinked) pages
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def flush(self):
+        """
+        Persist the delta without rewriting existing rows: pending rows become an
+        appended segment, removals become deleted positions. Falls back to save()
+        when the generation is due for compaction. Returns True if anything was written.
+        """
+        with self._writer_lock():
+            self.load()
+            if self._compaction_due():
+                return self._save_locked(None)
+            return self._append_locked()
+
+    def _compaction_due(self):
+        generation = self._generation
+        if generation is None:
+            return True
+        delta = len(generation) - len(generation.base) + len(self._pending_metadata) + len(self._removed)
+        if delta > self.compact_ratio * len(generation.base):
+            return True
+        return bool(self.compact_age and generation.appended_at and time.time() - generation.appended_at > self.compact_age)
+
+    def _append_locked(self):
+        with self._lock:
+            generation, removed = self._generation, self._removed
+            pending_vectors, pending_metadata = self._pending_vectors, self._pending_metadata
+            if not pending_vectors and removed == generation.deleted:
+                return False
+
+            number = generation.generation + 1
+            segments = [segment.files for segment in generation.segments[1:]]
+            merged = []
+            if pending_vectors:
+                codes, scales = quantize(np.vstack(pending_vectors), generation.dtype)
+                metadata = list(pending_metadata)
+                # Size-tiered: fold trailing segments no larger than the new one into it,
+                # so a stream of small appends keeps a logarithmic number of segments
+                while segments and len(generation.segments[len(segments)]) <= len(metadata):
+                    tail = generation.segments[len(segments)]
+                    segments.pop()
+                    merged.append(tail)
+                    codes = np.concatenate([tail.codes, codes])
+                    scales = np.concatenate([tail.scales, scales]) if scales is not None else None
+                    metadata = tail.metadata + metadata
+                arrays = {'vectors': codes}
+                if scales is not None:
+                    arrays['scales'] = scales
+                segments.append(self._write_files(f"append-{number}", arrays, metadata))
+
+            base = generation.base
+            manifest = {
+                'generation': number,
+                'count': len(generation) + len(pending_metadata),
+                'dim': int(base.codes.shape[1]),
+                'dtype': generation.dtype,
+                'n_lists': len(base.centroids) if base.centroids is not None else 0,
+                'created_at': generation.created_at,
+                'appended_at': generation.appended_at or time.time(),
+                'attributes': generation.attributes,
+                'files': base.files,
+                'segments': segments,
+                'deleted': sorted(int(i) for i in removed)
+            }
+            self._write_manifest(manifest)
+            self._generation = _Generation(self.directory, manifest, generation)
+            self._manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+            self._removed = self._generation.deleted
+            self._pending_removals = []
+            self._pending_vectors = []
+            self._pending_metadata = []
+
+        self._unlink(path for segment in merged for path in segment.paths)
+        return True
+
+    def _write_generation(self, number, vectors, metadata, attributes):
+        arrays = {}
+
+        n_lists = self.n_lists if self.n_lists and len(vectors) >= self.n_lists * IVF_MIN_ROWS_PER_LIST else 0
+        if n_lists:
+            centroids = spherical_kmeans(vectors, n_lists)
+            assignment = _assign(vectors, centroids)
+            # Rows of each list stored contiguously: a probe is one slice of the mmap
+            order = np.argsort(assignment, kind='stable')
+            vectors = vectors[order]
+            metadata = [metadata[i] for i in order]
+            arrays['centroids'] = centroids
+            arrays['offsets'] = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=n_lists)))).astype(np.int64)
+
+        arrays['vectors'], scales = quantize(vectors, self.dtype)
+        if scales is not None:
+            arrays['scales'] = scales
+
+        files = self._write_files(number, arrays, metadata)
+        manifest = {
+            'generation': number,
+            'count': len(metadata),
+            'dim': int(vectors.shape[1]),
+            'dtype': self.dtype,
+            'n_lists': n_lists,
+            'created_at': time.time(),
+            'attributes': attributes,
+            'files': files
+        }
+        self._write_manifest(manifest)
+        return manifest
+
+    def _write_files(self, suffix, arrays, metadata):
+        os.makedirs(self.directory, exist_ok=True)
+        files = {}
+        for name, array in arrays.items():
+            files[name] = f"{name}-{suffix}.npy"
+            np.save(os.path.join(self.directory, files[name]), array)
+        files['metadata'] = f"metadata-{suffix}.json"
+        with open(os.path.join(self.directory, files['metadata']), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f)
+        return files
+
+    def _write_manifest(self, manifest):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def stats(self):
+        generation = self._generation
+        return {
+            'path': self.directory,
+            'generation': generation.generation if generation is not None else None,
+            'rows': len(generation) if generation is not None else 0,
+            'appended_segments': len(generation.segments) - 1 if generation is not None else 0,
+            'pending': len(self._pending_metadata),
+            'removed': len(self._removed),
+            'dtype': generation.dtype if generation is not None else self.dtype,
+            'ivf_lists': len(generation.base.centroids) if generation is not None and generation.base.centroids is not None else 0,
+            'n_probe': self.n_probe,
+            'mapped_bytes': sum(int(s.codes.nbytes) for s in generation.segments) if generation is not None else 0,
+            'last_error': self.last_error
+        }